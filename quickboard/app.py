@@ -5,11 +5,16 @@ import dash_bootstrap_components as dbc
 from dash import html
 from dash import dcc
 
+from quickboard.base import DynamicPanel
+from quickboard.utils.callbacks import register_callbacks
+
 
 def generate_layout(board):
     """
-    Creates the layout of the app using a Quickboard object.
+    Creates the layout of the app using a Quickboard object, registering the callbacks of all components built so far.
     """
+    register_callbacks()
+
     layout = html.Div([
         board,
         dcc.Store(id='data_store', data={'current_tab': "", 'sidebar_controls': []}),
@@ -17,29 +22,72 @@ def generate_layout(board):
 
     return layout
 
-def create_app(board, theme=dbc.themes.BOOTSTRAP, app_title="Dash"):
+def create_app(board, theme=dbc.themes.BOOTSTRAP, app_title="Dash", record_sessions=None, compress=False,
+               compress_min_size=1024, warm_up=False, warm_up_workers=1, memory_budget=None, memory_downcast=False,
+               memory_report=False):
+    """
+    Creates the Dash app for a Quickboard object. If record_sessions is a file path, the callback payloads received
+    from each browser session get appended to it, for replaying later with quickboard.loadtest.LoadDriver. When compress
+    is True, callback responses of at least compress_min_size bytes are sent gzip (or brotli) compressed. When warm_up
+    is True, the panels' outputs for the default control values are computed before the app is returned, using
+    warm_up_workers threads, so the first page load doesn't wait on them. A memory_budget in bytes gets enforced at
+    startup and periodically after callbacks by evicting cache entries and snapshots, and by downcasting numeric columns
+    if memory_downcast is True (see quickboard.memory.MemoryMonitor). When memory_report is True, a JSON report of the
+    memory held by each tab and panel is served at /_quickboard/memory. Panels built with `export` formats get their
+    data streamed at /_quickboard/export (see quickboard.export.DataExporter).
+    """
     app = dash.Dash(__name__, external_stylesheets=[theme], title=app_title)
     app.config.suppress_callback_exceptions = True
 
     app.layout = generate_layout(board)
+    # Optional features are only imported when used, along with their dependencies
+    if warm_up:
+        from quickboard.warmup import WarmUp
+        WarmUp(board, max_workers=warm_up_workers).run()
+    if memory_budget is not None or memory_report:
+        from quickboard.memory import MemoryMonitor, REPORT_ROUTE
+        monitor = MemoryMonitor(board, budget=memory_budget, downcast=memory_downcast)
+        monitor.enforce()
+        monitor.attach(app.server, route=REPORT_ROUTE if memory_report else None)
+
+    if len(DynamicPanel.exported_panels) > 0:
+        from quickboard.export import DataExporter
+        DataExporter().attach(app.server)
+
+    if record_sessions is not None:
+        from quickboard.loadtest import SessionRecorder
+        SessionRecorder(record_sessions).attach(app.server)
+    if compress:
+        from quickboard.compression import ResponseCompressor
+        ResponseCompressor(min_size=compress_min_size).attach(app.server)
     return app
 
 
 def start_app(board, theme=dbc.themes.BOOTSTRAP, jupyter_mode='external', host=os.getenv("HOST", "127.0.0.1"),
-              port=8050, proxy=None, debug=True, app_title="Dash", **flask):
+              port=8050, proxy=None, debug=True, app_title="Dash", record_sessions=None, compress=False,
+              compress_min_size=1024, warm_up=False, warm_up_workers=1, memory_budget=None, memory_downcast=False,
+              memory_report=False, **flask):
     """
     Takes a Quickboard object and creates app with layout, then runs the app on given port.
     Extra args get sent to Flask server. Theme should be selected from dbc.themes.
     Other nice themes: DARKLY, CYBORG, BOOTSTRAP, FLATLY, LUX, LUMEN, SOLAR.
     """
-    app = create_app(board=board, theme=theme, app_title=app_title)
+    app = create_app(board=board, theme=theme, app_title=app_title, record_sessions=record_sessions,
+                     compress=compress, compress_min_size=compress_min_size, warm_up=warm_up,
+                     warm_up_workers=warm_up_workers, memory_budget=memory_budget,
+                     memory_downcast=memory_downcast, memory_report=memory_report)
     app.run(host=host, jupyter_mode=jupyter_mode, port=port, proxy=proxy, debug=debug, **flask)
 
 
-def get_app_server(board, theme=dbc.themes.BOOTSTRAP, app_title="Dash"):
+def get_app_server(board, theme=dbc.themes.BOOTSTRAP, app_title="Dash", record_sessions=None, compress=False,
+                   compress_min_size=1024, warm_up=False, warm_up_workers=1, memory_budget=None,
+                   memory_downcast=False, memory_report=False):
     """
     This method can be used as an alternative to the above for running the app in a production environment, e.g. with
     gunicorn, using the server variable.
     """
-    app = create_app(board=board, theme=theme, app_title=app_title)
+    app = create_app(board=board, theme=theme, app_title=app_title, record_sessions=record_sessions,
+                     compress=compress, compress_min_size=compress_min_size, warm_up=warm_up,
+                     warm_up_workers=warm_up_workers, memory_budget=memory_budget,
+                     memory_downcast=memory_downcast, memory_report=memory_report)
     return app.server
@@ -1,5 +1,6 @@
 from .contentgrid import *
 from ._dynamicpanel import *
+from .panelbatch import *
 from .basetab import *
 from .datapanel import *
 from .plotpanel import *
@@ -1,13 +1,25 @@
-from dash import html, dcc
+import hashlib
+import inspect
+import warnings
+
+from dash import html, dcc, ctx
+from dash.dependencies import Input, Output, State, MATCH
 
 import pandas as pd
+from plotly.io.json import to_json_plotly
 
 import quickboard.styles as styles
 from quickboard.base import ContentGrid
 from quickboard.primitives import Panel
 from quickboard.primitives import DataManager
-
-from quickboard.plugins import *
+from quickboard.primitives import ControlPlugin
+from quickboard.primitives import RowView
+from quickboard.primitives import make_cache_key, callable_fingerprint, frame_fingerprint
+from quickboard.utils.asyncrunner import run_async
+from quickboard.utils.callbacks import deferred_callback, deferred_clientside_callback, deferred_shared_callback
+from quickboard.utils.clientcache import CACHE_LOOKUP, CACHE_STORE
+from quickboard.utils.export import EXPORT_FORMATS, EXPORT_ROUTE, EXPORT_STATE, stream_frame
+from quickboard.utils.viewport import VISIBILITY_OBSERVER
 
 class DynamicPanel(Panel):
     """
@@ -24,11 +36,78 @@ class DynamicPanel(Panel):
         all_contents_border_size = size of border around all contents
         dynamic_content_border_size = size of border around dynamic content
         plugin_border_size = size of border around plugin group
+        cache = optional ResultCache (e.g. MemoryCache or DiskCache) for storing filtered frames and outputs; a DiskCache
+        lets all workers on a host reuse each other's results
+        batched = when True, sidebar changes update this panel together with the other batched panels on its tab in a
+        single callback, sharing the sidebar-filtered data between panels on the same data source (see PanelBatch)
+        payload_budget = optional maximal size in bytes of the JSON sent to the browser by this panel's callback
+        payload_fallback = what to do with outputs over payload_budget; 'warn' sends them anyway with a warning, other
+        options depend on the panel type
+        max_concurrency = for a data_transform defined with `async def`, e.g. one querying a database, the maximal number
+        of its calls running at once across panels on the same data source; None for no limit
+        dtype_backend = 'pyarrow' to hold the data source in Arrow-backed dtypes, which are much smaller for string-heavy
+        tables (see DataManager)
+        client_cache = optional maximal number of outputs to keep in the browser, keyed by control state, so that going
+        back to a state seen recently is served without a request to the server (see cache_on_client)
+        pyramid = optional TimePyramid summarizing the data source at several resolutions (see DataManager)
+        sidecar = for .csv and .tsv data sources, True or a directory path to keep a columnar copy of the file that later
+        loads memory-map instead of parsing it (see DataManager)
+        export = optional list of formats among 'csv', 'parquet' and 'arrow' to offer download links for, streaming the
+        panel's current filtered data from the server (see export and quickboard.export.DataExporter)
     """
+    # Panels updated by the pattern-matching callback of their class, by the unique_id in the ids of their components
+    matched_panels = {}
+    # Panels offering export links, by the export_id in the ids of their links
+    exported_panels = {}
     def __init__(self, dynamic_content, data_source="data", header="", body="", plugins=[], plugin_align="bottom", plugin_wrap=2,
-                 full_border_size=0, all_contents_border_size=2, dynamic_content_border_size=0, plugin_border_size=0):
-        self.data_manager = DataManager(data_source)
+                 full_border_size=0, all_contents_border_size=2, dynamic_content_border_size=0, plugin_border_size=0,
+                 cache=None, batched=False, payload_budget=None, payload_fallback="warn", max_concurrency=None,
+                 dtype_backend=None, client_cache=None, pyramid=None, sidecar=None, export=None):
+        self.data_manager = DataManager(data_source, dtype_backend=dtype_backend, pyramid=pyramid, sidecar=sidecar)
         self.data_manager.load_data()
+        self.cache = cache
+        self.batched = batched
+        self.panel_batch = None
+        self.payload_budget = payload_budget
+        self.payload_fallback = payload_fallback
+        self.max_concurrency = max_concurrency
+        # Set by match_pattern, before this is called, for panels updated by the pattern-matching callback of their
+        # class; children classes that don't match their panels leave them None
+        self.unique_id = getattr(self, 'unique_id', None)
+        self.visible = getattr(self, 'visible', None)
+        # Callback function updating this panel from the data_store and its own plugins, set by children classes when
+        # its output for the default control values can be computed ahead of time (see quickboard.warmup)
+        self.update_callback = None
+        # Children classes also hold a dcc.Store as emitted_state, with the output_state of the output each session
+        # shows, so that callbacks can skip sending an equal output again
+        self.client_cache = client_cache
+        client_stores = []
+        if client_cache is not None:
+            assert not batched, "Batched panels can't use a client_cache."
+            store_id = self.emitted_state.id
+            self.client_store = dcc.Store(id=f"{store_id}_client_cache",
+                                          data={'max_entries': client_cache, 'order': [], 'entries': {}})
+            self.client_request = dcc.Store(id=f"{store_id}_client_request", data=None)
+            self.client_served = dcc.Store(id=f"{store_id}_client_served", data=None)
+            client_stores = [self.client_store, self.client_request, self.client_served]
+
+        self.export = export
+        self.export_state = None
+        export_bar = []
+        if export is not None:
+            assert all(fmt in EXPORT_FORMATS for fmt in export), f"Export formats must be among {list(EXPORT_FORMATS)}."
+            # Ids are assigned in order of creation, so are the same in all workers building the same board
+            self.export_id = len(DynamicPanel.exported_panels)
+            DynamicPanel.exported_panels[self.export_id] = self
+            # Each link submits the form, posting the control state held by the hidden field to its format's route
+            self.export_state = dcc.Input(id={'component_type': 'panel_export', 'export_id': self.export_id},
+                                          type='hidden', name='state', value="")
+            export_links = [
+                html.Button(fmt.upper(), type='submit', formAction=f"{EXPORT_ROUTE}/{self.export_id}.{fmt}",
+                            style=styles.PANEL_EXPORT_LINK_STYLE)
+                for fmt in export
+            ]
+            export_bar = [html.Form([self.export_state] + export_links, method='post', style=styles.PANEL_EXPORT_STYLE)]
 
         self.header = html.H3(header, style=styles.PANEL_HEADER_STYLE) if type(header) == str else header
 
@@ -53,59 +132,477 @@ class DynamicPanel(Panel):
             self.body,
             html.Br(),
             self.full_content_grid
-        ]
+        ] + export_bar + client_stores
         super().__init__(main_content=self.children, border_size=full_border_size)
 
     def data_transform(self, df):
         """
         A method for applying specific transformations to the data source before passing to main object, regardless
-        of control object states.
+        of control object states. May be overridden with an `async def` method when it does I/O, see transform_data.
         """
         return df
 
-    def apply_sidebar_transforms(self, data_state):
+    def transform_data(self, df):
+        """
+        Applies data_transform to df. Coroutine data_transforms run on an event loop shared by all callbacks of the
+        process, the callback's thread waiting for the result, so user code can be written with async libraries and
+        limited by max_concurrency. Each callback still holds its thread while it waits.
+        """
+        if not inspect.iscoroutinefunction(self.data_transform):
+            return self.data_transform(df)
+        return run_async(self.data_transform(df), limit_key=self.data_manager.source_key(), limit=self.max_concurrency)
+
+    @staticmethod
+    def matches_pattern(data_source, batched, client_cache):
+        """
+        Returns whether a panel built with the given arguments can be updated by the pattern-matching callback of its
+        class, rather than by callbacks of its own: panels listening to the data_store and their own plugins only.
+        Panels on interactive data listen to another panel's graph, and batched or client-cached panels need
+        callbacks of their own.
+        """
+        return not isinstance(data_source, list) and not batched and client_cache is None
+
+    def match_pattern(self):
+        """
+        Gives this panel a unique_id, to be used in pattern ids of its components, and registers it for dispatching
+        by the pattern-matching callback of its class. Ids are assigned in order of creation, so are the same in all
+        workers building the same board.
+        """
+        self.unique_id = len(DynamicPanel.matched_panels)
+        DynamicPanel.matched_panels[self.unique_id] = self
+        # Whether the panel is in the browser's viewport; always True unless made lazy, see set_lazy
+        self.visible = dcc.Store(id={'component_type': 'panel_visible', 'unique_id': self.unique_id}, data=True)
+        return self.unique_id
+
+    def match_plugins(self):
+        """
+        Gives the controls of this panel's plugins pattern ids under its unique_id, in plugin order, then redeclares the
+        plugins' internal callbacks for their new ids.
+        """
+        controls = [plugin for plugin in self.plugins if hasattr(plugin, 'control')]
+        for i, plugin in enumerate(controls):
+            plugin.control.id = {'control_type': 'panel_control', 'unique_id': self.unique_id, 'plugin_index': i}
+            plugin.setup_internal_callback()
+
+    def observe_visibility(self):
+        """
+        Declares the clientside callback shared by matched panels, which watches lazy panels enter and leave the
+        browser's viewport, and sets their visible store accordingly.
+        """
+        self.id = {'component_type': 'panel', 'unique_id': self.unique_id}
+        deferred_shared_callback(
+            Output({'component_type': 'panel_visible', 'unique_id': MATCH}, 'data'),
+            Input({'component_type': 'panel_visible', 'unique_id': MATCH}, 'id'),
+            State({'component_type': 'panel_visible', 'unique_id': MATCH}, 'data'),
+            State({'component_type': 'panel', 'unique_id': MATCH}, 'id')
+        )(VISIBILITY_OBSERVER)
+
+    def set_lazy(self):
+        """
+        Makes this panel update only while in the browser's viewport, e.g. as part of a lazy ContentGrid or BaseTab,
+        so that the panels in view get computed first. Only applies to panels updated by the pattern-matching callback
+        of their class; others are left as they are.
+        """
+        if self.visible is not None:
+            self.visible.data = False
+
+    @staticmethod
+    def matched_panel():
+        """
+        Returns the panel whose outputs the running pattern-matching callback updates.
+        """
+        return DynamicPanel.matched_panels[ctx.outputs_list[0]['id']['unique_id']]
+
+    @staticmethod
+    def matched_control_values():
+        """
+        Returns the values of the running pattern-matching callback's panel_control Inputs, in plugin order.
+        """
+        controls = [i for i in ctx.inputs_list if isinstance(i, list)][0]
+        return [c.get('value') for c in sorted(controls, key=lambda c: c['id']['plugin_index'])]
+
+    def cache_on_client(self, outputs, emit, inputs):
+        """
+        Registers the callbacks of the client_cache: on each change of inputs, a clientside callback looks up the
+        outputs for their values in the browser, and only on a miss requests them from the server, where emit computes
+        them. The outputs shown after the server answered are then added to the cache.
+        Inputs:
+            outputs = list of (component, property) pairs of the outputs to cache, excluding emitted_state
+            emit = callback method computing the outputs followed by emitted_state, e.g. emit_plot, given the
+            emitted_state and the values of inputs
+            inputs = list of the Inputs of emit after emitted_state
+        """
+        self.client_emit = emit
+        deferred_clientside_callback(
+            CACHE_LOOKUP,
+            [Output(c, p, allow_duplicate=True) for c, p in outputs],
+            Output(self.emitted_state, 'data', allow_duplicate=True),
+            Output(self.client_request, 'data'),
+            inputs,
+            State(self.client_store, 'data'),
+            State(self.emitted_state, 'data'),
+            prevent_initial_call='initial_duplicate'
+        )
+        deferred_callback(
+            [Output(c, p) for c, p in outputs],
+            Output(self.emitted_state, 'data'),
+            Output(self.client_served, 'data'),
+            State(self.emitted_state, 'data'),
+            Input(self.client_request, 'data'),
+            prevent_initial_call=True
+        )(self.emit_requested)
+        deferred_clientside_callback(
+            CACHE_STORE,
+            Output(self.client_store, 'data'),
+            Input(self.client_served, 'data'),
+            State(self.client_store, 'data'),
+            [State(c, p) for c, p in outputs],
+            State(self.emitted_state, 'data'),
+            prevent_initial_call=True
+        )
+
+    def link_exports(self, interactive_data):
+        """
+        Declares the clientside callback keeping the control state posted by the export links current, given the Input
+        of the interactive data the panel listens to. Called by children classes once their controls have their final
+        ids.
+        """
+        if self.export is None:
+            return
+        deferred_clientside_callback(
+            EXPORT_STATE,
+            Output(self.export_state, 'value'),
+            Input('data_store', 'data'),
+            interactive_data,
+            [Input(x.control, 'value') for x in self.plugins if hasattr(x, 'control')]
+        )
+
+    def export_frame(self, data_state, interactive_data, control_values):
+        """
+        Returns the rows the panel currently shows for the given control states, as passed to its plotter or table,
+        starting from the cached result of the sidebar filters if any.
+        """
+        sub_df, _ = self.apply_sidebar_transforms(data_state, self.source_frame(interactive_data))
+        df, _ = self.apply_plugin_transforms(None, interactive_data, sub_df, control_values)
+        return self.transform_data(df)
+
+    def export_rows(self, fmt, data_state, interactive_data={}, *control_values, batch_rows=65536):
+        """
+        Returns a generator of the chunks of bytes encoding the rows the panel shows for the given control states in
+        the given format, one batch of batch_rows rows at a time (see stream_frame in quickboard.utils.export). The rows
+        are filtered when called, and only encoded as the generator is consumed.
+        """
+        df = self.export_frame(data_state, interactive_data, control_values)
+        return stream_frame(df, fmt, batch_rows=batch_rows)
+
+    def emit_requested(self, emitted_state, request):
+        """
+        Callback method computing the outputs requested by the client_cache on a miss, followed by the request's key.
+        """
+        return list(self.client_emit(emitted_state, *request['inputs'])) + [request['key']]
+
+    def apply_sidebar_transforms(self, data_state, df=None):
         """
         A method that is called when sidebar controls are toggled to update the data_state. Performs appropriate data
-        and DP transforms before individual plugin transform as applied.
+        and DP transforms before individual plugin transform as applied. Transforms the given df instead of the whole
+        data source if provided, e.g. to filter only newly streamed rows.
         """
         sidebar_controls = data_state['sidebar_controls']
-        sub_df = self.data_manager.df
-        updated_panel = {}
-        for c in sidebar_controls:
-            classname, control_attributes, control_value = c
-            config = eval(f"{classname}.configure")
-            sub_df, panel_dict = config(control_attributes, self, sub_df, control_value)
-            updated_panel = self.merge_dicts(updated_panel, panel_dict)
+
+        # Sidebar results only depend on the data and sidebar state, so can be shared by all panels on the same data
+        key = None
+        if self.cache is not None and self.data_manager.data_version is not None and df is None:
+            key = make_cache_key('sidebar', self.data_manager.data_version, sidebar_controls)
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        steps = self.sidebar_steps(sidebar_controls)
+        sub_df = self.source_rows(steps) if df is None else df
+        sub_df, updated_panel = self.run_plan(self.plan_filters(steps), sub_df)
+
+        if key is not None:
+            self.cache.set(key, (sub_df, updated_panel))
         return sub_df, updated_panel
 
+    def output_cache_key(self, component, data_state, interactive_data, control_values, *extra):
+        """
+        Returns the key under which to cache this panel's output for the given control state, or None if the output
+        should not be cached. The component's id is deterministic across workers building the same board, and
+        distinguishes panels whose data and controls are otherwise identical.
+        """
+        callables = self.callables_id()
+        if self.cache is None or self.data_manager.data_version is None or callables is None:
+            return None
+        return make_cache_key(
+            'output', component.id, self.data_manager.data_version, data_state['sidebar_controls'], interactive_data,
+            list(control_values), callables, *extra
+        )
+
+    def output_callables(self):
+        """
+        Returns the callables computing this panel's output from its filtered rows.
+        """
+        return [self.data_transform]
+
+    def callables_id(self):
+        """
+        Returns the fingerprints of output_callables, or None if one can't be identified (see callable_fingerprint), in
+        which case this panel's outputs aren't cached. Methods of the panel itself are identified by their code alone,
+        the panel being identified by the ids of its components.
+        """
+        ids = []
+        for func in self.output_callables():
+            if getattr(func, '__self__', None) is self:
+                func = func.__func__
+            ids.append(callable_fingerprint(func))
+        return None if None in ids else ids
+
     def apply_transforms(self, context, interactive_data={}, df=pd.DataFrame(), control_values=[]):
         """
         A method that is called when relevant control objects change state to manipulate data source before
         passing to the main object.
         """
-        dm = self.data_manager
-        # Get source of callback trigger
-        cb_trigger = context.triggered[0]['prop_id'].split('.')[-1]
-        plot_data_types = ['hoverData', 'clickData', 'selectedData']
-        if (dm.source_type == "PlotPanel") & (cb_trigger in plot_data_types):
-            # Case where plot data selected to trigger callback
-            indices = dm.get_interactive_indices(interactive_data)
-            target_data = dm.data_source[0].data_manager.df
-            dm.df = target_data.loc[indices, :]
-            df = dm.df
-
-        # Find control plugin objects corresponding to the controls for this plot panel
+        df, updated_panel = self.apply_plugin_transforms(context, interactive_data, df, control_values)
+        df = self.transform_data(df)
+
+        return df, updated_panel
+
+    def apply_plugin_transforms(self, context, interactive_data={}, df=pd.DataFrame(), control_values=[]):
+        """
+        The part of apply_transforms applying this panel's control plugins, before data_transform.
+        """
+        return self.run_plan(self.plan_filters(self.plugin_steps(control_values)), df)
+
+    @staticmethod
+    def sidebar_steps(sidebar_controls):
+        """
+        Returns the (plugin, control_attributes, control_value) steps of the serialized sidebar controls, in order.
+        Raises KeyError for controls naming no registered ControlPlugin.
+        """
+        return [(ControlPlugin.registry[name], attributes, value) for name, attributes, value in sidebar_controls]
+
+    def plugin_steps(self, control_values):
+        """
+        Returns the (plugin, control_attributes, control_value) steps of this panel's control plugins, in order.
+        """
         controls = [plugin for plugin in self.plugins if hasattr(plugin, 'control')]
+        return [(control, control.control_attributes, value) for control, value in zip(controls, control_values)]
 
-        # Apply control plugin effects
+    def source_rows(self, steps):
+        """
+        Returns the rows of the data source the given sidebar steps start from: for partitioned sources (see
+        PartitionedSource), only the rows of the files in partitions selected by the membership filters on partition
+        columns applied before any plugin modifying values; otherwise all the loaded data.
+        """
+        dm = self.data_manager
+        if dm.source_type != "partitioned":
+            return dm.df
+
+        selected = {}
+        for plugin, control_attributes, control_value in steps:
+            if plugin.modifies_data:
+                break
+            col = control_attributes.get('data_col')
+            values = plugin.selected_values(control_attributes, control_value)
+            if col in dm.data_source.columns and values is not None:
+                values = set(values)
+                selected[col] = selected[col] & values if col in selected else values
+        return dm.partition_rows(selected)
+
+    def plan_filters(self, steps):
+        """
+        Returns the plan applying the given steps, a list of (plugin, control_attributes, control_value, selectivity)
+        tuples. Within each run of consecutive plugins which commute (e.g. filters on equality, membership or ranges of
+        values), the steps are ordered by increasing selectivity, estimated from the column statistics cached by the
+        DataManager, so that the most selective filter cuts the rows down before the others scan them. Other plugins
+        stay in place, as do steps of unknown selectivity relative to each other.
+        """
+        plan = []
+        run = []
+        for step in steps + [None]:
+            if step is not None and step[0].commutes:
+                run.append(step)
+                continue
+            if len(run) > 1:
+                run = [(p, a, v, p.selectivity(a, self, v)) for p, a, v in run]
+                run.sort(key=lambda s: 1 if s[3] is None else s[3])
+            else:
+                run = [(p, a, v, None) for p, a, v in run]
+            plan += run
+            run = []
+            if step is not None:
+                plan.append(step + (None,))
+        return plan
+
+    def run_plan(self, plan, df, row_counts=None):
+        """
+        Applies the steps of a plan from plan_filters to df, returning the transformed DataFrame and the merged dict
+        of changes to the panel. Appends the number of rows left after each step to row_counts if given.
+        """
         updated_panel = {}
-        for control, control_value in zip(controls, control_values):
-            df, panel_dict = control.configure(control.control_attributes, self, df, control_value)
+        for plugin, control_attributes, control_value, _ in plan:
+            df, panel_dict = plugin.configure(control_attributes, self, self.as_rows(df, plugin), control_value)
+            if getattr(plugin, 'modifies_data', True):
+                df = self.data_manager.mark_modified(df)
             updated_panel = self.merge_dicts(updated_panel, panel_dict)
+            if row_counts is not None:
+                row_counts.append(len(df))
 
-        df = self.data_transform(df)
+        return RowView.materialize(df), updated_panel
 
-        return df, updated_panel
+    def explain_filters(self, data_state, *control_values):
+        """
+        Returns the plans applying the sidebar's and this panel's plugins for the given state, for debugging: a dict
+        with keys sidebar and panel, each a list of dicts with the plugin's class name, control_attributes and value,
+        estimated selectivity, and number of rows left after the step, in the order the steps are applied.
+        """
+        explained = {}
+        sidebar_steps = self.sidebar_steps(data_state['sidebar_controls'])
+        df = self.source_rows(sidebar_steps)
+        for name, steps in [('sidebar', sidebar_steps), ('panel', self.plugin_steps(control_values))]:
+            plan = self.plan_filters(steps)
+            row_counts = []
+            df, _ = self.run_plan(plan, df, row_counts)
+            explained[name] = [
+                {'plugin': type(p).__name__ if isinstance(p, ControlPlugin) else p.__name__, 'control_attributes': a,
+                 'control_value': v, 'selectivity': s, 'rows': n}
+                for (p, a, v, s), n in zip(plan, row_counts)
+            ]
+        return explained
+
+    @staticmethod
+    def as_rows(rows, plugin):
+        """
+        Returns the rows to pass to the plugin's configure: a lazy RowView for plugins which only select rows, so that
+        consecutive filters copy the data once rather than at every step, and a DataFrame otherwise.
+        """
+        if plugin.selects_rows:
+            return rows if isinstance(rows, RowView) else RowView(rows)
+        return RowView.materialize(rows)
+
+    def source_frame(self, interactive_data):
+        """
+        Returns the frame the sidebar transforms of a callback start from: for panels on interactive data, the rows
+        chosen in the linked PlotPanel by this session, as given by interactive_data; otherwise None, for the whole
+        data source. The DataManager is shared by all sessions, so is never changed by callbacks.
+        """
+        dm = self.data_manager
+        if dm.source_type == "PlotPanel":
+            return dm.select(interactive_data)
+        return None
+
+    def rows_identify_frame(self, data_state):
+        """
+        Returns whether frames filtered from the data source are determined by which of its rows they hold, which isn't
+        the case when its index isn't unique or a plugin in use modifies values (see ControlPlugin.modifies_data).
+        """
+        dm = self.data_manager
+        # Rows read from the files of a partitioned source are numbered anew by each read
+        if dm.data_version is None or dm.source_type == "partitioned" or not dm.df.index.is_unique:
+            return False
+
+        classnames = [c[0] for c in data_state['sidebar_controls']]
+        plugins = [ControlPlugin.registry.get(c) for c in classnames] + [p for p in self.plugins if hasattr(p, 'control')]
+        return not any(plugin is None or getattr(plugin, 'modifies_data', True) for plugin in plugins)
+
+    def frame_cache_key(self, component, df, data_state, *extra):
+        """
+        Returns a key identifying the output of the given component for the given frame, by which rows of the data
+        source the frame holds, or None if rows alone don't determine its contents (see rows_identify_frame) or the
+        output shouldn't be cached (see callables_id). Frames reached through different control states holding the same
+        rows get the same key.
+        """
+        callables = self.callables_id()
+        if self.cache is None or callables is None or not self.rows_identify_frame(data_state):
+            return None
+
+        return make_cache_key(
+            'frame', component.id, self.data_manager.data_version, frame_fingerprint(df), callables, *extra
+        )
+
+    def output_state(self, df, data_state, *extra):
+        """
+        Returns a fingerprint of what this panel's output is computed from: the given filtered frame, before
+        data_transform, and extra inputs such as plot inputs. Outputs with equal fingerprints are equal, so a session
+        already showing one needn't be sent it again. Frames are identified by which rows they hold when possible (see
+        rows_identify_frame) when a cache is set, as this hashes the whole data source once, and by hashing their values
+        otherwise. Returns None for frames whose values can't be hashed, and for panels whose output_callables can't be
+        identified.
+        """
+        callables = self.callables_id()
+        if callables is None:
+            return None
+        if self.cache is not None and self.rows_identify_frame(data_state):
+            frame = [self.data_manager.data_version, frame_fingerprint(df)]
+        else:
+            try:
+                hashes = pd.util.hash_pandas_object(df, index=True).to_numpy()
+            except TypeError:
+                return None
+            digest = hashlib.sha256(hashes.tobytes()).hexdigest()
+            frame = [digest, [str(c) for c in df.columns], [str(d) for d in df.dtypes]]
+        return make_cache_key('state', *frame, callables, *extra)
+
+    @staticmethod
+    def payload_size(value):
+        """
+        Returns the size in bytes of value once serialized to JSON the way Dash sends it.
+        """
+        return len(to_json_plotly(value).encode())
+
+    def warn_payload(self, component, size):
+        warnings.warn(
+            f"{type(self).__name__} {component.id} output is {size} bytes, over its payload budget of "
+            f"{self.payload_budget} bytes.",
+            RuntimeWarning
+        )
+
+    def default_control_values(self):
+        """
+        Returns the initial values of this panel's control plugins, in the order they're passed to callbacks.
+        """
+        return [x.control.value for x in self.plugins if hasattr(x, 'control')]
+
+    def set_initial_outputs(self, outputs):
+        """
+        To be implemented by children classes. Sets the given callback outputs as the initial properties of this
+        panel's components, so they're shown as soon as the page loads.
+        """
+        pass
+
+    def batch_outputs(self):
+        """
+        To be implemented by children classes. Returns the list of Outputs updated by a PanelBatch for this panel.
+        """
+        return []
+
+    def batch_states(self):
+        """
+        Returns the list of States passed to a PanelBatch callback for this panel: its emitted_state, followed by the
+        values of its control plugins.
+        """
+        states = [State(x.control, 'value') for x in self.plugins if hasattr(x, 'control')]
+        return [State(self.emitted_state, 'data')] + states
+
+    def default_state_values(self):
+        """
+        Returns the initial values of the States given by batch_states.
+        """
+        return [self.emitted_state.data] + self.default_control_values()
+
+    def default_callback_args(self, data_state):
+        """
+        Returns the arguments update_callback gets called with on page load, for the given data_store state.
+        """
+        return [self.emitted_state.data, data_state, data_state] + self.default_control_values()
+
+    def batch_update(self, data_state, sidebar_result, state_values):
+        """
+        To be implemented by children classes. Returns the list of output values for this panel, given the shared
+        result of apply_sidebar_transforms and the values of batch_states.
+        """
+        return []
 
     @staticmethod
     def merge_dicts(d1, d2):
@@ -1,6 +1,8 @@
 from dash import dcc
 from dash import html
 import quickboard.styles as styles
+from quickboard.base.panelbatch import PanelBatch
+from quickboard.utils.profiling import profiled
 
 
 class BaseTab(html.Div):
@@ -13,9 +15,12 @@ class BaseTab(html.Div):
         sidebar_header = header to use on top of sidebar while on this tab
         sidebar_plugins = plugins to use in the sidebar while on this tab
         sidebar_width = width to use for sidebar style on this tab
+        batch_workers = maximal number of threads used to update the tab's batched panels after a sidebar change
+        lazy = whether the panels on the tab only compute their figure or table once scrolled into view, see ContentGrid
     """
+    @profiled
     def __init__(self, tab_label, tab_header="", content_list=[], sidebar_header="Data Controls", sidebar_plugins=[],
-                 sidebar_width="18rem"):
+                 sidebar_width="18rem", batch_workers=None, lazy=False):
         self.tab_label = tab_label
         self.tab = dcc.Tab(value=tab_label, label=tab_label)
         self.content_list = content_list
@@ -23,11 +28,13 @@ class BaseTab(html.Div):
         self.sidebar_plugins = sidebar_plugins
         self.sidebar_width = sidebar_width
 
-        for plugin in self.sidebar_plugins:
+        # Ids derive from the tab and plugin position, so are the same in every process building the board, as needed
+        # by recorded sessions replayed later (see quickboard.loadtest)
+        for i, plugin in enumerate(self.sidebar_plugins):
             if hasattr(plugin, 'control'):
                 plugin.control.id = {
                     'control_type': 'sidebar_control',
-                    'unique_id': id(plugin)
+                    'unique_id': f"{tab_label}/{i}"
                 }
                 plugin.setup_internal_callback()
 
@@ -36,3 +43,12 @@ class BaseTab(html.Div):
 
         self.children = [html.H1(tab_header, style=styles.TAB_HEADER_STYLE)] + self.content_list
         super().__init__(children=self.children)
+
+        if lazy:
+            for component in self._traverse():
+                if hasattr(component, 'set_lazy'):
+                    component.set_lazy()
+
+        # Update all batched panels on this tab with one callback
+        batched_panels = PanelBatch.find_panels(self)
+        self.panel_batch = PanelBatch(batched_panels, max_workers=batch_workers) if len(batched_panels) > 0 else None
@@ -16,8 +16,10 @@ class ContentGrid(Panel):
         col_wrap = number of objects to display within a row
         content_widths = list of integers between 0 and 100 for percent width for corresponding content_list item
         border_size = size in pixels for border
+        lazy = whether the panels in the grid only compute their figure or table once scrolled into view, showing an
+        empty placeholder of the same height until then
     """
-    def __init__(self, header="", content_list=[], col_wrap=2, content_widths=[], border_size=2):
+    def __init__(self, header="", content_list=[], col_wrap=2, content_widths=[], border_size=2, lazy=False):
         self.header = html.H2(header, style=styles.CONTENT_GRID_HEADER_STYLE) if type(header) == str else header
 
         table_rows = []
@@ -40,3 +42,8 @@ class ContentGrid(Panel):
             html.Table(table_rows, style={"width": "100%", 'table-layout': 'fixed'})
         ]
         super().__init__(main_content=self.children, border_size=border_size)
+
+        if lazy:
+            for component in self._traverse():
+                if hasattr(component, 'set_lazy'):
+                    component.set_lazy()
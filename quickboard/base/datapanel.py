@@ -1,8 +1,11 @@
-from dash import dcc, ctx, callback
+from dash import dcc, ctx, no_update
 from dash import dash_table
-from dash.dependencies import Input, Output, State, ALL
+from dash.exceptions import PreventUpdate
+from dash.dependencies import Input, Output, State, ALL, MATCH
 
 from quickboard.base import DynamicPanel
+from quickboard.utils.callbacks import deferred_callback, deferred_shared_callback, serve_snapshots
+from quickboard.utils.profiling import profiled
 
 
 class DataPanel(DynamicPanel):
@@ -19,21 +22,54 @@ class DataPanel(DynamicPanel):
         all_contents_border_size = size of border around all contents
         dynamic_content_border_size = size of border around dynamic content
         plugin_border_size = size of border around plugin group
+        cache = optional ResultCache for storing filtered frames and table contents, keyed on data version and control
+        state
+        batched = when True, sidebar changes update this panel in one callback with the other batched panels on its tab
+        payload_budget = optional maximal size in bytes of the table JSON sent to the browser
+        payload_fallback = for tables over payload_budget, either 'truncate' to send only as many leading rows as fit
+        the budget, or 'warn' to send them anyway with a warning
+        max_concurrency = for an `async def` data_transform, the maximal number of its calls running at once per data
+        source
+        dtype_backend = 'pyarrow' to hold the data source in Arrow-backed dtypes, e.g. for string-heavy tables
+        client_cache = optional maximal number of tables kept in the browser for the control states last seen, served there
+        without a request to the server
+        sidecar = for .csv and .tsv data sources, True or a directory path to keep a columnar copy of the file, loaded
+        by later workers instead of parsing it
+        export = optional list of formats among 'csv', 'parquet' and 'arrow' to offer download links for, streaming all
+        rows of the table from the server, including those cut by payload_budget
     """
+    # Number of rows serialized to estimate the size of a whole table against payload_budget
+    PAYLOAD_SAMPLE_ROWS = 1000
+
+    @profiled
     def __init__(self, data_source="data", header="", body="", plugins=[], plugin_align="bottom", plugin_wrap=2,
-                 full_border_size=0, all_contents_border_size=2, dynamic_content_border_size=0, plugin_border_size=0):
+                 full_border_size=0, all_contents_border_size=2, dynamic_content_border_size=0, plugin_border_size=0,
+                 cache=None, batched=False, payload_budget=None, payload_fallback="truncate",
+                 max_concurrency=None, dtype_backend=None, client_cache=None, sidecar=None, export=None):
+        assert payload_fallback in ["truncate", "warn"]
         self.datatable = dash_table.DataTable(
             page_action='none',
             sort_action='native',
             filter_action='native',
             fixed_rows={'headers': True},
+            # Lets the note of a truncated table span all columns, see fit_payload
+            merge_duplicate_headers=True,
             style_table={'overflow': 'auto', 'width': '100%', 'height': '275px'}
         )
+        self.unique_id = None
+        self.visible = None
+        if self.matches_pattern(data_source, batched, client_cache):
+            # Updated by the callback shared by all DataPanels, see emit_matched
+            self.match_pattern()
+            self.datatable.id = {'component_type': 'table', 'unique_id': self.unique_id}
+            self.emitted_state = dcc.Store(id={'component_type': 'table_state', 'unique_id': self.unique_id}, data=None)
+        else:
+            self.emitted_state = dcc.Store(id=f"{self.datatable._set_random_id()}_emitted_state", data=None)
 
         super().__init__(
             header=header,
             body=body,
-            dynamic_content=self.datatable,
+            dynamic_content=[self.datatable, self.emitted_state] + ([self.visible] if self.visible is not None else []),
             data_source=data_source,
             plugins=plugins,
             plugin_align=plugin_align,
@@ -41,7 +77,16 @@ class DataPanel(DynamicPanel):
             full_border_size=full_border_size,
             all_contents_border_size=all_contents_border_size,
             dynamic_content_border_size=dynamic_content_border_size,
-            plugin_border_size=plugin_border_size
+            plugin_border_size=plugin_border_size,
+            cache=cache,
+            batched=batched,
+            payload_budget=payload_budget,
+            payload_fallback=payload_fallback,
+            max_concurrency=max_concurrency,
+            dtype_backend=dtype_backend,
+            client_cache=client_cache,
+            sidecar=sidecar,
+            export=export
         )
 
         # Table update callback
@@ -54,22 +99,148 @@ class DataPanel(DynamicPanel):
         else:
             interactive_data = Input('data_store', 'data')
 
-        callback(
-            Output(self.datatable, 'data'),
-            Output(self.datatable, 'columns'),
-            Input('data_store', 'data'),
-            interactive_data,
-            [Input(x.control, 'value') for x in self.plugins if hasattr(x, 'control')]
-        )(self.update_table)
+        if batched:
+            # Sidebar updates come from the tab's PanelBatch, so only listen to this panel's own plugins here
+            assert dm.source_type not in ["PlotPanel", "stream"], "Batched panels can't use interactive or stream data."
+            plugin_inputs = [Input(x.control, 'value') for x in self.plugins if hasattr(x, 'control')]
+            if len(plugin_inputs) > 0:
+                deferred_callback(
+                    Output(self.datatable, 'data', allow_duplicate=True),
+                    Output(self.datatable, 'columns', allow_duplicate=True),
+                    Output(self.emitted_state, 'data', allow_duplicate=True),
+                    State(self.emitted_state, 'data'),
+                    State('data_store', 'data'),
+                    State('data_store', 'data'),
+                    plugin_inputs,
+                    prevent_initial_call=True
+                )(self.emit_table)
+        elif self.unique_id is not None:
+            self.match_plugins()
+            self.observe_visibility()
+            deferred_shared_callback(
+                Output({'component_type': 'table', 'unique_id': MATCH}, 'data'),
+                Output({'component_type': 'table', 'unique_id': MATCH}, 'columns'),
+                Output({'component_type': 'table_state', 'unique_id': MATCH}, 'data'),
+                State({'component_type': 'table_state', 'unique_id': MATCH}, 'data'),
+                Input('data_store', 'data'),
+                Input({'control_type': 'panel_control', 'unique_id': MATCH, 'plugin_index': ALL}, 'value'),
+                Input({'component_type': 'panel_visible', 'unique_id': MATCH}, 'data')
+            )(DataPanel.emit_matched)
+            if dm.source_type in ["DataFrame", "csv", "tsv", "partitioned"]:
+                self.update_callback = self.emit_table
+        else:
+            inputs = [Input('data_store', 'data'), interactive_data]
+            inputs += [Input(x.control, 'value') for x in self.plugins if hasattr(x, 'control')]
+            if client_cache is not None:
+                self.cache_on_client([(self.datatable, 'data'), (self.datatable, 'columns')], self.emit_table, inputs)
+            else:
+                deferred_callback(
+                    Output(self.datatable, 'data'),
+                    Output(self.datatable, 'columns'),
+                    Output(self.emitted_state, 'data'),
+                    State(self.emitted_state, 'data'),
+                    inputs
+                )(self.emit_table)
+            if dm.source_type in ["DataFrame", "csv", "tsv", "partitioned"]:
+                self.update_callback = self.emit_table
+
+        self.link_exports(interactive_data)
+
+    def update_table(self, data_state, interactive_data={}, *control_values, sidebar_result=None):
+        """
+        A method called to populate the table when the state of a control object is changed. A precomputed result of
+        apply_sidebar_transforms can be passed as sidebar_result, e.g. when shared by a PanelBatch.
+        """
+        data, columns, _ = self.table_state(data_state, interactive_data, control_values, sidebar_result=sidebar_result)
+        return data, columns
+
+    def emit_table(self, emitted_state, data_state, interactive_data, *control_values):
+        """
+        Callback method updating the table and emitted_state of a session, given the output_state of the table it
+        shows. Control changes leaving the table's rows as they were, e.g. a checklist value matching no rows, don't
+        send the table again.
+        """
+        data, columns, state = self.table_state(data_state, interactive_data, control_values,
+                                                emitted_state=emitted_state)
+        return data, columns, state if state != emitted_state else no_update
+
+    @staticmethod
+    def emit_matched(emitted_state, data_state, control_values, visible):
+        """
+        Pattern-matching callback shared by the DataPanels listening to the data_store and their own plugins, keeping the
+        callback graph the same size however many panels a board holds. Dispatches to emit_table of the panel whose
+        table is updated.
+        """
+        if visible is False:
+            # Lazy panel out of view; it updates once scrolled into view, see DynamicPanel.set_lazy
+            raise PreventUpdate
+        panel = DataPanel.matched_panel()
+        # ALL inputs come in layout order, so take the control values in plugin order from the callback context
+        args = [emitted_state, data_state, data_state] + panel.matched_control_values()
+        return serve_snapshots(panel.emit_table)(*args)
 
-    def update_table(self, data_state, interactive_data={}, *control_values):
+    def table_state(self, data_state, interactive_data, control_values, sidebar_result=None, emitted_state=None):
         """
-        A method called to populate the table when the state of a control object is changed.
+        Returns a tuple (data, columns, state) for the given control states, where state is the table's output_state.
+        The data and columns are no_update when state equals emitted_state, i.e. the session already shows them.
         """
-        sub_df, updated_panel = self.apply_sidebar_transforms(data_state)
-        df, panel_dict = self.apply_transforms(ctx, interactive_data, sub_df, control_values)
+        key = self.output_cache_key(self.datatable, data_state, interactive_data, control_values)
+        if key is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                data, columns, state = cached
+                if state is not None and state == emitted_state:
+                    return no_update, no_update, state
+                return data, columns, state
+
+        if sidebar_result is None:
+            sidebar_result = self.apply_sidebar_transforms(data_state, self.source_frame(interactive_data))
+        sub_df, updated_panel = sidebar_result
+        df, panel_dict = self.apply_plugin_transforms(ctx, interactive_data, sub_df, control_values)
         updated_panel = dict(updated_panel, **panel_dict)
 
-        data = df.to_dict('records')
-        columns = [{'id': c, 'name': c} for c in df.columns]
-        return data, columns
+        state = self.output_state(df, data_state, self.payload_budget, self.payload_fallback)
+        if state is not None and state == emitted_state:
+            return no_update, no_update, state
+
+        df = self.transform_data(df)
+        rows, note = self.fit_payload(df)
+        data = rows.to_dict('records')
+        columns = [{'id': c, 'name': [note, c] if note is not None else c} for c in df.columns]
+
+        if key is not None:
+            self.cache.set(key, (data, columns, state))
+        return data, columns, state
+
+    def fit_payload(self, df):
+        """
+        Returns a tuple (rows, note) of the rows of df to send to the table, keeping within payload_budget, and a note
+        to show above the column names when rows were cut, or None. The table size is extrapolated from that of its
+        first rows, so large tables are never serialized in full just to be measured.
+        """
+        if self.payload_budget is None or len(df) == 0:
+            return df, None
+
+        sample = df.iloc[:self.PAYLOAD_SAMPLE_ROWS]
+        row_size = self.payload_size(sample.to_dict('records')) / len(sample)
+        size = int(row_size * len(df))
+        if size <= self.payload_budget:
+            return df, None
+
+        self.warn_payload(self.datatable, size)
+        if self.payload_fallback == "truncate":
+            rows = df.iloc[:int(self.payload_budget / row_size)]
+            return rows, f"Truncated to the first {len(rows):,} of {len(df):,} rows"
+        return df, None
+
+    def set_initial_outputs(self, outputs):
+        self.datatable.data, self.datatable.columns, self.emitted_state.data = outputs
+
+    def batch_outputs(self):
+        return [Output(self.datatable, 'data'), Output(self.datatable, 'columns'), Output(self.emitted_state, 'data')]
+
+    def batch_update(self, data_state, sidebar_result, state_values):
+        emitted_state, *control_values = state_values
+        data, columns, state = self.table_state(data_state, data_state, control_values, sidebar_result=sidebar_result,
+                                                emitted_state=emitted_state)
+        return [data, columns, state if state != emitted_state else no_update]
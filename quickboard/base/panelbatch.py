@@ -0,0 +1,74 @@
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+from dash.dependencies import Input
+
+from quickboard.base import DynamicPanel
+from quickboard.utils.callbacks import deferred_callback
+
+
+class PanelBatch:
+    """
+    Updates a group of batched DynamicPanels (those created with `batched=True`) with a single callback when the
+    sidebar changes. The sidebar transforms are computed once per distinct data source, and the filtered frame is
+    shared by all panels using that source. Each panel's own plugin transforms and plotter then run in a thread pool.
+    BaseTab and Quickboard create one automatically for the batched panels they contain.
+    Inputs:
+        panels = list of PlotPanel/DataPanel objects created with batched=True
+        max_workers = maximal number of panels evaluated at once; defaults to that of ThreadPoolExecutor
+    """
+    def __init__(self, panels, max_workers=None):
+        self.panels = panels
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+
+        states = []
+        self.state_counts = []
+        for panel in panels:
+            panel.panel_batch = self
+            panel_states = panel.batch_states()
+            states += panel_states
+            self.state_counts.append(len(panel_states))
+
+        deferred_callback(
+            [output for panel in panels for output in panel.batch_outputs()],
+            Input('data_store', 'data'),
+            states
+        )(self.update)
+
+    @staticmethod
+    def find_panels(component):
+        """
+        Returns the batched DynamicPanels inside the given component which don't belong to a PanelBatch yet.
+        """
+        return [
+            c for c in component._traverse()
+            if isinstance(c, DynamicPanel) and c.batched and c.panel_batch is None
+        ]
+
+    def update(self, data_state, *control_values):
+        """
+        Callback method computing the outputs of all panels in the batch for the new sidebar state.
+        """
+        # Filter each distinct data source by the sidebar only once
+        sidebar_results = {}
+        for panel in self.panels:
+            key = panel.data_manager.source_key()
+            if key not in sidebar_results:
+                sidebar_results[key] = panel.apply_sidebar_transforms(data_state)
+
+        futures = []
+        start = 0
+        for panel, count in zip(self.panels, self.state_counts):
+            panel_values = control_values[start:start + count]
+            start += count
+
+            # Copy the context so the Dash callback context is visible from the worker threads
+            futures.append(self.executor.submit(
+                contextvars.copy_context().run,
+                panel.batch_update,
+                data_state,
+                sidebar_results[panel.data_manager.source_key()],
+                panel_values
+            ))
+
+        return [output for f in futures for output in f.result()]
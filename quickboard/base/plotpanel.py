@@ -1,7 +1,40 @@
-from dash import dcc, ctx, callback
-from dash.dependencies import Input, Output, State, ALL
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import CancelledError
+
+from dash import dcc, ctx, no_update
+from dash.exceptions import PreventUpdate
+from dash.dependencies import Input, Output, State, ALL, MATCH
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import plotly.io as pio
 
 from quickboard.base import DynamicPanel
+from quickboard.utils.asyncrunner import background_executor
+from quickboard.utils.callbacks import deferred_callback, deferred_shared_callback, serve_snapshots
+from quickboard.utils.profiling import profiled
+
+
+# Plotly templates build their nested objects lazily on first read, which races when several threads (e.g. of a
+# PanelBatch or a threaded server) plot with a template for the first time; once built, they are only read
+TEMPLATES_LOCK = threading.Lock()
+PRIMED_TEMPLATES = set()
+
+
+def prime_templates(plot_inputs):
+    """
+    Builds the default plotly template, and the one named in plot_inputs if any, in full under a lock the first time
+    they are used, so that plotters can then run in several threads at once.
+    """
+    for name in [pio.templates.default, plot_inputs.get('template')]:
+        if isinstance(name, str) and name not in PRIMED_TEMPLATES:
+            with TEMPLATES_LOCK:
+                if name not in PRIMED_TEMPLATES:
+                    go.layout.Template(pio.templates[name])
+                    PRIMED_TEMPLATES.add(name)
 
 
 class PlotPanel(DynamicPanel):
@@ -20,18 +53,85 @@ class PlotPanel(DynamicPanel):
         all_contents_border_size = size of border around all contents
         dynamic_content_border_size = size of border around dynamic content
         plugin_border_size = size of border around plugin group
+        cache = optional ResultCache for storing filtered frames and figures, keyed on data version, control state and
+        plotter identity
+        stream_interval = for StreamSource data sources, the number of milliseconds between checks for new rows; new
+        rows are filtered and plotted on their own, then appended to the figure's traces without redrawing it
+        batched = when True, sidebar changes update this panel in one callback with the other batched panels on its tab
+        figure_slimmer = optional FigureSlimmer (or other function of a figure) applied to the plotter's output, e.g. to
+        switch large scatter plots to WebGL and send their arrays as binary
+        payload_budget = optional maximal size in bytes of the figure JSON sent to the browser
+        payload_fallback = for figures over payload_budget, either 'downsample' to replot them from a random sample of
+        the rows, or 'warn' to send them anyway with a warning
+        max_concurrency = for an `async def` data_transform, the maximal number of its calls running at once per data
+        source
+        dtype_backend = 'pyarrow' to hold the data source in Arrow-backed dtypes, e.g. for string-heavy tables
+        client_cache = optional maximal number of figures kept in the browser for the control states last seen, served there
+        without a request to the server
+        progressive = optional number of rows; figures of more rows are first shown as a preview plotted from a sample
+        of that many rows, then replaced by the full figure once plotted in the background
+        pyramid = optional TimePyramid summarizing a long time series at several resolutions; figures are then plotted
+        from the summary level matching the range shown, with a bounded number of points per series
+        sidecar = for .csv and .tsv data sources, True or a directory path to keep a columnar copy of the file, loaded
+        by later workers instead of parsing it
+        export = optional list of formats among 'csv', 'parquet' and 'arrow' to offer download links for, streaming the
+        rows currently plotted (before any downsampling or summarizing) from the server
     """
+    # Trace attributes extended with new points in streaming mode
+    STREAM_KEYS = ['x', 'y', 'z', 'customdata', 'text', 'hovertext']
+
+    # Maximal number of full figures of progressive panels being plotted or awaiting collection at once
+    MAX_PROGRESS_JOBS = 64
+
+    @profiled
     def __init__(self, plotter, plot_inputs, data_source="data", header="", body="", plugins=[], plugin_align="bottom",
                  plugin_wrap=2, full_border_size=0, all_contents_border_size=2, dynamic_content_border_size=0,
-                 plugin_border_size=0):
+                 plugin_border_size=0, cache=None, stream_interval=None, batched=False, figure_slimmer=None,
+                 payload_budget=None, payload_fallback="downsample", max_concurrency=None, dtype_backend=None,
+                 client_cache=None, progressive=None, pyramid=None, sidecar=None, export=None):
+        assert payload_fallback in ["downsample", "warn"]
+        assert client_cache is None or stream_interval is None, "Streamed panels can't use a client_cache."
+        assert progressive is None or (stream_interval is None and client_cache is None and not batched), \
+            "Progressive panels can't be streamed, batched or use a client_cache."
+        assert pyramid is None or not batched, "Batched panels can't use a pyramid."
+        assert export is None or stream_interval is None, "Streamed panels can't export their data."
         # Plot specific attributes
         self.plot_inputs = plot_inputs
         self.plotter = plotter
+        self.figure_slimmer = figure_slimmer
         self.graph = dcc.Graph()
+        self.progressive = progressive
+        self.progress_jobs = OrderedDict()
+        self.progress_lock = threading.Lock()
+
+        # Streaming specific attributes; stream_state holds the stream cursor and trace names of the client's figure
+        self.stream_interval = stream_interval
+        self.emitted_state = None
+        self.unique_id = None
+        self.visible = None
+        dynamic_content = self.graph
+        if stream_interval is None and progressive is None and self.matches_pattern(data_source, batched, client_cache):
+            # Updated by the callback shared by all PlotPanels, see emit_matched
+            self.match_pattern()
+            self.graph.id = {'component_type': 'plot_graph', 'unique_id': self.unique_id}
+            self.emitted_state = dcc.Store(id={'component_type': 'plot_state', 'unique_id': self.unique_id}, data=None)
+            dynamic_content = [self.graph, self.emitted_state, self.visible]
+        elif stream_interval is None:
+            self.emitted_state = dcc.Store(id=f"{self.graph._set_random_id()}_emitted_state", data=None)
+            dynamic_content = [self.graph, self.emitted_state]
+            if progressive is not None:
+                # Token of the full figure being plotted in the background after a preview, see emit_preview
+                self.progress = dcc.Store(id=f"{self.graph.id}_progress", data=None)
+                dynamic_content.append(self.progress)
+        else:
+            self.interval = dcc.Interval(interval=stream_interval)
+            self.stream_state = dcc.Store(id=f"{self.graph._set_random_id()}_stream_state",
+                                          data={'cursor': 0, 'traces': []})
+            dynamic_content = [self.graph, self.interval, self.stream_state]
 
         super().__init__(
             header=header,
-            dynamic_content=self.graph,
+            dynamic_content=dynamic_content,
             data_source=data_source,
             plugins=plugins,
             body=body,
@@ -40,7 +140,17 @@ class PlotPanel(DynamicPanel):
             full_border_size=full_border_size,
             all_contents_border_size=all_contents_border_size,
             dynamic_content_border_size=dynamic_content_border_size,
-            plugin_border_size=plugin_border_size
+            plugin_border_size=plugin_border_size,
+            cache=cache,
+            batched=batched,
+            payload_budget=payload_budget,
+            payload_fallback=payload_fallback,
+            max_concurrency=max_concurrency,
+            dtype_backend=dtype_backend,
+            client_cache=client_cache,
+            pyramid=pyramid,
+            sidecar=sidecar,
+            export=export
         )
 
         # Plot update callback
@@ -53,25 +163,478 @@ class PlotPanel(DynamicPanel):
         else:
             interactive_data = Input('data_store', 'data')
 
-        callback(
-            Output(self.graph, 'figure'),
-            Input('data_store', 'data'),
-            interactive_data,
-            [Input(x.control, 'value') for x in self.plugins if hasattr(x, 'control')]
-        )(self.make_plot)
+        if batched:
+            # Sidebar updates come from the tab's PanelBatch, so only listen to this panel's own plugins here
+            assert dm.source_type not in ["PlotPanel", "stream"], "Batched panels can't use interactive or stream data."
+            plugin_inputs = [Input(x.control, 'value') for x in self.plugins if hasattr(x, 'control')]
+            if len(plugin_inputs) > 0:
+                deferred_callback(
+                    Output(self.graph, 'figure', allow_duplicate=True),
+                    Output(self.emitted_state, 'data', allow_duplicate=True),
+                    State(self.emitted_state, 'data'),
+                    State('data_store', 'data'),
+                    State('data_store', 'data'),
+                    plugin_inputs,
+                    prevent_initial_call=True
+                )(self.emit_plot)
+        elif self.unique_id is not None:
+            self.match_plugins()
+            self.observe_visibility()
+            deferred_shared_callback(
+                Output({'component_type': 'plot_graph', 'unique_id': MATCH}, 'figure'),
+                Output({'component_type': 'plot_state', 'unique_id': MATCH}, 'data'),
+                State({'component_type': 'plot_state', 'unique_id': MATCH}, 'data'),
+                Input('data_store', 'data'),
+                Input({'control_type': 'panel_control', 'unique_id': MATCH, 'plugin_index': ALL}, 'value'),
+                Input({'component_type': 'panel_visible', 'unique_id': MATCH}, 'data')
+            )(PlotPanel.emit_matched)
+            if dm.source_type in ["DataFrame", "csv", "tsv", "partitioned"]:
+                self.update_callback = self.emit_plot
+        elif stream_interval is None:
+            inputs = [Input('data_store', 'data'), interactive_data]
+            inputs += [Input(x.control, 'value') for x in self.plugins if hasattr(x, 'control')]
+            if client_cache is not None:
+                self.cache_on_client([(self.graph, 'figure')], self.emit_plot, inputs)
+            elif progressive is not None:
+                deferred_callback(
+                    Output(self.graph, 'figure'),
+                    Output(self.emitted_state, 'data'),
+                    Output(self.progress, 'data'),
+                    State(self.emitted_state, 'data'),
+                    State(self.progress, 'data'),
+                    inputs
+                )(self.emit_preview)
+                deferred_callback(
+                    Output(self.graph, 'figure', allow_duplicate=True),
+                    Output(self.emitted_state, 'data', allow_duplicate=True),
+                    Input(self.progress, 'data'),
+                    [State(x.component_id, x.component_property) for x in inputs],
+                    prevent_initial_call=True
+                )(self.emit_full)
+            else:
+                deferred_callback(
+                    Output(self.graph, 'figure'),
+                    Output(self.emitted_state, 'data'),
+                    State(self.emitted_state, 'data'),
+                    inputs
+                )(self.emit_plot)
+            if dm.source_type in ["DataFrame", "csv", "tsv", "partitioned"]:
+                self.update_callback = self.emit_plot
+        else:
+            assert dm.source_type == "stream", "stream_interval requires a StreamSource data_source."
+            deferred_callback(
+                Output(self.graph, 'figure'),
+                Output(self.stream_state, 'data'),
+                Input('data_store', 'data'),
+                interactive_data,
+                [Input(x.control, 'value') for x in self.plugins if hasattr(x, 'control')]
+            )(self.make_stream_plot)
+
+            deferred_callback(
+                Output(self.graph, 'extendData'),
+                Output(self.graph, 'figure', allow_duplicate=True),
+                Output(self.stream_state, 'data', allow_duplicate=True),
+                Input(self.interval, 'n_intervals'),
+                State(self.stream_state, 'data'),
+                State('data_store', 'data'),
+                [State(x.control, 'value') for x in self.plugins if hasattr(x, 'control')],
+                prevent_initial_call=True
+            )(self.extend_plot)
+
+        self.link_exports(interactive_data)
+
+    def make_plot(self, data_state, interactive_data, *control_values, sidebar_result=None):
+        """
+        A method called to create the figure when the state of a control object is changed. A precomputed result of
+        apply_sidebar_transforms can be passed as sidebar_result, e.g. when shared by a PanelBatch.
+        """
+        return self.plot_state(data_state, interactive_data, control_values, sidebar_result=sidebar_result)[0]
+
+    def emit_plot(self, emitted_state, data_state, interactive_data, *control_values):
+        """
+        Callback method updating the figure and emitted_state of a session, given the output_state of the figure it
+        shows. Control changes leaving the plotted rows and plot inputs as they were, e.g. a slider moved within a gap in
+        the data, don't send the figure again.
+        """
+        fig, state = self.plot_state(data_state, interactive_data, control_values, emitted_state=emitted_state)
+        return fig, state if state != emitted_state else no_update
+
+    @staticmethod
+    def emit_matched(emitted_state, data_state, control_values, visible):
+        """
+        Pattern-matching callback shared by the PlotPanels listening to the data_store and their own plugins, keeping the
+        callback graph the same size however many panels a board holds. Dispatches to emit_plot of the panel whose graph
+        is updated.
+        """
+        if visible is False:
+            # Lazy panel out of view; it updates once scrolled into view, see DynamicPanel.set_lazy
+            raise PreventUpdate
+        panel = PlotPanel.matched_panel()
+        # ALL inputs come in layout order, so take the control values in plugin order from the callback context
+        args = [emitted_state, data_state, data_state] + panel.matched_control_values()
+        return serve_snapshots(panel.emit_plot)(*args)
+
+    def plot_state(self, data_state, interactive_data, control_values, sidebar_result=None, emitted_state=None):
+        """
+        Returns a tuple (figure, state) for the given control states, where state is the figure's output_state. The
+        figure is no_update when its state equals emitted_state, i.e. the session already shows it.
+        """
+        key = self.plot_cache_key(data_state, interactive_data, control_values)
+        cached = self.cached_plot(key, emitted_state)
+        if cached is not None:
+            return cached
+
+        df, plot_inputs = self.plotted_frame(data_state, interactive_data, control_values, sidebar_result)
+        frame_key, state = self.plotted_state(df, data_state, plot_inputs)
+        if state is not None and state == emitted_state:
+            return no_update, state
+        return self.finish_plot(df, plot_inputs, key, frame_key, state), state
+
+    def output_callables(self):
+        return [self.data_transform, self.plotter]
 
-    def make_plot(self, data_state, interactive_data, *control_values):
+    def plotter_id(self):
+        return [repr(self.figure_slimmer), self.payload_budget, self.payload_fallback]
+
+    def plot_cache_key(self, data_state, interactive_data, control_values):
+        return self.output_cache_key(self.graph, data_state, interactive_data, control_values, self.plotter_id(),
+                                     self.plot_inputs)
+
+    def cached_plot(self, key, emitted_state):
         """
-        A method called to create the figure when the state of a control object is changed.
+        Returns the (figure, state) pair cached under the output cache key, with figure no_update if the session
+        already shows it, or None if not cached.
         """
-        sub_df, updated_panel = self.apply_sidebar_transforms(data_state)
-        df, panel_dict = self.apply_transforms(ctx, interactive_data, sub_df, control_values)
+        if key is None:
+            return None
+        cached = self.cache.get(key)
+        if cached is None:
+            return None
+        state, fig = cached
+        if state is not None and state == emitted_state:
+            return no_update, state
+        # Entries may instead hold the frame key of the figure, see plotted_state
+        if isinstance(fig, str):
+            fig = self.cache.get(fig)
+        return (fig, state) if fig is not None else None
+
+    def plotted_frame(self, data_state, interactive_data, control_values, sidebar_result=None):
+        """
+        Returns the rows to plot and the plot inputs for the given control states.
+        """
+        if sidebar_result is None:
+            summarized = self.summarized_frame(data_state, control_values)
+            if summarized is not None:
+                return summarized
+            sidebar_result = self.apply_sidebar_transforms(data_state, self.source_frame(interactive_data))
+        sub_df, updated_panel = sidebar_result
+        df, panel_dict = self.apply_plugin_transforms(ctx, interactive_data, sub_df, control_values)
 
         updated_panel = self.merge_dicts(updated_panel, panel_dict)
-        if 'plot_inputs' in updated_panel.keys():
-            plot_inputs = dict(self.plot_inputs, **updated_panel['plot_inputs'])
-        else:
-            plot_inputs = self.plot_inputs
+        return df, self.get_plot_inputs(updated_panel)
 
-        fig = self.plotter(df, **plot_inputs)
+    def summarized_frame(self, data_state, control_values):
+        """
+        Returns the rows of the data source's TimePyramid level matching the range to plot, filtered by the controls,
+        and the plot inputs, or None if the rows themselves should be plotted: without a pyramid, for narrow ranges, or
+        when a control filters on other columns than the pyramid's time and series.
+        """
+        dm = self.data_manager
+        levels = dm.pyramid_levels()
+        if not levels:
+            return None
+        steps = self.sidebar_steps(data_state['sidebar_controls']) + self.plugin_steps(control_values)
+        if not all(dm.pyramid.summarizes(plugin, attributes) for plugin, attributes, _ in steps):
+            return None
+
+        # The coarsest level is small enough to find the range selected, and the plot inputs, cheaply
+        plan = self.plan_filters(steps)
+        coarsest, updated_panel = self.run_plan(plan, levels[-1][1])
+        plot_inputs = self.get_plot_inputs(updated_panel)
+        shown = dm.pyramid.requested_range(coarsest, plot_inputs)
+        level = dm.pyramid.level_for(levels, *shown) if shown is not None else None
+        if level is None:
+            return None
+
+        width, frame = levels[level]
+        df, _ = self.run_plan(plan, dm.pyramid.slice(frame, width, *shown))
+        return df, plot_inputs
+
+    def plotted_state(self, df, data_state, plot_inputs):
+        """
+        Returns a tuple (frame_key, state) for the figure of the given rows and plot inputs. Streamed figures have
+        neither: they are kept current by extend_plot rather than compared between callbacks, and hashing the whole
+        buffer at each redraw would cost as much as plotting it.
+        """
+        if self.stream_interval is not None:
+            return None, None
+        # Different control states often select the same rows, so also look up the figure by the rows being plotted;
+        # the frame key then also serves as the figure's state
+        extra = [self.plotter_id(), plot_inputs]
+        # Summary frames of different TimePyramid levels may have the same index
+        if 'pyramid_level' in df.attrs:
+            extra.append(df.attrs['pyramid_level'])
+        frame_key = self.frame_cache_key(self.graph, df, data_state, *extra)
+        state = frame_key if frame_key is not None else self.output_state(df, data_state, *extra)
+        return frame_key, state
+
+    def finish_plot(self, df, plot_inputs, key, frame_key, state, cancelled=None):
+        """
+        Returns the figure of the given rows and plot inputs, from the cache or by running the data_transform and
+        plotter, and caches it under both keys. Returns None instead of plotting once the cancelled Event is set.
+        """
+        fig = self.cache.get(frame_key) if frame_key is not None else None
+        if fig is None:
+            data = self.transform_data(df)
+            fig = self.render(data, plot_inputs, cancelled)
+            if fig is None:
+                return None
+            if frame_key is not None:
+                self.cache.set(frame_key, fig)
+
+        if key is not None:
+            self.cache.set(key, (state, frame_key if frame_key is not None else fig))
         return fig
+
+    def emit_preview(self, emitted_state, progress, data_state, interactive_data, *control_values):
+        """
+        Callback method of progressive panels. Figures of more than `progressive` rows are first sent as a preview,
+        plotted from a stratified sample of the rows, while the full figure is plotted in the background and then sent
+        by emit_full; changing the controls again cancels it unless its plotter is already running. Others are sent in
+        full right away.
+        """
+        self.cancel_progress(progress)
+        key = self.plot_cache_key(data_state, interactive_data, control_values)
+        cached = self.cached_plot(key, emitted_state)
+        if cached is not None:
+            fig, state = cached
+            return fig, state if state != emitted_state else no_update, no_update
+
+        df, plot_inputs = self.plotted_frame(data_state, interactive_data, control_values)
+        frame_key, state = self.plotted_state(df, data_state, plot_inputs)
+        if state is not None and state == emitted_state:
+            return no_update, no_update, no_update
+        if len(df) <= self.progressive:
+            return self.finish_plot(df, plot_inputs, key, frame_key, state), state, no_update
+
+        sample = df.iloc[self.preview_positions(df, plot_inputs)]
+        preview = self.annotate(self.render(self.transform_data(sample), plot_inputs),
+                                f"Preview of {len(sample):,} of {len(df):,} rows, loading full figure")
+        token = self.start_progress(df, plot_inputs, key, frame_key, state)
+        # The session doesn't show the figure of state yet, so clear its emitted_state until emit_full sends it
+        return preview, None, {'token': token}
+
+    def emit_full(self, progress, data_state, interactive_data, *control_values):
+        """
+        Callback method of progressive panels, sending the full figure once plotted in the background after a preview.
+        Figures started by another worker process are plotted here instead.
+        """
+        if progress is None:
+            raise PreventUpdate
+        with self.progress_lock:
+            job = self.progress_jobs.get(progress['token'])
+        if job is None:
+            return self.plot_state(data_state, interactive_data, control_values)
+
+        future, cancelled = job
+        try:
+            fig, state = future.result() if not cancelled.is_set() else (None, None)
+        except CancelledError:
+            fig = None
+        finally:
+            with self.progress_lock:
+                self.progress_jobs.pop(progress['token'], None)
+        if fig is None or cancelled.is_set():
+            raise PreventUpdate
+        return fig, state
+
+    def start_progress(self, df, plot_inputs, key, frame_key, state):
+        """
+        Starts plotting the full figure of a preview in the background, returning the token emit_full finds it by.
+        """
+        cancelled = threading.Event()
+
+        def plot():
+            if cancelled.is_set():
+                return None, None
+            return self.finish_plot(df, plot_inputs, key, frame_key, state, cancelled), state
+
+        token = uuid.uuid4().hex
+        with self.progress_lock:
+            self.progress_jobs[token] = (background_executor().submit(plot), cancelled)
+            # Sessions which went away never collect their figures, so only keep the latest jobs
+            while len(self.progress_jobs) > self.MAX_PROGRESS_JOBS:
+                _, (future, old) = self.progress_jobs.popitem(last=False)
+                old.set()
+                future.cancel()
+        return token
+
+    def cancel_progress(self, progress):
+        """
+        Cancels the background plotting of the full figure a session awaits, if any, as its controls changed.
+        """
+        if progress is None:
+            return
+        with self.progress_lock:
+            job = self.progress_jobs.get(progress['token'])
+        if job is not None:
+            future, cancelled = job
+            cancelled.set()
+            future.cancel()
+
+    def preview_positions(self, df, plot_inputs):
+        """
+        Returns the sorted positions of a sample of `progressive` rows of df, stratified by the non-numeric columns used
+        as plot inputs (e.g. color or facets) so that every group keeps its share of rows, and at least one.
+        """
+        groups = [v for v in plot_inputs.values()
+                  if isinstance(v, str) and v in df.columns and not pd.api.types.is_numeric_dtype(df[v].dtype)]
+        rng = np.random.default_rng(0)
+        if len(groups) == 0:
+            return np.sort(rng.choice(len(df), size=self.progressive, replace=False))
+
+        codes = df.groupby(groups, sort=False, observed=True, dropna=False).ngroup().to_numpy()
+        # Rank rows within their group in a random order, and keep the first ranks up to the group's quota
+        order = rng.permutation(len(df))
+        by_group = order[np.argsort(codes[order], kind='stable')]
+        sorted_codes = codes[by_group]
+        ranks = np.arange(len(df)) - np.searchsorted(sorted_codes, sorted_codes, side='left')
+        quotas = np.ceil(np.bincount(codes) * self.progressive / len(df))
+        return np.sort(by_group[ranks < quotas[sorted_codes]])
+
+    def render(self, df, plot_inputs, cancelled=None):
+        """
+        Runs the plotter and figure_slimmer on the given frame, keeping the figure within payload_budget. Returns None
+        instead once the cancelled Event is set, checked before each run of the plotter.
+        """
+        prime_templates(plot_inputs)
+
+        def plot(frame):
+            if cancelled is not None and cancelled.is_set():
+                return None
+            fig = self.plotter(frame, **plot_inputs)
+            return self.figure_slimmer(fig) if self.figure_slimmer is not None else fig
+
+        fig = plot(df)
+        if fig is None or self.payload_budget is None:
+            return fig
+
+        size = self.payload_size(fig)
+        if size <= self.payload_budget:
+            return fig
+        if self.payload_fallback == "warn" or len(df) == 0:
+            self.warn_payload(self.graph, size)
+            return fig
+
+        # Figure size grows about linearly with the rows plotted, so shrink the sample until the figure fits
+        n_rows = len(df)
+        rng = np.random.default_rng(0)
+        for _ in range(3):
+            n_rows = int(n_rows * 0.9 * self.payload_budget / size)
+            # Keep sampled rows in their original order, e.g. for line plots
+            sample = df.iloc[np.sort(rng.choice(len(df), size=n_rows, replace=False))]
+            fig = plot(sample)
+            if fig is None:
+                return None
+            size = self.payload_size(fig)
+            if size <= self.payload_budget or n_rows == 0:
+                break
+        if size > self.payload_budget:
+            self.warn_payload(self.graph, size)
+
+        return self.annotate(fig, f"Downsampled to {n_rows:,} of {len(df):,} rows")
+
+    @staticmethod
+    def annotate(fig, text):
+        """
+        Adds a small note in the top right corner of the figure, e.g. to mark it as plotted from a sample.
+        """
+        note = dict(text=text, xref='paper', yref='paper', x=1, y=1, xanchor='right', yanchor='bottom',
+                    showarrow=False, font={'size': 10})
+        if isinstance(fig, dict):
+            layout = fig.get('layout', {})
+            return dict(fig, layout=dict(layout, annotations=list(layout.get('annotations', [])) + [note]))
+        return fig.add_annotation(**note)
+
+    def set_initial_outputs(self, outputs):
+        self.graph.figure, self.emitted_state.data = outputs
+
+    def batch_outputs(self):
+        return [Output(self.graph, 'figure'), Output(self.emitted_state, 'data')]
+
+    def batch_update(self, data_state, sidebar_result, state_values):
+        emitted_state, *control_values = state_values
+        fig, state = self.plot_state(data_state, data_state, control_values, sidebar_result=sidebar_result,
+                                     emitted_state=emitted_state)
+        return [fig, state if state != emitted_state else no_update]
+
+    def get_plot_inputs(self, updated_panel):
+        if 'plot_inputs' in updated_panel.keys():
+            return dict(self.plot_inputs, **updated_panel['plot_inputs'])
+        return self.plot_inputs
+
+    def make_stream_plot(self, data_state, interactive_data, *control_values):
+        """
+        A method called to redraw the whole figure from the stream buffer when the state of a control object is changed.
+        """
+        source = self.data_manager.data_source
+        source.poll()
+        df, cursor = source.snapshot()
+
+        sidebar_result = self.apply_sidebar_transforms(data_state, df)
+        fig = self.make_plot(data_state, interactive_data, *control_values, sidebar_result=sidebar_result)
+        return fig, {'cursor': cursor, 'traces': [self.trace_name(trace) for trace in fig['data']]}
+
+    def extend_plot(self, n_intervals, stream_state, data_state, *control_values):
+        """
+        A method called periodically in streaming mode to plot the rows that arrived since the client's figure was last
+        updated. Only the new rows get filtered and plotted, and their points are sent with extendData. The figure is
+        redrawn in full only if the new points belong to a trace the client doesn't have yet.
+        """
+        source = self.data_manager.data_source
+        source.poll()
+        new_df, cursor = source.rows_since(stream_state['cursor'])
+        if len(new_df) == 0:
+            return no_update, no_update, no_update
+
+        sub_df, updated_panel = self.apply_sidebar_transforms(data_state, new_df)
+        df, panel_dict = self.apply_transforms(ctx, {}, sub_df, control_values)
+        if len(df) == 0:
+            return no_update, no_update, dict(stream_state, cursor=cursor)
+
+        updated_panel = self.merge_dicts(updated_panel, panel_dict)
+        plot_inputs = self.get_plot_inputs(updated_panel)
+        prime_templates(plot_inputs)
+        new_traces = self.plotter(df, **plot_inputs)['data']
+
+        # Match new traces to the client's traces by name, in order of appearance for repeated names
+        positions = {}
+        for i, name in enumerate(stream_state['traces']):
+            positions.setdefault(name, []).append(i)
+        indices = []
+        for trace in new_traces:
+            name = self.trace_name(trace)
+            if len(positions.get(name, [])) == 0:
+                fig, state = self.make_stream_plot(data_state, {}, *control_values)
+                return no_update, fig, state
+            indices.append(positions[name].pop(0))
+
+        values = [{k: trace[k] for k in self.STREAM_KEYS if k in trace and trace[k] is not None} for trace in new_traces]
+        keys = {k for v in values for k in v.keys()}
+        update = {
+            k: [self.to_list(v[k]) if k in v else [] for v in values] for k in keys
+        }
+        return [update, indices, source.max_rows], no_update, dict(stream_state, cursor=cursor)
+
+    @staticmethod
+    def trace_name(trace):
+        # Traces slimmed by a FigureSlimmer are dicts, which only hold a name if the plotter gave one
+        return trace.get('name') if isinstance(trace, dict) else trace['name']
+
+    @staticmethod
+    def to_list(values):
+        values = np.asarray(values)
+        # Keep datetimes as timestamps rather than integer nanoseconds
+        if values.ndim == 1 and values.dtype.kind == 'M':
+            return pd.Series(values).tolist()
+        return values.tolist()
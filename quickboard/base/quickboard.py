@@ -1,8 +1,11 @@
-from dash import dcc, html, callback
+from dash import dcc, html
 from dash.dependencies import Input, Output, State, ALL
 
 from quickboard.base.sidebar import Sidebar
+from quickboard.base.panelbatch import PanelBatch
+from quickboard.utils.callbacks import deferred_callback
 import quickboard.styles as styles
+from quickboard.utils.profiling import profiled
 
 
 class Quickboard(html.Div):
@@ -15,6 +18,7 @@ class Quickboard(html.Div):
         tab_list = list of tab objects from which the board is comprised
         content_list = objects to display in the absence of tabs
     """
+    @profiled
     def __init__(self, sidebar_header="Data Controls", sidebar_plugins=[], tab_list=[], content_list=[]):
         self.style = styles.CONTENT_STYLE
         self.tab_list = tab_list
@@ -36,10 +40,14 @@ class Quickboard(html.Div):
         # CALLBACKS #
         #############
 
+        # Update batched panels outside of tabs with one callback; tabs handle their own
+        batched_panels = PanelBatch.find_panels(self.children[1])
+        self.panel_batch = PanelBatch(batched_panels) if len(batched_panels) > 0 else None
+
         # Add callback for tab switching
         # Handles updating sidebar contents, tab contents, and resizing sidebar margins based on tab properties
         if len(tab_list) > 0:
-            callback(
+            deferred_callback(
                 Output(self.current_tab_content, 'children'),
                 Output(self.sidebar, 'children'),
                 Output(self.sidebar, 'style'),
@@ -53,7 +61,7 @@ class Quickboard(html.Div):
         if len(tab_list) > 0:
             update_data_inputs = [update_data_inputs, Input(self.tabs, 'value')]
 
-        callback(
+        deferred_callback(
             Output('data_store', 'data'),
             State('data_store', 'data'),
             update_data_inputs,
@@ -93,12 +101,12 @@ class Quickboard(html.Div):
         elif len(sidebar_plugins) != 0:
             self.sidebar = Sidebar(sidebar_header, sidebar_plugins)
 
-            # Distinguish sidebar plugins for later callback
-            for plugin in sidebar_plugins:
+            # Distinguish sidebar plugins for later callback, by position so that ids are the same in every process
+            for i, plugin in enumerate(sidebar_plugins):
                 if hasattr(plugin, 'control'):
                     plugin.control.id = {
                         'control_type': 'sidebar_control',
-                        'unique_id': id(plugin)
+                        'unique_id': str(i)
                     }
 
             return self.sidebar
@@ -0,0 +1,63 @@
+import gzip
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+class ResponseCompressor:
+    """
+    Compresses the responses of a Dash app's Flask server when the client accepts it, using brotli if the `brotli`
+    package is installed and gzip otherwise. By default only the dynamic Dash routes are compressed (callback outputs,
+    the layout and the callback graph), since the static component files are served separately.
+    Inputs:
+        min_size = minimal size in bytes of a response to compress; smaller ones aren't worth the CPU time
+        gzip_level = gzip compression level between 1 (fastest) and 9 (smallest)
+        brotli_quality = brotli quality between 0 (fastest) and 11 (smallest)
+        paths = list of URL path endings of the responses to compress
+    """
+    def __init__(self, min_size=1024, gzip_level=5, brotli_quality=4,
+                 paths=('_dash-update-component', '_dash-layout', '_dash-dependencies')):
+        self.min_size = min_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.paths = paths
+
+    def attach(self, server):
+        """
+        Registers the compression hook on the given Flask server.
+        """
+        server.after_request(self.compress)
+        return self
+
+    def compress(self, response):
+        if (
+            response.direct_passthrough
+            or response.status_code != 200
+            or 'Content-Encoding' in response.headers
+            or not request.path.endswith(tuple(self.paths))
+        ):
+            return response
+
+        data = response.get_data()
+        if len(data) < self.min_size:
+            return response
+
+        accepted = request.headers.get('Accept-Encoding', '')
+        if brotli is not None and 'br' in accepted:
+            data = brotli.compress(data, quality=self.brotli_quality)
+            encoding = 'br'
+        elif 'gzip' in accepted:
+            data = gzip.compress(data, compresslevel=self.gzip_level)
+            encoding = 'gzip'
+        else:
+            return response
+
+        response.set_data(data)
+        response.headers['Content-Encoding'] = encoding
+        response.headers['Content-Length'] = len(data)
+        response.vary.add('Accept-Encoding')
+        return response
@@ -0,0 +1,60 @@
+import json
+import re
+
+from flask import Response, abort, request, stream_with_context
+
+from quickboard.base import DynamicPanel
+from quickboard.utils.export import EXPORT_FORMATS, EXPORT_ROUTE
+
+
+class DataExporter:
+    """
+    Serves the data of DynamicPanels built with `export` formats at EXPORT_ROUTE/<export_id>.<format>, as linked from
+    the panels. The control state to export for is given as JSON with keys data_state, interactive_data and
+    control_values: in the `state` field of POST forms, as posted by the links, or as the JSON body of POST requests,
+    e.g. from scripts. GET requests may pass it in the `state` query parameter, if short enough. Rows are filtered
+    before the response starts, starting from the panel's cached sidebar result, then encoded and sent in chunks of
+    batch_rows rows, so that the encoded data is never held in memory as a whole.
+    Inputs:
+        batch_rows = number of rows encoded per chunk of the response
+    """
+    def __init__(self, batch_rows=65536):
+        self.batch_rows = batch_rows
+
+    def attach(self, server, route=EXPORT_ROUTE):
+        """
+        Registers the export route on the given Flask server.
+        """
+        server.add_url_rule(f"{route}/<int:export_id>.<fmt>", 'quickboard_export', self.serve, methods=['GET', 'POST'])
+        return self
+
+    def serve(self, export_id, fmt):
+        panel = DynamicPanel.exported_panels.get(export_id)
+        if panel is None or fmt not in panel.export:
+            abort(404)
+        try:
+            if request.method == 'GET':
+                state = json.loads(request.args['state'])
+            elif 'state' in request.form:
+                state = json.loads(request.form['state'])
+            else:
+                state = request.get_json()
+            data_state = state['data_state']
+            interactive_data = state.get('interactive_data') or {}
+            control_values = state.get('control_values') or []
+            # The rows are streamed once the response started, so reject unknown sidebar plugins up front
+            panel.sidebar_steps(data_state['sidebar_controls'])
+        except (KeyError, TypeError, ValueError):
+            abort(400)
+
+        chunks = panel.export_rows(fmt, data_state, interactive_data, *control_values, batch_rows=self.batch_rows)
+        media_type, extension = EXPORT_FORMATS[fmt]
+        return Response(stream_with_context(chunks), mimetype=media_type, headers={
+            'Content-Disposition': f'attachment; filename="{self.file_name(panel)}.{extension}"',
+        })
+
+    @staticmethod
+    def file_name(panel):
+        header = getattr(panel.header, 'children', panel.header)
+        name = header if isinstance(header, str) and header != "" else f"panel_{panel.export_id}"
+        return re.sub(r'[^A-Za-z0-9_.-]+', '_', name).strip('_') or f"panel_{panel.export_id}"
@@ -0,0 +1,210 @@
+import argparse
+import json
+import threading
+import time
+import urllib.request
+import uuid
+
+from flask import g, request
+
+
+UPDATE_ROUTE = "_dash-update-component"
+SESSION_COOKIE = "quickboard_session"
+
+
+class SessionRecorder:
+    """
+    Records the callback payloads a Quickboard app receives, grouped by browser session, to a JSON lines file. Each
+    line holds the session id, the time since the session's first request, and the raw Dash callback payload, so the
+    sequence of control interactions (tab switches, checklist toggles, slider moves, ...) can be replayed later.
+    Inputs:
+        path = file path of JSON lines file to append recorded payloads to
+    """
+    def __init__(self, path):
+        self.path = path
+        self.session_starts = {}
+        self.lock = threading.Lock()
+
+    def attach(self, server):
+        """
+        Registers the recording hooks on the given Flask server.
+        """
+        server.before_request(self.record_request)
+        server.after_request(self.set_session_cookie)
+        return self
+
+    def record_request(self):
+        if request.method != "POST" or not request.path.endswith(UPDATE_ROUTE):
+            return None
+
+        # Requests sent before the session has its cookie get the id of the cookie set by their response
+        session = request.cookies.get(SESSION_COOKIE)
+        if session is None:
+            session = g.setdefault('quickboard_session', uuid.uuid4().hex)
+        payload = request.get_json(silent=True)
+        now = time.time()
+        with self.lock:
+            start = self.session_starts.setdefault(session, now)
+            with open(self.path, 'a') as f:
+                f.write(json.dumps({'session': session, 'time': now - start, 'payload': payload}) + '\n')
+        return None
+
+    @staticmethod
+    def set_session_cookie(response):
+        if SESSION_COOKIE not in request.cookies:
+            response.set_cookie(SESSION_COOKIE, g.get('quickboard_session') or uuid.uuid4().hex)
+        return response
+
+
+def load_sessions(path):
+    """
+    Reads a file written by SessionRecorder and returns a list of sessions, each an ordered list of callback payloads.
+    """
+    sessions = {}
+    with open(path) as f:
+        for line in f:
+            if line.strip() == "":
+                continue
+            record = json.loads(line)
+            sessions.setdefault(record['session'], []).append(record)
+
+    return [
+        [r['payload'] for r in sorted(records, key=lambda r: r['time'])] for records in sessions.values()
+    ]
+
+
+class LoadDriver:
+    """
+    Replays recorded sessions concurrently against a Quickboard app and reports throughput and tail latency at each
+    level of concurrency. Component ids are auto-generated deterministically by Dash, and sidebar controls are numbered
+    by tab and position, so recordings replay correctly against a board built by the same code.
+    Inputs:
+        sessions = list of sessions, each a list of callback payloads; see `load_sessions`
+        target = either the Flask server returned by `get_app_server` (replayed in-process) or a base URL such as
+            'http://localhost:8050' (replayed over HTTP)
+    """
+    def __init__(self, sessions, target):
+        assert len(sessions) > 0, "No sessions to replay."
+        self.sessions = sessions
+        self.target = target
+
+    def make_sender(self):
+        """
+        Returns a function posting one payload to the target, returning the HTTP status code. Each worker thread gets
+        its own sender, since Flask test clients are not shared between threads.
+        """
+        if isinstance(self.target, str):
+            url = self.target.rstrip('/') + '/' + UPDATE_ROUTE
+
+            def send(payload):
+                req = urllib.request.Request(
+                    url,
+                    data=json.dumps(payload).encode(),
+                    headers={'Content-Type': 'application/json'},
+                    method='POST'
+                )
+                try:
+                    with urllib.request.urlopen(req) as response:
+                        response.read()
+                        return response.status
+                except urllib.error.HTTPError as e:
+                    return e.code
+        else:
+            client = self.target.test_client()
+
+            def send(payload):
+                return client.post('/' + UPDATE_ROUTE, json=payload).status_code
+
+        return send
+
+    def run_level(self, concurrency, repeats=1):
+        """
+        Runs `concurrency` simulated users, each replaying sessions round robin `repeats` times, and returns a dict of
+        summary statistics for the run.
+        """
+        latencies = []
+        errors = [0]
+        lock = threading.Lock()
+
+        def user(user_index):
+            send = self.make_sender()
+            local_latencies = []
+            local_errors = 0
+            for r in range(repeats):
+                session = self.sessions[(user_index + r * concurrency) % len(self.sessions)]
+                for payload in session:
+                    start = time.perf_counter()
+                    try:
+                        status = send(payload)
+                    except Exception:
+                        status = None
+                    local_latencies.append(time.perf_counter() - start)
+                    # 204 is returned by Dash when a callback raises PreventUpdate
+                    if status not in (200, 204):
+                        local_errors += 1
+            with lock:
+                latencies.extend(local_latencies)
+                errors[0] += local_errors
+
+        threads = [threading.Thread(target=user, args=(i,)) for i in range(concurrency)]
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - start
+
+        latencies.sort()
+        return {
+            'concurrency': concurrency,
+            'requests': len(latencies),
+            'errors': errors[0],
+            'elapsed': elapsed,
+            'throughput': len(latencies) / elapsed if elapsed > 0 else 0.0,
+            'p50': self.percentile(latencies, 50),
+            'p95': self.percentile(latencies, 95),
+            'p99': self.percentile(latencies, 99),
+            'max': latencies[-1] if latencies else 0.0,
+        }
+
+    def run(self, concurrency_levels=(1, 2, 4, 8), repeats=1):
+        """
+        Runs the replay at each concurrency level in turn and returns the list of results.
+        """
+        return [self.run_level(c, repeats=repeats) for c in concurrency_levels]
+
+    @staticmethod
+    def percentile(sorted_values, p):
+        if len(sorted_values) == 0:
+            return 0.0
+        k = min(len(sorted_values) - 1, int(round(p / 100 * (len(sorted_values) - 1))))
+        return sorted_values[k]
+
+    @staticmethod
+    def format_report(results):
+        """
+        Formats results from `run` as a plain text table, with latencies in milliseconds.
+        """
+        lines = [f"{'users':>6} {'requests':>9} {'errors':>7} {'req/s':>9} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}"]
+        for r in results:
+            lines.append(
+                f"{r['concurrency']:>6} {r['requests']:>9} {r['errors']:>7} {r['throughput']:>9.1f} "
+                f"{r['p50'] * 1000:>9.1f} {r['p95'] * 1000:>9.1f} {r['p99'] * 1000:>9.1f} {r['max'] * 1000:>9.1f}"
+            )
+        return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded Quickboard sessions against a running app.")
+    parser.add_argument('recording', help="JSON lines file written by SessionRecorder")
+    parser.add_argument('--url', default="http://127.0.0.1:8050", help="base URL of the running app")
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 2, 4, 8], help="concurrency levels to run")
+    parser.add_argument('--repeats', type=int, default=1, help="number of sessions each simulated user replays")
+    args = parser.parse_args()
+
+    driver = LoadDriver(load_sessions(args.recording), args.url)
+    print(driver.format_report(driver.run(args.concurrency, repeats=args.repeats)))
+
+
+if __name__ == '__main__':
+    main()
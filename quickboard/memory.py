@@ -0,0 +1,297 @@
+import pickle
+import threading
+import time
+import warnings
+import weakref
+
+import numpy as np
+import pandas as pd
+from flask import jsonify, request
+
+from quickboard.base import DynamicPanel
+from quickboard.primitives import DataManager, DiskCache, MemoryCache
+from quickboard.utils.callbacks import SNAPSHOTS
+
+
+UPDATE_ROUTE = "_dash-update-component"
+REPORT_ROUTE = "/_quickboard/memory"
+
+
+class MemoryMonitor:
+    """
+    Accounts for the memory a board holds in the current process: the data loaded by its panels' DataManagers, the
+    column encodings shared between them, their result caches and the callback snapshots recorded by warming up.
+    Objects shared by several panels (e.g. a DataFrame or a MemoryCache) are counted once in the total, and in full for
+    each tab and panel using them. When given a budget, enforce brings usage back under it by, in order: evicting least
+    recently used entries of MemoryCaches (into their spill cache, if any), dropping snapshots, and downcasting numeric
+    columns of the loaded data if allowed.
+    Inputs:
+        board = Quickboard object
+        budget = maximal number of bytes to hold, or None to only report usage
+        downcast = whether enforce may replace the data loaded from files with copies whose numeric columns are
+        downcast; float64 columns become float32, losing precision
+        check_interval = minimal number of seconds between two budget checks made in the background after callbacks
+    """
+    # Number of snapshots of a callback pickled to estimate the size of all of them
+    SNAPSHOT_SAMPLE = 16
+
+    def __init__(self, board, budget=None, downcast=False, check_interval=10):
+        self.board = board
+        self.budget = budget
+        self.downcast = downcast
+        self.check_interval = check_interval
+        self.last_check = 0
+        self.lock = threading.Lock()
+        # Deep memory usage of frames, keyed by id, with a weak reference telling whether the id was reused
+        self.frame_sizes = {}
+
+    def attach(self, server, route=REPORT_ROUTE):
+        """
+        Registers the budget check after callbacks on the given Flask server, and serves the JSON report at route
+        unless it is None.
+        """
+        if route is not None:
+            server.add_url_rule(route, 'quickboard_memory', self.serve_report)
+        if self.budget is not None:
+            server.after_request(self.check)
+        return self
+
+    def panels(self):
+        """
+        Returns a list of (tab_label, panel) pairs for all DynamicPanels of the board, with tab_label "" for panels
+        outside of tabs.
+        """
+        board = self.board
+        components = [(tab.tab_label, tab) for tab in board.tab_list] + [("", board.children[1])]
+        panels = []
+        seen = set()
+        for tab_label, component in components:
+            for panel in component._traverse():
+                if isinstance(panel, DynamicPanel) and id(panel) not in seen:
+                    seen.add(id(panel))
+                    panels.append((tab_label, panel))
+        return panels
+
+    def holders(self):
+        """
+        Returns a list of dicts describing the objects holding memory, with keys kind (one of data, encodings, cache,
+        disk or snapshots; disk caches are listed but not counted as memory), name, bytes, and panels, a list of
+        (tab_label, panel_label) pairs of the panels using the object.
+        """
+        panels = self.panels()
+        frames = {id(self.frame(panel.data_manager)) for _, panel in panels}
+        frame_sizes = {}
+        holders = {}
+
+        def add(key, kind, name, size, tab_label, panel):
+            holder = holders.setdefault(key, {'kind': kind, 'name': name, 'bytes': int(size), 'panels': []})
+            holder['panels'].append((tab_label, self.panel_label(panel)))
+
+        for tab_label, panel in panels:
+            dm = panel.data_manager
+            df = self.frame(dm)
+            add(('data', id(df)), 'data', self.source_name(dm), self.frame_bytes(df, frame_sizes), tab_label, panel)
+
+            key = dm.encoding_key()
+            encodings = DataManager.encodings.get(key) if key is not None else None
+            if encodings:
+                size = self.encodings_bytes(encodings, frames)
+                add(('encodings', key), 'encodings', self.source_name(dm), size, tab_label, panel)
+
+            for cache in self.caches(panel):
+                kind = 'disk' if isinstance(cache, DiskCache) else 'cache'
+                name = cache.path if isinstance(cache, DiskCache) else type(cache).__name__
+                add(('cache', id(cache)), kind, name, getattr(cache, 'size', 0), tab_label, panel)
+
+            for key, snapshots in list(SNAPSHOTS.items()):
+                if key[0] in [id(panel), id(panel.panel_batch)]:
+                    size = self.snapshots_bytes(snapshots)
+                    add(('snapshots', key), 'snapshots', key[1].__qualname__, size, tab_label, panel)
+
+        self.frame_sizes = frame_sizes
+        return list(holders.values())
+
+    def report(self):
+        """
+        Returns a dict with the budget, the total bytes held, and the tabs, panels and holders sorted by decreasing
+        bytes held.
+        """
+        holders = sorted(self.holders(), key=lambda h: h['bytes'], reverse=True)
+        tabs = {}
+        panels = {}
+        for holder in holders:
+            if holder['kind'] == 'disk':
+                continue
+            for tab_label, panel_label in holder['panels']:
+                tabs[tab_label] = tabs.get(tab_label, 0) + holder['bytes']
+                panels[(tab_label, panel_label)] = panels.get((tab_label, panel_label), 0) + holder['bytes']
+
+        return {
+            'budget': self.budget,
+            'total': self.total(holders),
+            'tabs': [
+                {'tab': tab, 'bytes': size} for tab, size in sorted(tabs.items(), key=lambda t: t[1], reverse=True)
+            ],
+            'panels': [
+                {'tab': tab, 'panel': panel, 'bytes': size}
+                for (tab, panel), size in sorted(panels.items(), key=lambda p: p[1], reverse=True)
+            ],
+            'holders': holders,
+        }
+
+    def serve_report(self):
+        return jsonify(self.report())
+
+    def check(self, response):
+        # Measuring walks the board's data and snapshots, so is done in a background thread rather than delaying the
+        # response; enforce skips the check if one is already running
+        if request.path.endswith(UPDATE_ROUTE) and time.time() - self.last_check >= self.check_interval:
+            self.last_check = time.time()
+            threading.Thread(target=self.enforce, daemon=True).start()
+        return response
+
+    def enforce(self):
+        """
+        Frees memory until the board is within budget, warning if it can't be. Returns the number of bytes held.
+        """
+        # Skip the check if another thread is already running it
+        if not self.lock.acquire(blocking=False):
+            return None
+        try:
+            self.last_check = time.time()
+            total = self.total(self.holders())
+            if self.budget is None or total <= self.budget:
+                return total
+
+            total -= self.evict_caches(total - self.budget)
+            if total > self.budget:
+                total -= self.drop_snapshots()
+            if total > self.budget and self.downcast:
+                total -= self.downcast_data()
+            if total > self.budget:
+                warnings.warn(
+                    f"Board holds {total} bytes, over its memory budget of {self.budget} bytes. See "
+                    f"MemoryMonitor.report for the tabs and panels holding the most.", RuntimeWarning
+                )
+            return total
+        finally:
+            self.lock.release()
+
+    def evict_caches(self, excess):
+        """
+        Evicts entries of the panels' MemoryCaches, largest caches first, until excess bytes are freed. Returns the
+        number of bytes freed.
+        """
+        caches = {id(c): c for _, p in self.panels() for c in self.caches(p) if isinstance(c, MemoryCache)}
+        freed = 0
+        for cache in sorted(caches.values(), key=lambda c: c.size, reverse=True):
+            if freed >= excess:
+                break
+            freed += cache.evict(max(cache.size - (excess - freed), 0))
+        return freed
+
+    def drop_snapshots(self):
+        """
+        Drops the callback snapshots of the board's panels; the callbacks compute their outputs again when called.
+        Returns the number of bytes freed.
+        """
+        owners = set()
+        for _, panel in self.panels():
+            owners.update([id(panel), id(panel.panel_batch)])
+
+        freed = 0
+        for key in [k for k in SNAPSHOTS if k[0] in owners]:
+            freed += self.snapshots_bytes(SNAPSHOTS.pop(key, {}))
+        return freed
+
+    def downcast_data(self):
+        """
+        Downcasts the numeric columns of the data loaded from files, and of converted copies of DataFrames, once per
+        distinct frame (see DataManager.downcast). Returns the number of bytes freed.
+        """
+        groups = {}
+        for _, panel in self.panels():
+            dm = panel.data_manager
+            if dm.source_type in ["DataFrame", "csv", "tsv"]:
+                groups.setdefault(id(dm.df), []).append(dm)
+
+        freed = 0
+        for frame_id, managers in groups.items():
+            freed += managers[0].downcast(sharing=managers[1:])
+            self.frame_sizes.pop(frame_id, None)
+        return freed
+
+    @staticmethod
+    def total(holders):
+        return sum(h['bytes'] for h in holders if h['kind'] != 'disk')
+
+    @staticmethod
+    def caches(panel):
+        # Partitioned sources keep recently read files in a cache of their own
+        caches = [panel.cache] if panel.cache is not None else []
+        if panel.data_manager.source_type == "partitioned":
+            caches.append(panel.data_manager.data_source.cache)
+        return caches
+
+    @staticmethod
+    def frame(dm):
+        # Streamed data lives in its source's bounded buffer rather than in the DataManager
+        return dm.data_source.buffer if dm.source_type == "stream" else dm.df
+
+    def frame_bytes(self, df, frame_sizes):
+        # Deep memory usage walks every string of object columns, so reuse earlier results for the same frame
+        cached = self.frame_sizes.get(id(df))
+        if cached is not None and cached[0]() is df:
+            frame_sizes[id(df)] = cached
+            return cached[1]
+        size = int(df.memory_usage(index=True, deep=True).sum())
+        frame_sizes[id(df)] = (weakref.ref(df), size)
+        return size
+
+    @classmethod
+    def encodings_bytes(cls, encodings, frames):
+        size = 0
+        for value in list(encodings.values()):
+            # Arrow-backed copies of DataFrames are the loaded data itself, already counted
+            if isinstance(value, pd.DataFrame) and id(value) in frames:
+                continue
+            size += cls.nbytes(value)
+        return size
+
+    @classmethod
+    def nbytes(cls, value):
+        if isinstance(value, np.ndarray):
+            return value.nbytes
+        if isinstance(value, (pd.Index, pd.Series)):
+            return int(value.memory_usage(deep=True))
+        if isinstance(value, pd.DataFrame):
+            return int(value.memory_usage(index=True, deep=True).sum())
+        if isinstance(value, (tuple, list)):
+            return sum(cls.nbytes(v) for v in value)
+        return 0
+
+    @classmethod
+    def snapshots_bytes(cls, snapshots):
+        # Outputs are figures and table records; their pickled size approximates what they hold. Only a sample spread
+        # over the snapshots is pickled, as a callback's outputs have similar sizes
+        values = list(snapshots.values())
+        if len(values) == 0:
+            return 0
+        sample = values[::-(-len(values) // cls.SNAPSHOT_SAMPLE)]
+        size = sum(len(pickle.dumps(outputs, protocol=pickle.HIGHEST_PROTOCOL)) for outputs in sample)
+        return size * len(values) // len(sample)
+
+    @staticmethod
+    def source_name(dm):
+        if dm.source_type in ["csv", "tsv"]:
+            return dm.data_source
+        if dm.source_type == "partitioned":
+            return dm.data_source.path
+        if dm.source_type == "DataFrame":
+            return f"DataFrame {dm.df.shape[0]}x{dm.df.shape[1]}"
+        return f"{dm.source_type} data"
+
+    @staticmethod
+    def panel_label(panel):
+        header = getattr(panel.header, 'children', panel.header)
+        return f"{type(panel).__name__} {header}" if isinstance(header, str) and header != "" else type(panel).__name__
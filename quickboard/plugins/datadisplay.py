@@ -1,9 +1,10 @@
-from dash import html, callback
+from dash import html
 from dash import dash_table
-from dash.dependencies import Input, Output
+from dash.dependencies import Input, Output, MATCH
 
 import pandas as pd
 from quickboard.primitives import Panel
+from quickboard.utils.callbacks import deferred_callback, deferred_setup, deferred_shared_callback
 
 
 class DataDisplay(Panel):
@@ -14,6 +15,10 @@ class DataDisplay(Panel):
         header = header text/object
         listen = list of control objects to get notified of changes in them
     """
+    # Displays listening to the data_store alone, updated by one pattern-matching callback, by the unique_id of their
+    # tables
+    matched_displays = {}
+
     def __init__(self, data_source, header="", listen=[]):
         # Calibrate header based on input and control type
         if isinstance(header, str):
@@ -33,11 +38,38 @@ class DataDisplay(Panel):
 
         super().__init__(main_content=[self.header, self.datatable])
 
-        callback(
+        self.listen = listen
+        if len(listen) == 0:
+            # Ids are assigned in order of creation, so are the same in all workers building the same board
+            unique_id = len(DataDisplay.matched_displays)
+            DataDisplay.matched_displays[unique_id] = self
+            self.datatable.id = {'component_type': 'data_display', 'unique_id': unique_id}
+            deferred_shared_callback(
+                Output({'component_type': 'data_display', 'unique_id': MATCH}, 'data'),
+                Output({'component_type': 'data_display', 'unique_id': MATCH}, 'columns'),
+                Input('data_store', 'data'),
+                Input({'component_type': 'data_display', 'unique_id': MATCH}, 'id')
+            )(DataDisplay.update_matched)
+        else:
+            # Listened controls may get new ids from the panel or sidebar holding them, so wait before declaring the
+            # callback
+            deferred_setup(self.setup_callback)
+
+    @staticmethod
+    def update_matched(data_state, table_id):
+        """
+        Pattern-matching callback shared by the displays listening to the data_store alone, keeping the callback graph
+        the same size however many displays a board holds. Dispatches to update_table of the display whose table is
+        updated.
+        """
+        return DataDisplay.matched_displays[table_id['unique_id']].update_table(data_state)
+
+    def setup_callback(self):
+        deferred_callback(
             Output(self.datatable, 'data'),
             Output(self.datatable, 'columns'),
             Input('data_store', 'data'),
-            [Input(x, 'value') for x in listen]
+            [Input(x, 'value') for x in self.listen]
         )(self.update_table)
 
     def data_transform(self, df):
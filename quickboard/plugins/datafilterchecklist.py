@@ -1,4 +1,5 @@
 from quickboard.plugins.templates import Checklist
+from quickboard.primitives import DataManager
 
 
 class DataFilterChecklist(Checklist):
@@ -6,11 +7,20 @@ class DataFilterChecklist(Checklist):
     A plugin for filtering data to be displayed by removing records where a certain column's value is not in checklist.
     Inputs:
         data_col = column from data to check for values in checklist
-        data_values = list of possible values to populate the checklist
+        data_values = list of possible values to populate the checklist; if None, the distinct
+        values of data_col in data_source
         header = header text/object
         toggle_all_button = determines whether to include a "toggle all" button with checklist
+        data_source = DataFrame or csv/tsv file path to take data_values from when these aren't given
     """
-    def __init__(self, data_col, data_values, header="", toggle_all_button=True):
+    modifies_data = False
+    selects_rows = True
+    commutes = True
+
+    def __init__(self, data_col, data_values=None, header="", toggle_all_button=True, data_source=None):
+        if data_values is None:
+            data_values = DataManager(data_source).column_values(data_col)
+
         super().__init__(
             data_values=data_values,
             header=header,
@@ -26,5 +36,13 @@ class DataFilterChecklist(Checklist):
         Filters the data by checking the column has values in the currently checked values.
         """
         data_col = control_attributes['data_col']
-        df = df[df[data_col].isin(control_value)]
+        df = df[dp.data_manager.isin_mask(df, data_col, control_value)]
         return df, {}
+
+    @staticmethod
+    def selectivity(control_attributes, dp, control_value):
+        return dp.data_manager.isin_fraction(control_attributes['data_col'], control_value)
+
+    @staticmethod
+    def selected_values(control_attributes, control_value):
+        return control_value
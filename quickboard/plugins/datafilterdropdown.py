@@ -1,4 +1,5 @@
 from quickboard.plugins.templates import Dropdown
+from quickboard.primitives import DataManager
 
 
 class DataFilterDropdown(Dropdown):
@@ -7,10 +8,19 @@ class DataFilterDropdown(Dropdown):
     selected dropdown value.
     Inputs:
         data_col = column from data to check for values matching button
-        data_values = list of possible values to populate the menu list
+        data_values = list of possible values to populate the menu list; if None, the distinct
+        values of data_col in data_source
         header = header text/object
+        data_source = DataFrame or csv/tsv file path to take data_values from when these aren't given
     """
-    def __init__(self, data_col, data_values, header=""):
+    modifies_data = False
+    selects_rows = True
+    commutes = True
+
+    def __init__(self, data_col, data_values=None, header="", data_source=None):
+        if data_values is None:
+            data_values = DataManager(data_source).column_values(data_col)
+
         super().__init__(
             header=header,
             data_values=data_values
@@ -25,5 +35,13 @@ class DataFilterDropdown(Dropdown):
         Filters the data by checking the column has value matching the selected button.
         """
         data_col = control_attributes['data_col']
-        df = df[df[data_col] == control_value]
+        df = df[dp.data_manager.isin_mask(df, data_col, [control_value])]
         return df, {}
+
+    @staticmethod
+    def selectivity(control_attributes, dp, control_value):
+        return dp.data_manager.isin_fraction(control_attributes['data_col'], [control_value])
+
+    @staticmethod
+    def selected_values(control_attributes, control_value):
+        return [control_value]
@@ -1,3 +1,5 @@
+import numpy as np
+
 from quickboard.plugins.templates.rangeslider import RangeSlider
 
 
@@ -19,6 +21,10 @@ class DataFilterRangeSlider(RangeSlider):
             on that end; useful for ending a slider with label like '10+'
         header = header text/object
     """
+    modifies_data = False
+    selects_rows = True
+    commutes = True
+
     def __init__(self, data_col, slider_min, slider_max, slider_default_values=None, slider_step=None,
                  slider_marks={}, tooltip={}, updatemode='mouseup', edges_infinite=False, header=""):
         super().__init__(
@@ -40,6 +46,23 @@ class DataFilterRangeSlider(RangeSlider):
         """
         Filters data so given column lies within the range of the slider.
         """
+        current_min, current_max = DataFilterRangeSlider.bounds(control_attributes, control_value)
+        data_col = control_attributes['data_col']
+        df = dp.data_manager.range_filter(df, data_col, current_min, current_max)
+
+        return df, {}
+
+    @staticmethod
+    def selectivity(control_attributes, dp, control_value):
+        current_min, current_max = DataFilterRangeSlider.bounds(control_attributes, control_value)
+        return dp.data_manager.range_fraction(control_attributes['data_col'], current_min, current_max)
+
+    @staticmethod
+    def bounds(control_attributes, control_value):
+        """
+        Returns the (min, max) range of values kept for the slider's value, infinite at the slider's edges if
+        edges_infinite.
+        """
         current_min = control_value[0]
         current_max = control_value[1]
 
@@ -47,7 +70,4 @@ class DataFilterRangeSlider(RangeSlider):
             current_min = -np.inf if current_min == control_attributes['slider_min'] else current_min
             current_max = np.inf if current_max == control_attributes['slider_max'] else current_max
 
-        data_col = control_attributes['data_col']
-        df = df[(df[data_col] >= current_min) & (df[data_col] <= current_max)]
-
-        return df, {}
+        return current_min, current_max
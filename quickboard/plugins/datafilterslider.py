@@ -17,6 +17,10 @@ class DataFilterSlider(Slider):
         updatemode = either 'mouseup' (default) or 'drag' to specify when data should be updated
         header = header text/object
     """
+    modifies_data = False
+    selects_rows = True
+    commutes = True
+
     def __init__(self, data_col, slider_min, slider_max, slider_default_value=None, slider_step=None,
                  slider_marks={}, tooltip={}, updatemode='mouseup', header=""):
         super().__init__(
@@ -45,3 +49,9 @@ class DataFilterSlider(Slider):
         df = df[df[data_col] == control_value]
 
         return df, {}
+
+    @staticmethod
+    def selectivity(control_attributes, dp, control_value):
+        data_col = control_attributes['data_col']
+        fraction = dp.data_manager.range_fraction(data_col, control_value, control_value)
+        return fraction if fraction is not None else dp.data_manager.isin_fraction(data_col, [control_value])
@@ -2,6 +2,10 @@ from quickboard.plugins import DataFilterChecklist
 
 
 class DataSumChecklist(DataFilterChecklist):
+    modifies_data = True
+    selects_rows = False
+    commutes = False
+
     # Overrides parent method
     @staticmethod
     def configure(control_attributes, dp, df, control_value):
@@ -10,8 +14,17 @@ class DataSumChecklist(DataFilterChecklist):
         checklist-item is currently checked.
         """
         data_col = control_attributes['data_col']
-        df[data_col] = 0
+        total = 0
         for cv in control_value:
-            df[data_col] += df[data_col + '_' + cv]
+            total = total + df[data_col + '_' + cv]
 
+        # Set the column on a shallow copy, as df may be the data source shared by all sessions; the other columns'
+        # data isn't copied
+        df = df.copy(deep=False)
+        df[data_col] = total
         return df, {}
+
+    # Overrides parent method, as the checked values select columns rather than rows
+    @staticmethod
+    def selected_values(control_attributes, control_value):
+        return None
@@ -10,6 +10,10 @@ class PlotInputRadioButtons(RadioButtons):
         data_values = list of possible values to populate the radio button list
         header = header text/object
     """
+    modifies_data = False
+    selects_rows = True
+    commutes = True
+
     def __init__(self, plot_input, data_values, header=""):
         super().__init__(
             header=header,
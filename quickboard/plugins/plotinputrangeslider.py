@@ -16,6 +16,10 @@ class PlotInputRangeSlider(RangeSlider):
         updatemode = either 'mouseup' (default) or 'drag' to specify when data should be updated
         header = header text/object
     """
+    modifies_data = False
+    selects_rows = True
+    commutes = True
+
     def __init__(self, plot_input, slider_min, slider_max, slider_default_values=None, slider_step=None,
                  slider_marks={}, tooltip={}, updatemode='mouseup', edges_infinite=False, header=""):
         super().__init__(
@@ -16,6 +16,10 @@ class PlotInputSlider(Slider):
         updatemode = either 'mouseup' (default) or 'drag' to specify when data should be updated
         header = header text/object
     """
+    modifies_data = False
+    selects_rows = True
+    commutes = True
+
     def __init__(self, plot_input, slider_min, slider_max, slider_default_value=None, slider_step=None,
                  slider_marks={}, tooltip={}, updatemode='mouseup', header="", **kwargs):
         super().__init__(
@@ -1,9 +1,10 @@
-from dash import dcc, html, ctx, callback
+from dash import dcc, html, ctx
 from dash.exceptions import PreventUpdate
 import dash_bootstrap_components as dbc
 
 from quickboard.primitives import ControlPlugin
-from dash.dependencies import Input, Output
+from quickboard.utils.callbacks import deferred_callback, deferred_setup, deferred_shared_callback
+from dash.dependencies import Input, Output, State, MATCH
 
 class Checklist(ControlPlugin):
     """
@@ -47,7 +48,23 @@ class Checklist(ControlPlugin):
     # Overrides parent method
     def setup_internal_callback(self):
         if self.contains_toggle:
-            callback(
+            # Wait for the control's final id, e.g. given by a sidebar or panel, before declaring the callback
+            deferred_setup(self.setup_toggle_callback)
+
+    def setup_toggle_callback(self):
+        control_id = getattr(self.control, 'id', None)
+        if isinstance(control_id, dict) and control_id.get('control_type') == 'panel_control':
+            # Checklists of panels share one pattern-matching callback, see DynamicPanel.match_plugins
+            self.all_button.id = dict(control_id, control_type='panel_control_all')
+            self.none_button.id = dict(control_id, control_type='panel_control_none')
+            deferred_shared_callback(
+                Output({'control_type': 'panel_control', 'unique_id': MATCH, 'plugin_index': MATCH}, 'value'),
+                Input({'control_type': 'panel_control_all', 'unique_id': MATCH, 'plugin_index': MATCH}, 'n_clicks'),
+                Input({'control_type': 'panel_control_none', 'unique_id': MATCH, 'plugin_index': MATCH}, 'n_clicks'),
+                State({'control_type': 'panel_control', 'unique_id': MATCH, 'plugin_index': MATCH}, 'options')
+            )(Checklist.toggle_matched)
+        else:
+            deferred_callback(
                 Output(self.control, 'value'),
                 Input(self.all_button, 'n_clicks'),
                 Input(self.none_button, 'n_clicks')
@@ -66,3 +83,16 @@ class Checklist(ControlPlugin):
         else:
             # Should never be reached
             raise ValueError(f"Invalid button: {button_clicked}")
+
+    @staticmethod
+    def toggle_matched(all_button_clicks, none_button_clicks, options):
+        """
+        Pattern-matching version of toggle_selection, shared by the checklists of all panels.
+        """
+        button_clicked = ctx.triggered_id
+        if button_clicked is None:
+            raise PreventUpdate
+        elif button_clicked['control_type'] == 'panel_control_all':
+            return [d['value'] for d in options]
+        else:
+            return []
@@ -1,3 +1,10 @@
+from ._cache import ResultCache, MemoryCache, DiskCache, make_cache_key, callable_fingerprint, frame_fingerprint
+from ._streamsource import StreamSource, GeneratorSource, QueueSource, FileTailSource
+from ._rowview import RowView
+from ._partitions import PartitionedSource
+from ._sidecar import CsvSidecar
 from ._datamanager import DataManager
+from ._pyramid import TimePyramid
+from ._figureslimmer import FigureSlimmer
 from ._panel import Panel
-from .controlplugin import ControlPlugin
\ No newline at end of file
+from .controlplugin import ControlPlugin
@@ -0,0 +1,367 @@
+import functools
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import types
+from collections import OrderedDict
+
+import pandas as pd
+
+
+def make_cache_key(*parts):
+    """
+    Builds a content-addressed key from JSON-like parts (data versions, control states, plotter fingerprints, ...).
+    Equal parts give equal keys in every process, so keys can be shared between workers.
+    """
+    serialized = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(serialized.encode()).hexdigest()
+
+
+def frame_fingerprint(df):
+    """
+    Returns a hash of the index labels and columns of a DataFrame, computed in one vectorized pass. For frames filtered
+    from a source with a unique index, this identifies which rows of the source the frame holds, and in which order.
+    """
+    hashes = pd.util.hash_array(df.index.to_numpy())
+    return hashlib.sha256(hashes.tobytes() + repr(list(df.columns)).encode()).hexdigest()
+
+
+def callable_fingerprint(func, depth=0, follow_globals=True):
+    """
+    Returns a string identifying a plotter (or other callable) by its qualified name, its code, and the values it
+    closes over, takes as defaults and reads from module globals, so that e.g. two lambdas with different captured
+    titles get different fingerprints. functools.partial objects are identified by their function and arguments, bound
+    methods also by the attributes of their object, and callable instances by their __call__ method and attributes.
+    Functions read from globals are identified by their own code and captured values, but not by the globals they read
+    in turn. Returns None when a callable can't be identified this way, e.g. a lambda closing over a DataFrame, in
+    which case results computed with it shouldn't be cached.
+    """
+    if depth > 4:
+        return None
+    if isinstance(func, functools.partial):
+        inner = callable_fingerprint(func.func, depth + 1, follow_globals)
+        arguments = _value_state((func.args, func.keywords), depth)
+        if inner is None or arguments is None:
+            return None
+        return f"functools.partial({inner}):{_digest(arguments)}"
+    if inspect.ismethod(func):
+        inner = callable_fingerprint(func.__func__, depth + 1, follow_globals)
+        owner = _value_state(func.__self__, depth)
+        if inner is None or owner is None:
+            return None
+        return f"{inner}:{_digest(owner)}"
+    if isinstance(func, (type, types.BuiltinFunctionType)):
+        return f"{getattr(func, '__module__', '')}.{func.__qualname__}"
+
+    name = f"{getattr(func, '__module__', '')}.{getattr(func, '__qualname__', type(func).__qualname__)}"
+    code = getattr(func, '__code__', None)
+    if code is None:
+        # Callable instances are identified by the code of their class's __call__ and their attributes
+        call = getattr(type(func), '__call__', None)
+        if getattr(call, '__code__', None) is None:
+            # Other callables implemented in C, such as NumPy ufuncs, hold no Python state to tell them apart by
+            return name if hasattr(func, '__name__') else None
+        inner = callable_fingerprint(call, depth + 1, follow_globals)
+        owner = _value_state(func, depth)
+        if inner is None or owner is None:
+            return None
+        return f"{inner}:{_digest(owner)}"
+
+    captured = [c.cell_contents for c in (func.__closure__ or [])] + list(func.__defaults__ or ())
+    captured += list((func.__kwdefaults__ or {}).items())
+    if follow_globals:
+        captured += _read_globals(func)
+    state = _value_state(captured, depth)
+    if state is None:
+        return None
+    digest = hashlib.sha256()
+    _hash_code(code, digest)
+    digest.update(json.dumps(state).encode())
+    return f"{name}:{digest.hexdigest()[:16]}"
+
+
+def _read_globals(func):
+    # Returns the (name, value) pairs of the module globals read by func and the lambdas and comprehensions nested in
+    # it. Names that aren't globals (attributes, builtins) and func itself, when recursive, are left out
+    names = set()
+    codes = [func.__code__]
+    while codes:
+        code = codes.pop()
+        names.update(code.co_names)
+        codes.extend(const for const in code.co_consts if hasattr(const, 'co_code'))
+    module = getattr(func, '__globals__', {})
+    values = []
+    for name in sorted(names):
+        if name in module and module[name] is not func:
+            values.append((name, module[name]))
+    return values
+
+
+def _value_state(value, depth):
+    # Returns a JSON-like description of value for callable_fingerprint, or None if it holds anything else than plain
+    # values, modules, functions and objects whose attributes are made of those
+    if depth > 4:
+        return None
+    if isinstance(value, (str, int, float, bool, type(None))):
+        return [type(value).__name__, value]
+    if isinstance(value, (list, tuple)):
+        items = [_value_state(item, depth + 1) for item in value]
+        return None if None in items else [type(value).__name__, items]
+    if isinstance(value, dict):
+        items = [[_value_state(k, depth + 1), _value_state(v, depth + 1)] for k, v in value.items()]
+        return None if any(None in item for item in items) else ['dict', sorted(items, key=repr)]
+    if isinstance(value, types.ModuleType):
+        return ['module', value.__name__]
+    if isinstance(value, (type, functools.partial, types.FunctionType, types.MethodType, types.BuiltinFunctionType)):
+        # Don't follow the globals of the functions called in turn, as these lead through whole libraries
+        fingerprint = callable_fingerprint(value, depth + 1, follow_globals=False)
+        return None if fingerprint is None else ['callable', fingerprint]
+    attributes = getattr(value, '__dict__', None)
+    state = _value_state(attributes, depth + 1) if isinstance(attributes, dict) else None
+    return None if state is None else [f"{type(value).__module__}.{type(value).__qualname__}", state]
+
+
+def _digest(state):
+    return hashlib.sha256(json.dumps(state).encode()).hexdigest()[:16]
+
+
+def _hash_code(code, digest):
+    # The repr of nested code objects (lambdas, comprehensions) holds their memory address, which differs between
+    # processes, so hash them by content instead
+    digest.update(code.co_code)
+    digest.update(repr(code.co_names).encode())
+    for const in code.co_consts:
+        _hash_const(const, digest)
+
+
+def _hash_const(const, digest):
+    if hasattr(const, 'co_code'):
+        _hash_code(const, digest)
+    elif isinstance(const, tuple):
+        digest.update(b"(")
+        for item in const:
+            _hash_const(item, digest)
+        digest.update(b")")
+    elif isinstance(const, frozenset):
+        # Iteration order of sets of strings depends on the process's hash seed
+        digest.update(repr(sorted(repr(item) for item in const)).encode())
+    else:
+        digest.update(repr(const).encode() + b",")
+
+
+class ResultCache:
+    """
+    An "abstract" class for key-value stores holding panel outputs and filtered frames. Values are pickled on the way
+    in, so callers always get back a private copy they are free to mutate. Entries are evicted least recently used
+    first once the total size of stored values exceeds max_bytes.
+    Inputs:
+        max_bytes = maximal total size in bytes of stored values
+    """
+    def __init__(self, max_bytes=256 * 2**20):
+        self.max_bytes = max_bytes
+
+    def get(self, key):
+        """
+        Returns the value stored under key, or None if missing.
+        """
+        blob = self.get_bytes(key)
+        return pickle.loads(blob) if blob is not None else None
+
+    def set(self, key, value):
+        """
+        Stores value under key, evicting older entries as needed to stay within max_bytes.
+        """
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(blob) <= self.max_bytes:
+            self.set_bytes(key, blob)
+
+    def get_bytes(self, key):
+        """
+        To be implemented by children classes. Returns the pickled value stored under key, or None if missing.
+        """
+        pass
+
+    def set_bytes(self, key, blob):
+        """
+        To be implemented by children classes. Stores the pickled value blob under key, evicting older entries as
+        needed to stay within max_bytes.
+        """
+        pass
+
+    def clear(self):
+        """
+        To be implemented by children classes. Removes all entries.
+        """
+        pass
+
+
+class MemoryCache(ResultCache):
+    """
+    A cache local to a single process.
+    Inputs:
+        max_bytes = maximal total size in bytes of stored values
+        spill = optional ResultCache (e.g. a DiskCache) receiving the entries evicted from memory, and looked up on
+        misses; entries found there are moved back into memory
+    """
+    def __init__(self, max_bytes=256 * 2**20, spill=None):
+        super().__init__(max_bytes=max_bytes)
+        self.spill = spill
+        self.entries = OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+
+    def get_bytes(self, key):
+        with self.lock:
+            blob = self.entries.get(key)
+            if blob is not None:
+                self.entries.move_to_end(key)
+                return blob
+
+        if self.spill is not None:
+            blob = self.spill.get_bytes(key)
+            if blob is not None:
+                self.set_bytes(key, blob)
+        return blob
+
+    def set_bytes(self, key, blob):
+        with self.lock:
+            if key in self.entries:
+                self.size -= len(self.entries.pop(key))
+            self.entries[key] = blob
+            self.size += len(blob)
+        self.evict(self.max_bytes)
+
+    def evict(self, max_bytes):
+        """
+        Evicts least recently used entries until at most max_bytes are stored, spilling them if configured. Returns the
+        number of bytes freed.
+        """
+        evicted = []
+        with self.lock:
+            while self.size > max_bytes and len(self.entries) > 0:
+                key, blob = self.entries.popitem(last=False)
+                self.size -= len(blob)
+                evicted.append((key, blob))
+
+        if self.spill is not None:
+            for key, blob in evicted:
+                self.spill.set_bytes(key, blob)
+        return sum(len(blob) for _, blob in evicted)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+
+class DiskCache(ResultCache):
+    """
+    A cache backed by a sqlite file, shared by every process on the host that opens the same path, e.g. all gunicorn
+    workers of one app. Placing the file under /dev/shm keeps it in shared memory instead of on disk.
+    Reads record their access time in memory, written to the database in batches, so that a hit costs a single
+    SELECT. The total size of the stored values is kept in the database alongside them, so writes don't sum all sizes.
+    Inputs:
+        path = file path of the sqlite database; created if it does not exist
+        max_bytes = maximal total size in bytes of stored values
+        access_batch = number of reads whose access times are written to the database together
+    """
+    def __init__(self, path, max_bytes=2**30, access_batch=64):
+        super().__init__(max_bytes=max_bytes)
+        self.path = path
+        self.access_batch = access_batch
+        self.local = threading.local()
+        # Access times of entries read since the last write of access times, by key
+        self.accesses = {}
+        self.accesses_lock = threading.Lock()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self.connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries "
+                "(key TEXT PRIMARY KEY, value BLOB, size INTEGER, last_access REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)")
+            conn.execute("CREATE TABLE IF NOT EXISTS totals (id INTEGER PRIMARY KEY CHECK (id = 0), size INTEGER)")
+            # Databases written before totals were kept get theirs summed once
+            conn.execute("INSERT OR IGNORE INTO totals (id, size) SELECT 0, COALESCE(SUM(size), 0) FROM entries")
+
+    def connection(self):
+        # sqlite connections can't be shared between threads, so keep one per thread (and per forked process)
+        conn = getattr(self.local, 'conn', None)
+        if conn is None or self.local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.conn = conn
+            self.local.pid = os.getpid()
+        return conn
+
+    def get_bytes(self, key):
+        conn = self.connection()
+        row = conn.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        with self.accesses_lock:
+            self.accesses[key] = time.time()
+            full = len(self.accesses) >= self.access_batch
+        if full:
+            with conn:
+                self.write_accesses(conn)
+        return row[0]
+
+    def write_accesses(self, conn):
+        """
+        Writes the access times of the entries read since the last call, within the transaction of conn.
+        """
+        with self.accesses_lock:
+            accesses, self.accesses = self.accesses, {}
+        conn.executemany("UPDATE entries SET last_access = ? WHERE key = ?", [(t, k) for k, t in accesses.items()])
+
+    def set_bytes(self, key, blob):
+        conn = self.connection()
+        with conn:
+            row = conn.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, last_access) VALUES (?, ?, ?, ?)",
+                (key, sqlite3.Binary(blob), len(blob), time.time())
+            )
+            conn.execute("UPDATE totals SET size = size + ? WHERE id = 0", (len(blob) - (row[0] if row else 0),))
+            self.evict(conn)
+
+    def evict(self, conn):
+        total = conn.execute("SELECT size FROM totals WHERE id = 0").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        # Walk entries oldest first, dropping them until back under budget, once recent reads are recorded
+        self.write_accesses(conn)
+        to_delete = []
+        freed = 0
+        for key, size in conn.execute("SELECT key, size FROM entries ORDER BY last_access"):
+            if total - freed <= self.max_bytes:
+                break
+            to_delete.append((key,))
+            freed += size
+        conn.executemany("DELETE FROM entries WHERE key = ?", to_delete)
+        conn.execute("UPDATE totals SET size = size - ? WHERE id = 0", (freed,))
+
+    @property
+    def size(self):
+        """
+        Total size in bytes of the stored values.
+        """
+        return self.connection().execute("SELECT size FROM totals WHERE id = 0").fetchone()[0]
+
+    def clear(self):
+        conn = self.connection()
+        with conn:
+            conn.execute("DELETE FROM entries")
+            conn.execute("UPDATE totals SET size = 0 WHERE id = 0")
+        with self.accesses_lock:
+            self.accesses = {}
@@ -1,5 +1,16 @@
+import hashlib
+import os
+import threading
+import weakref
+
+import numpy as np
 import pandas as pd
 
+from ._partitions import PartitionedSource
+from ._rowview import RowView
+from ._sidecar import CsvSidecar
+from ._streamsource import StreamSource
+
 
 class DataManager:
     """
@@ -7,26 +18,64 @@ class DataManager:
     by DynamicPanel objects. The possible types of data_source are:
         - pandas DataFrame (loaded in memory)
         - file path ending in .csv or .tsv (to be loaded into a DataFrame)
+        - a directory or glob pattern of CSV/TSV/Parquet files partitioned hive-style, or a PartitionedSource; files are
+        only read as filters on partition columns select them (see DynamicPanel.source_rows), and df only holds the
+        columns
+        - a StreamSource (e.g. GeneratorSource, QueueSource, FileTailSource) for live data, held in a bounded buffer
         - a list with first element a PlotPanel and second element a string with value either hoverData, clickData, or
         selectedData to be used for data generated from interacting with given PlotPanel.
+    Inputs:
+        data_source = one of the above
+        dtype_backend = 'pyarrow' to hold DataFrames and files in Arrow-backed dtypes, which store strings far more
+        compactly than NumPy object columns; None to keep the default NumPy dtypes
+        pyramid = optional TimePyramid summarizing DataFrames and files as a time series at several resolutions, built
+        when the data is loaded
+        sidecar = for .csv and .tsv files, True to keep a columnar copy of the file next to it, or the path of a directory
+        to keep it in, memory-mapped by later loads instead of parsing the file (see CsvSidecar); requires pyarrow
     """
-    def __init__(self, data_source=""):
+    # Encodings of columns (category codes, sort orders, ...) and Arrow-backed copies of DataFrames, computed once per
+    # data source and shared by all DataManagers
+    encodings = {}
+    encodings_lock = threading.Lock()
+
+    def __init__(self, data_source="", dtype_backend=None, pyramid=None, sidecar=None):
         self.data_source = data_source
+        self.dtype_backend = dtype_backend
+        self.pyramid = pyramid
+        self.sidecar = None
         self.source_type = None
         self.df = pd.DataFrame()
+        self._data_version = None
+        # Number of times the loaded data was replaced by a downcast copy, see downcast
+        self.revision = 0
+        # Guards the loaded data, its revision and data version, so that a version is never computed from one frame and
+        # another's revision
+        self.lock = threading.RLock()
 
         if isinstance(data_source, pd.DataFrame):
             self.source_type = "DataFrame"
 
+        elif isinstance(data_source, PartitionedSource):
+            self.source_type = "partitioned"
+
         elif isinstance(data_source, str):
             extension = data_source.split('.')[-1]
             if extension == 'tsv':
                 self.source_type = "tsv"
             elif extension == 'csv':
                 self.source_type = "csv"
+            elif PartitionedSource.is_pattern(data_source):
+                self.source_type = "partitioned"
+                self.data_source = PartitionedSource(data_source)
             else:
                 self.source_type = "tab"  # All other strings interpreted as use tab data
 
+            if sidecar and self.source_type in ["csv", "tsv"]:
+                self.sidecar = CsvSidecar(data_source, directory=None if sidecar is True else sidecar)
+
+        elif isinstance(data_source, StreamSource):
+            self.source_type = "stream"
+
         elif isinstance(data_source, list):
             # Must have first entry a PlotPanel, and second entry string (one of: hoverData, clickData, selectedData)
             self.source_type = "PlotPanel"
@@ -38,14 +87,25 @@ class DataManager:
         """
         Loads data into df attribute depending on type.
         """
+        self._data_version = None
+
         if self.source_type == "DataFrame":
             self.df = self.data_source
+            if self.dtype_backend is not None:
+                # Share one converted copy between all DataManagers of the DataFrame
+                convert = lambda: self.data_source.convert_dtypes(dtype_backend=self.dtype_backend)
+                self.df = self.encoding('frame', self.dtype_backend, convert)
+
+        elif self.source_type in ["csv", "tsv"]:
+            self.df = self.read_csv()
 
-        elif self.source_type == "tsv":
-            self.df = pd.read_csv(self.data_source, sep='\t')
+        elif self.source_type == "partitioned":
+            self.data_source.discover()
+            self.df = self.data_source.schema(self.dtype_backend)
 
-        elif self.source_type == "csv":
-            self.df = pd.read_csv(self.data_source)
+        elif self.source_type == "stream":
+            self.data_source.poll()
+            self.df, _ = self.data_source.snapshot()
 
         elif self.source_type == "PlotPanel":
             # Init as empty df w/ same cols
@@ -54,6 +114,367 @@ class DataManager:
         else:
             self.df = pd.DataFrame()
 
+        if self.pyramid is not None:
+            self.pyramid_levels()
+
+    @property
+    def data_version(self):
+        """
+        A string identifying the loaded data, equal across processes loading the same data, for use in cache keys.
+        Files are identified by path, size and modification time, and DataFrames by a hash of their contents, followed
+        by the revision of downcast data. Sources depending on interaction with other panels, and DataFrames holding
+        unhashable values such as lists, have no version and should not be cached.
+        """
+        with self.lock:
+            if self._data_version is None:
+                if self.source_type in ["csv", "tsv"]:
+                    stat = os.stat(self.data_source)
+                    self._data_version = f"{os.path.abspath(self.data_source)}:{stat.st_size}:{stat.st_mtime_ns}"
+                elif self.source_type == "partitioned":
+                    self._data_version = self.data_source.version
+                elif self.source_type == "DataFrame":
+                    try:
+                        hashes = pd.util.hash_pandas_object(self.df, index=True).values
+                    except TypeError:
+                        return None
+                    digest = hashlib.sha256(hashes.tobytes() + str(list(self.df.columns)).encode()).hexdigest()
+                    self._data_version = f"DataFrame:{digest}"
+                if self._data_version is not None and self.revision > 0:
+                    self._data_version += f":r{self.revision}"
+            return self._data_version
+
+    def source_key(self):
+        """
+        Returns a key that is equal for DataManagers holding the same data, e.g. panels built on the same DataFrame
+        or file.
+        """
+        if self.source_type in ["csv", "tsv", "partitioned"]:
+            return self.data_version
+        return id(self.df)
+
+    def read_csv(self, usecols=None):
+        if self.sidecar is not None:
+            return self.sidecar.read(usecols, self.dtype_backend)
+        sep = '\t' if self.source_type == "tsv" else ','
+        if self.dtype_backend == "pyarrow":
+            return pd.read_csv(self.data_source, sep=sep, usecols=usecols, engine='pyarrow', dtype_backend='pyarrow')
+        return pd.read_csv(self.data_source, sep=sep, usecols=usecols)
+
+    def partition_rows(self, selected):
+        """
+        Returns the rows of a partitioned source whose partition values are in the given dict, mapping partition columns
+        to sets of values to keep.
+        """
+        return self.partitions().read(self.data_source.select(selected), self.dtype_backend)
+
+    def partitions(self):
+        """
+        Returns the PartitionedSource of the data, listing its files first if not loaded yet, e.g. for plugins reading
+        the values of a column.
+        """
+        if self.data_source.version is None:
+            self.data_source.discover()
+        return self.data_source
+
+    def column(self, col):
+        """
+        Returns the given column of the data source, reading only that column from files not loaded yet.
+        """
+        if self.source_type == "partitioned":
+            return self.partition_rows({})[col]
+        if col in self.df.columns:
+            return self.df[col]
+        if self.source_type == "DataFrame":
+            return self.data_source[col]
+        if self.source_type in ["csv", "tsv"]:
+            return self.read_csv(usecols=[col])[col]
+        raise KeyError(col)
+
+    def encoding(self, kind, col, build):
+        """
+        Returns the encoding of the given kind of a column of the data source, calling build to compute it if needed.
+        Encodings are shared by all DataManagers of the same DataFrame or file. Returns None for sources which change
+        over time.
+        """
+        key = self.encoding_key()
+        if key is None:
+            return None
+
+        with DataManager.encodings_lock:
+            if key not in DataManager.encodings:
+                DataManager.encodings[key] = {}
+                if self.source_type == "DataFrame":
+                    # Entries are keyed by id, so drop them before the id can be reused by another DataFrame
+                    weakref.finalize(self.data_source, DataManager.encodings.pop, key, None)
+            encodings = DataManager.encodings[key]
+
+            if (kind, col) not in encodings:
+                encodings[(kind, col)] = build()
+            return encodings[(kind, col)]
+
+    def encoding_key(self):
+        """
+        Returns the key of the encodings of the data source in DataManager.encodings, or None for sources which change
+        over time.
+        """
+        if self.source_type in ["csv", "tsv"]:
+            return self.data_version
+        if self.source_type == "DataFrame":
+            # Other DataManagers of the DataFrame may not hold the downcast copy
+            return id(self.data_source) if self.revision == 0 else (id(self.data_source), self.revision)
+        return None
+
+    def invalidate(self):
+        """
+        Forgets the data version and encodings computed from the loaded data, after it was modified in place.
+        """
+        with self.lock:
+            key = self.encoding_key()
+            self._data_version = None
+        with DataManager.encodings_lock:
+            DataManager.encodings.pop(key, None)
+
+    def downcast(self, sharing=()):
+        """
+        Replaces the loaded data with a copy whose NumPy numeric columns are downcast to save memory: int64 columns to
+        the smallest integer type holding their values, and float64 columns to float32, which keeps about 7 significant
+        digits. The other columns are shared with the loaded data rather than copied. The data version changes, so
+        results cached for the previous values aren't reused. DataFrames passed as data source are left alone, as their
+        caller still holds them, so a copy would only take more memory. Returns the number of bytes freed.
+        Inputs:
+            sharing = other DataManagers holding the same loaded data, switched to the downcast copy too
+        """
+        if self.df is self.data_source:
+            return 0
+
+        df = self.df.copy(deep=False)
+        freed = 0
+        for i, dtype in enumerate(df.dtypes):
+            column = df.iloc[:, i]
+            if dtype == np.int64:
+                smaller = pd.to_numeric(column, downcast='integer')
+            elif dtype == np.float64:
+                smaller = column.astype(np.float32)
+            else:
+                continue
+            freed += column.memory_usage(index=False) - smaller.memory_usage(index=False)
+            df.isetitem(i, smaller)
+
+        if freed > 0:
+            for dm in [self, *sharing]:
+                with dm.lock:
+                    stale = dm.encoding_key()
+                    dm.df = df
+                    dm.revision += 1
+                    dm._data_version = None
+                with DataManager.encodings_lock:
+                    DataManager.encodings.pop(stale, None)
+        return int(freed)
+
+    def categories(self, col):
+        """
+        Returns a tuple (codes, categories) encoding the given column of the data source: categories is the sorted Index
+        of its distinct values, and codes the position in categories of each row's value (-1 for missing values).
+        """
+        def build():
+            codes, categories = pd.factorize(self.column(col), sort=True)
+            # Store codes in the smallest integer type able to hold them
+            dtype = np.min_scalar_type(-len(categories) - 1)
+            return codes.astype(dtype), pd.Index(categories)
+
+        return self.encoding('categories', col, build)
+
+    def sorted_order(self, col):
+        """
+        Returns a tuple (order, values) for a numeric column of the data source, where order holds the row positions
+        sorting the column and values the sorted values (missing values last), or None for non-numeric columns.
+        """
+        def build():
+            column = self.column(col)
+            if not pd.api.types.is_numeric_dtype(column.dtype) or pd.api.types.is_bool_dtype(column.dtype):
+                return None
+            # Nullable and Arrow-backed columns with missing values become floats, with NaN sorting last
+            values = column.to_numpy(dtype='float64', na_value=np.nan) if column.hasnans else column.to_numpy()
+            order = np.argsort(values)
+            return order, values[order]
+
+        return self.encoding('sorted_order', col, build)
+
+    def category_counts(self, col):
+        """
+        Returns an array holding the number of rows with missing values in the given column, followed by the number of
+        rows taking each of its categories, or None for sources which change over time.
+        """
+        encoding = self.categories(col)
+        if encoding is None:
+            return None
+        codes, categories = encoding
+        return self.encoding('category_counts', col,
+                             lambda: np.bincount(codes.astype(np.int64) + 1, minlength=len(categories) + 1))
+
+    def isin_fraction(self, col, values):
+        """
+        Returns the fraction of rows of the data source whose value in col is one of values, counted from the column's
+        categories, or None if the column isn't loaded or the source changes over time.
+        """
+        counts = self.category_counts(col) if col in self.df.columns else None
+        if counts is None or len(self.df) == 0:
+            return None
+        indices = self.categories(col)[1].get_indexer([v for v in values if not pd.isna(v)])
+        kept = counts[indices[indices != -1] + 1].sum()
+        if any(pd.isna(v) for v in values):
+            kept += counts[0]
+        return kept / len(self.df)
+
+    def range_fraction(self, col, low, high):
+        """
+        Returns the fraction of rows of the data source whose value in col lies between low and high inclusive, found by
+        binary search in the column's sorted order, or None if the column isn't loaded and numeric or the source
+        changes over time.
+        """
+        encoding = self.sorted_order(col) if col in self.df.columns else None
+        if encoding is None or len(self.df) == 0:
+            return None
+        values = encoding[1]
+        kept = np.searchsorted(values, high, side='right') - np.searchsorted(values, low, side='left')
+        return max(kept, 0) / len(self.df)
+
+    def pyramid_levels(self):
+        """
+        Returns the levels of the pyramid summarizing the loaded data (see TimePyramid.build), computed once per data
+        source and pyramid settings, or None without a pyramid or for sources which change over time.
+        """
+        if self.pyramid is None:
+            return None
+        return self.encoding('pyramid', repr(self.pyramid), lambda: self.pyramid.build(self.df))
+
+    def column_values(self, col):
+        """
+        Returns the sorted list of distinct values of the given column, e.g. for populating a plugin's options.
+        """
+        # Values of partition columns are known from the files' paths
+        if self.source_type == "partitioned" and col in self.partitions().columns:
+            return list(self.data_source.values[col])
+        encoding = self.categories(col)
+        if encoding is None:
+            return sorted(self.column(col).dropna().unique().tolist())
+        return encoding[1].tolist()
+
+    def isin_mask(self, rows, col, values):
+        """
+        Returns a boolean array for the rows whose value in col is one of values, where rows is a DataFrame or RowView
+        holding a subset of the rows of the data source. The check is done on the integer codes of the column's
+        categories rather than on its values when possible, which is much faster for string columns, unless the values
+        of rows may differ from those of the source (see mark_modified).
+        """
+        # Only rows located in the loaded data hold its values, so can use its encodings
+        located, positions = self.locate(rows) if col in rows.columns else (False, None)
+        encoding = self.categories(col) if located else None
+        if encoding is None:
+            return rows[col].isin(values).to_numpy()
+
+        codes, categories = encoding
+        if positions is not None:
+            codes = codes[positions]
+
+        # Look up codes in a table of wanted categories, whose extra last slot is indexed by the -1 of missing values
+        wanted = np.zeros(len(categories) + 1, dtype=bool)
+        indices = categories.get_indexer([v for v in values if not pd.isna(v)])
+        wanted[indices[indices != -1]] = True
+        wanted[-1] = any(pd.isna(v) for v in values)
+        return wanted[codes]
+
+    def range_filter(self, rows, col, low, high):
+        """
+        Returns the rows whose value in col lies between low and high inclusive, where rows is a DataFrame or RowView
+        holding a subset of the rows of the data source, as a DataFrame or RowView respectively. The rows in range are
+        found by binary search in the column's sorted order, instead of comparing every value; other subsets (e.g.
+        already filtered by another range) are then checked against them by position. Rows whose values may differ
+        from those of the source (see mark_modified) are compared value by value.
+        """
+        located, positions = self.locate(rows) if col in rows.columns else (False, None)
+        encoding = self.sorted_order(col) if located else None
+        if encoding is None:
+            return rows[((rows[col] >= low) & (rows[col] <= high)).to_numpy()]
+
+        order, values = encoding
+        in_range = order[np.searchsorted(values, low, side='left'):np.searchsorted(values, high, side='right')]
+        if positions is None and len(in_range) < len(self.df) // 8:
+            # Narrow ranges are cheapest to take by position, skipping full-length masks altogether
+            in_range = np.sort(in_range)
+            return RowView(self.df, in_range) if isinstance(rows, RowView) else self.df.iloc[in_range]
+
+        selected = np.zeros(len(self.df), dtype=bool)
+        selected[in_range] = True
+        return rows[selected if positions is None else selected[positions]]
+
+    def locate(self, rows):
+        """
+        Returns a tuple (located, positions) locating the given DataFrame or RowView in the loaded data: located is
+        False if some rows can't be found, and positions is None when rows are all the loaded rows, in order.
+        """
+        if isinstance(rows, RowView):
+            located, positions = self.locate(rows.frame)
+            if not located or rows.positions is None:
+                return located, positions
+            return True, rows.positions if positions is None else positions[rows.positions]
+        if rows is self.df:
+            return True, None
+        # Rows of partitioned sources are read from their files for each selection, rather than loaded
+        if self.source_type == "partitioned":
+            return False, None
+        # Summaries of the data (see TimePyramid) hold other rows than the data source, whatever their index, and
+        # frames transformed by plugins modifying values hold other values, see mark_modified
+        if 'pyramid_level' in rows.attrs or rows.attrs.get('modified_data', False):
+            return False, None
+        positions = self.positions(rows)
+        return positions is not None, positions
+
+    @staticmethod
+    def mark_modified(rows):
+        """
+        Returns the given DataFrame or RowView as a DataFrame marked as holding values changed from those of the data
+        source, e.g. by a plugin with `modifies_data`, so that later filters don't use the encodings and sort orders of
+        the source's columns on it. The mark is kept by frames selected from it.
+        """
+        df = RowView.materialize(rows)
+        if not df.attrs.get('modified_data', False):
+            # Mark a shallow copy, as the plugin may have returned the frame it was given, e.g. the data source
+            df = df.copy(deep=False)
+            df.attrs['modified_data'] = True
+        return df
+
+    def positions(self, df):
+        """
+        Returns the positions in the loaded data of the rows of df, located by index label, or None if some rows can't
+        be located.
+        """
+        index = self.df.index
+        if isinstance(index, pd.RangeIndex) and pd.api.types.is_integer_dtype(df.index.dtype):
+            # Labels of a RangeIndex map to positions arithmetically, without building a hash table
+            positions = df.index.to_numpy() - index.start
+            if index.step != 1:
+                if (positions % index.step != 0).any():
+                    return None
+                positions = positions // index.step
+            if len(positions) > 0 and (positions.min() < 0 or positions.max() >= len(index)):
+                return None
+            return positions
+
+        if not index.is_unique:
+            return None
+        positions = index.get_indexer(df.index)
+        return positions if (positions != -1).all() else None
+
+    def select(self, data):
+        """
+        Returns the rows of the linked PlotPanel's data chosen through interaction, given by its hoverData, clickData
+        or selectedData. The linked data is only read, so concurrent sessions with different selections don't affect
+        each other.
+        """
+        target_data = self.data_source[0].data_manager.df
+        return target_data.loc[self.get_interactive_indices(data), :]
+
     def get_interactive_indices(self, data):
         """
         Get list of indices of data chosen through interaction with plot.
@@ -0,0 +1,152 @@
+import base64
+
+import numpy as np
+import plotly.graph_objs as go
+
+
+class FigureSlimmer:
+    """
+    Post-processes figures output by plotters so that large ones are cheaper to serialize and render in the browser.
+    Once a figure has more than webgl_threshold points its scatter traces are drawn with WebGL, numeric arrays are sent
+    as typed-array binary instead of JSON lists, and per-point text hidden behind a hovertemplate is dropped. Smaller
+    figures pass through unchanged, apart from rounding when float_precision is set.
+    Inputs:
+        webgl_threshold = number of points in a figure above which scatter traces are switched to scattergl
+        binary_threshold = minimal length of numeric arrays to encode as typed-array binary (base64 dtype form)
+        text_threshold = number of points in a figure above which redundant per-point text is stripped
+        float_precision = number of decimals to round float arrays to; None to keep full precision
+        downcast_floats = when True, binary encode floats as float32 instead of float64
+    """
+    # Trace attributes holding per-point numeric arrays, as paths into the trace dictionary
+    ARRAY_PATHS = [('x',), ('y',), ('z',), ('customdata',), ('marker', 'size'), ('marker', 'color')]
+
+    def __init__(self, webgl_threshold=50000, binary_threshold=1000, text_threshold=50000, float_precision=None,
+                 downcast_floats=False):
+        self.webgl_threshold = webgl_threshold
+        self.binary_threshold = binary_threshold
+        self.text_threshold = text_threshold
+        self.float_precision = float_precision
+        self.downcast_floats = downcast_floats
+        self.scattergl_props = set(go.Scattergl()._valid_props)
+
+    def __repr__(self):
+        return (f"FigureSlimmer(webgl_threshold={self.webgl_threshold}, binary_threshold={self.binary_threshold}, "
+                f"text_threshold={self.text_threshold}, float_precision={self.float_precision}, "
+                f"downcast_floats={self.downcast_floats})")
+
+    def __call__(self, fig):
+        """
+        Returns a slimmed down copy of the figure, as a dictionary.
+        """
+        fig = fig.to_plotly_json() if hasattr(fig, 'to_plotly_json') else dict(fig)
+        traces = [dict(trace) for trace in fig.get('data', [])]
+        n_points = sum(self.count_points(trace) for trace in traces)
+
+        for i, trace in enumerate(traces):
+            if n_points > self.webgl_threshold:
+                trace = self.to_webgl(trace)
+            if n_points > self.text_threshold:
+                trace = self.strip_text(trace)
+            traces[i] = self.encode_arrays(trace)
+
+        return dict(fig, data=traces)
+
+    def count_points(self, trace):
+        for key in ['x', 'y', 'z']:
+            values = trace.get(key)
+            if values is not None:
+                return len(self.to_array(values))
+        return 0
+
+    def to_webgl(self, trace):
+        # Stacked and filled-between traces render differently with WebGL, so leave them alone
+        if trace.get('type', 'scatter') != 'scatter' or trace.get('stackgroup') is not None:
+            return trace
+        trace = {k: v for k, v in trace.items() if k in self.scattergl_props}
+        trace['type'] = 'scattergl'
+        return trace
+
+    @staticmethod
+    def strip_text(trace):
+        """
+        Removes per-point text arrays which are never displayed: text when the trace mode doesn't show text and the
+        hovertemplate doesn't use it, and hovertext when the hovertemplate doesn't use it. Text arrays holding only one
+        distinct value are collapsed to that value.
+        """
+        template = trace.get('hovertemplate')
+        template = template if isinstance(template, str) else None
+        for key in ['text', 'hovertext']:
+            values = trace.get(key)
+            if values is None or isinstance(values, str):
+                continue
+
+            shown = key == 'text' and 'text' in str(trace.get('mode', ''))
+            if template is not None and not shown and f"%{{{key}}}" not in template:
+                del trace[key]
+                continue
+
+            values = np.asarray(values, dtype=object)
+            if len(values) > 0 and (values == values[0]).all():
+                trace[key] = values[0]
+        return trace
+
+    def encode_arrays(self, trace):
+        for path in self.ARRAY_PATHS:
+            parent = trace
+            for key in path[:-1]:
+                parent = parent.get(key) if isinstance(parent.get(key), dict) else None
+                if parent is None:
+                    break
+            if parent is None or parent.get(path[-1]) is None or isinstance(parent[path[-1]], str):
+                continue
+
+            encoded = self.encode(parent[path[-1]])
+            if encoded is not None:
+                if parent is not trace:
+                    # Copy nested dicts before changing them, as they may be shared with the original figure
+                    parent = dict(parent)
+                    trace[path[0]] = parent
+                parent[path[-1]] = encoded
+        return trace
+
+    def encode(self, values):
+        """
+        Returns the numeric array rounded, and in typed-array binary form if long enough, or None to leave the values
+        as they are.
+        """
+        array = self.to_array(values)
+        if array.dtype.kind not in 'iuf' or array.size == 0:
+            return None
+
+        if array.dtype.kind == 'f':
+            if self.float_precision is not None:
+                array = np.round(array, self.float_precision)
+        else:
+            # Use the smallest integer type holding all values, as plotly.js has no 64 bit integer arrays
+            for dtype in (['u1', 'u2', 'u4'] if array.min() >= 0 else ['i1', 'i2', 'i4']):
+                if array.min() >= np.iinfo(dtype).min and array.max() <= np.iinfo(dtype).max:
+                    array = array.astype(dtype)
+                    break
+            else:
+                array = array.astype('f8')
+
+        if array.size < self.binary_threshold:
+            return array.tolist()
+
+        if array.dtype.kind == 'f':
+            array = array.astype('f4' if self.downcast_floats else 'f8')
+
+        dtype = array.dtype.str[1:]
+        encoded = {'dtype': dtype, 'bdata': base64.b64encode(np.ascontiguousarray(array).tobytes()).decode()}
+        if array.ndim > 1:
+            encoded['shape'] = ','.join(str(n) for n in array.shape)
+        return encoded
+
+    @staticmethod
+    def to_array(values):
+        if isinstance(values, dict) and 'bdata' in values:
+            array = np.frombuffer(base64.b64decode(values['bdata']), dtype=values['dtype'])
+            if 'shape' in values:
+                array = array.reshape([int(n) for n in str(values['shape']).split(',')])
+            return array
+        return np.asarray(values)
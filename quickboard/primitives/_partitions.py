@@ -0,0 +1,138 @@
+import glob
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from ._cache import MemoryCache, make_cache_key
+
+
+class PartitionedSource:
+    """
+    A data source split over many CSV, TSV or Parquet files in a hive-style directory layout, e.g.
+    `runs/day=2024-05-01/sample=A/metrics.tsv`, where each `col=value` directory in a file's path gives the value of the
+    partition column col for all of the file's rows. DataManagers only read the files of the partitions selected by
+    sidebar filters on partition columns, several at a time, and keep recently read files in a cache. Partition columns
+    are added to the rows as categoricals of all their values, which are numbers if they all parse as such.
+    Inputs:
+        path = directory holding the files (searched recursively), or a glob pattern matching them, e.g.
+        "runs/day=*/sample=*/metrics.tsv"
+        max_workers = maximal number of files read at once
+        cache = ResultCache holding recently read files, e.g. a DiskCache shared by all workers of a host; a MemoryCache
+        of 256 MiB by default
+    """
+    EXTENSIONS = ('.csv', '.tsv', '.parquet')
+
+    def __init__(self, path, max_workers=8, cache=None):
+        self.path = path
+        self.max_workers = max_workers
+        self.cache = cache if cache is not None else MemoryCache()
+        self.files = []
+        self.columns = []
+        self.values = {}
+        self.version = None
+
+    @staticmethod
+    def is_pattern(path):
+        """
+        Returns whether a string data_source should be read as a PartitionedSource: a directory path ending with a
+        slash, e.g. "runs/". Glob patterns, and directories given without the slash, need a PartitionedSource.
+        """
+        return path.endswith(('/', os.sep))
+
+    def discover(self):
+        """
+        Lists the files of the source with their partition values, and computes the version identifying their contents.
+        """
+        if os.path.isdir(self.path):
+            paths = [
+                os.path.join(root, name) for root, dirs, names in os.walk(self.path) for name in names
+                if name.endswith(self.EXTENSIONS)
+            ]
+            root = self.path
+        else:
+            paths = [p for p in glob.glob(self.path, recursive=True) if p.endswith(self.EXTENSIONS)]
+            root = None
+
+        files = []
+        columns = []
+        for path in sorted(paths):
+            segments = os.path.relpath(path, root).split(os.sep)[:-1] if root is not None else path.split(os.sep)[:-1]
+            partition = dict(s.split('=', 1) for s in segments if '=' in s)
+            columns += [c for c in partition if c not in columns]
+            stat = os.stat(path)
+            files.append((path, partition, stat.st_size, stat.st_mtime_ns))
+
+        parsed = {c: self.parse_values({f[1][c] for f in files if c in f[1]}) for c in columns}
+        self.values = {c: values for c, (values, _) in parsed.items()}
+        self.files = [(path, {c: parsed[c][1][v] for c, v in partition.items()}, size, mtime)
+                      for path, partition, size, mtime in files]
+        self.columns = columns
+        stamps = repr([(path, size, mtime) for path, _, size, mtime in self.files])
+        self.version = f"partitioned:{os.path.abspath(self.path)}:{hashlib.sha256(stamps.encode()).hexdigest()}"
+
+    @staticmethod
+    def parse_values(strings):
+        """
+        Returns a tuple (values, parsed) for the distinct strings of a partition column: the sorted list of its values,
+        as numbers if they all parse as such, and a dict mapping each string to its value.
+        """
+        for parse in [int, float]:
+            try:
+                parsed = {s: parse(s) for s in strings}
+                break
+            except ValueError:
+                continue
+        else:
+            parsed = {s: s for s in strings}
+        return sorted(parsed.values()), parsed
+
+    def select(self, selected):
+        """
+        Returns the files whose partition values are in the given dict, mapping partition columns to sets of values to
+        keep. Files without a value for a selected column are kept.
+        """
+        return [
+            f for f in self.files
+            if all(c not in f[1] or f[1][c] in values for c, values in selected.items())
+        ]
+
+    def read(self, files, dtype_backend=None):
+        """
+        Returns the rows of the given files concatenated in order, with their partition columns.
+        """
+        if len(files) == 0:
+            return self.schema(dtype_backend)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            frames = list(executor.map(lambda f: self.read_file(f, dtype_backend), files))
+        return pd.concat(frames, ignore_index=True)
+
+    def read_file(self, file, dtype_backend=None):
+        path, partition, size, mtime = file
+        key = make_cache_key('partition', os.path.abspath(path), size, mtime, dtype_backend)
+        df = self.cache.get(key)
+        if df is None:
+            if path.endswith('.parquet'):
+                df = pd.read_parquet(path, dtype_backend=dtype_backend) if dtype_backend else pd.read_parquet(path)
+            else:
+                sep = '\t' if path.endswith('.tsv') else ','
+                if dtype_backend == "pyarrow":
+                    df = pd.read_csv(path, sep=sep, engine='pyarrow', dtype_backend='pyarrow')
+                else:
+                    df = pd.read_csv(path, sep=sep)
+            self.cache.set(key, df)
+
+        for col in self.columns:
+            code = self.values[col].index(partition[col]) if col in partition else -1
+            df[col] = pd.Categorical.from_codes(np.full(len(df), code), categories=self.values[col])
+        return df
+
+    def schema(self, dtype_backend=None):
+        """
+        Returns an empty frame with the columns of the source, taken from its first file.
+        """
+        if len(self.files) == 0:
+            return pd.DataFrame(columns=self.columns)
+        return self.read_file(self.files[0], dtype_backend).iloc[:0]
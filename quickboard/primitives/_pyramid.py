@@ -0,0 +1,166 @@
+import numpy as np
+import pandas as pd
+
+
+class TimePyramid:
+    """
+    Summarizes a long time series at several resolutions, so that PlotPanels over ranges of any length plot a bounded
+    number of points. When the data is loaded, time is split into buckets at each level, each level's buckets being
+    `factor` times wider than the previous one's, and every bucket keeps the min, max and mean of the value columns over
+    its rows (per series, given `by`). A figure is then plotted from the finest level with at most about `max_points`
+    buckets per series in the range shown, or from the rows themselves for narrow ranges.
+    Summary frames have the time column (the mean time of the bucket's rows), the `by` columns, the value columns (their
+    mean), `<col>_min` and `<col>_max` for each value column, and `rows`, the number of rows summarized. Plotters of
+    the panel should only use these columns.
+    Inputs:
+        time_col = numeric or datetime column the series is ordered by
+        value_cols = numeric columns to summarize; None for all numeric columns other than time_col and by
+        by = list of columns identifying separate series, e.g. a sensor id, kept as they are in summaries
+        max_points = maximal number of buckets plotted per series, e.g. about the plot's width in pixels
+        factor = ratio between the bucket widths of consecutive levels
+        range_input = name of a plot input holding the [start, end] range to show, e.g. set by a PlotInputRangeSlider;
+        the range is otherwise the one selected by the filters on time_col
+    """
+    def __init__(self, time_col, value_cols=None, by=[], max_points=2000, factor=4, range_input='range_x'):
+        self.time_col = time_col
+        self.value_cols = value_cols
+        self.by = list(by)
+        self.max_points = max_points
+        self.factor = factor
+        self.range_input = range_input
+
+    def __repr__(self):
+        return (f"TimePyramid(time_col={self.time_col!r}, value_cols={self.value_cols!r}, by={self.by!r}, "
+                f"max_points={self.max_points}, factor={self.factor}, range_input={self.range_input!r})")
+
+    def summarizes(self, plugin, control_attributes):
+        """
+        Returns whether a control plugin gives the same result on summary frames as on the rows, i.e. it only selects
+        by time or series, or leaves the rows alone.
+        """
+        col = control_attributes.get('data_col', self.time_col)
+        return not plugin.modifies_data and col in [self.time_col] + self.by
+
+    def build(self, df):
+        """
+        Returns the levels summarizing df, finest first, as a list of (bucket_width, frame) pairs with widths in units
+        of time_col (nanoseconds for datetimes), or an empty list if df is too short to need summarizing.
+        """
+        n_levels = 0
+        while len(df) > self.max_points * self.factor ** (n_levels + 1):
+            n_levels += 1
+        times = self.to_numbers(df[self.time_col])
+        if n_levels == 0 or np.isnan(times).all():
+            return []
+        start = np.nanmin(times)
+        width = (np.nanmax(times) - start) / (self.max_points * self.factor ** (n_levels - 1))
+        if width == 0:
+            return []
+
+        value_cols = self.value_cols
+        if value_cols is None:
+            value_cols = [
+                c for c in df.columns if c != self.time_col and c not in self.by
+                and pd.api.types.is_numeric_dtype(df[c].dtype) and not pd.api.types.is_bool_dtype(df[c].dtype)
+            ]
+        keys = self.by + ['_bucket']
+
+        # Sums and counts of the finest level, from which coarser levels are summed up and means computed
+        rows = pd.DataFrame({c: df[c] for c in self.by})
+        rows['_bucket'] = np.floor((times - start) / width)
+        rows['_time'] = times - start
+        for col in value_cols:
+            rows[col] = df[col].to_numpy(dtype='float64', na_value=np.nan)
+        aggregations = {'rows': ('_time', 'count'), '_time': ('_time', 'sum')}
+        for col in value_cols:
+            aggregations |= {f'{col}_min': (col, 'min'), f'{col}_max': (col, 'max'), f'{col}_sum': (col, 'sum'),
+                             f'{col}_count': (col, 'count')}
+        sums = rows.dropna(subset=['_bucket']).groupby(keys, observed=True, dropna=False).agg(**aggregations)
+
+        totals = {'rows': 'sum', '_time': 'sum'}
+        for col in value_cols:
+            totals |= {f'{col}_min': 'min', f'{col}_max': 'max', f'{col}_sum': 'sum', f'{col}_count': 'sum'}
+        levels = []
+        for level in range(n_levels):
+            if level > 0:
+                sums = sums.reset_index()
+                sums['_bucket'] = sums['_bucket'] // self.factor
+                sums = sums.groupby(keys, observed=True, dropna=False).agg(totals)
+            levels.append((width * self.factor ** level, self.summary(sums, df, value_cols, start, level)))
+        return levels
+
+    def summary(self, sums, df, value_cols, start, level):
+        """
+        Returns the summary frame of a level from its sums, sorted by time.
+        """
+        sums = sums.reset_index()
+        frame = pd.DataFrame({c: sums[c] for c in self.by})
+        times = start + sums['_time'].to_numpy() / sums['rows'].to_numpy()
+        frame[self.time_col] = self.from_numbers(times, df[self.time_col].dtype)
+        for col in value_cols:
+            count = sums[f'{col}_count'].to_numpy()
+            with np.errstate(invalid='ignore', divide='ignore'):
+                frame[col] = np.where(count > 0, sums[f'{col}_sum'].to_numpy() / count, np.nan)
+            frame[f'{col}_min'] = sums[f'{col}_min'].to_numpy()
+            frame[f'{col}_max'] = sums[f'{col}_max'].to_numpy()
+        frame['rows'] = sums['rows'].to_numpy()
+
+        frame = frame.iloc[np.argsort(times, kind='stable')].reset_index(drop=True)
+        # Marks the frame as holding summaries rather than rows of the data source, see DataManager.locate
+        frame.attrs['pyramid_level'] = level
+        return frame
+
+    def level_for(self, levels, low, high):
+        """
+        Returns the position in levels of the finest level with at most max_points buckets between low and high, or
+        None if even the finest level's buckets would be too coarse, i.e. the rows should be plotted as they are.
+        """
+        needed = (high - low) / self.max_points
+        # Rows of the data source are about `factor` times as dense as the finest buckets
+        if needed <= levels[0][0] / self.factor:
+            return None
+        for i, (width, _) in enumerate(levels):
+            if width >= needed:
+                return i
+        return len(levels) - 1
+
+    def requested_range(self, coarsest, plot_inputs):
+        """
+        Returns the (low, high) range of time to show, in numbers, given the coarsest summary frame filtered by the
+        panel's controls and its plot inputs, or None if no rows are selected.
+        """
+        times = self.to_numbers(coarsest[self.time_col])
+        if len(times) == 0 or np.isnan(times).all():
+            return None
+        low, high = np.nanmin(times), np.nanmax(times)
+
+        shown = plot_inputs.get(self.range_input) if self.range_input is not None else None
+        if shown is not None and len(shown) == 2 and shown[0] is not None and shown[1] is not None:
+            bounds = self.to_numbers(pd.Series(list(shown), dtype=coarsest[self.time_col].dtype))
+            low, high = max(low, bounds[0]), min(high, bounds[1])
+        return (low, high) if low < high else None
+
+    def slice(self, frame, width, low, high):
+        """
+        Returns the rows of a summary frame within one bucket of the range from low to high, found by binary search.
+        """
+        times = self.to_numbers(frame[self.time_col])
+        first = np.searchsorted(times, low - width, side='left')
+        last = np.searchsorted(times, high + width, side='right')
+        return frame.iloc[first:last]
+
+    @staticmethod
+    def to_numbers(times):
+        if pd.api.types.is_datetime64_any_dtype(times.dtype):
+            numbers = times.to_numpy(dtype='datetime64[ns]').view('int64').astype('float64')
+            numbers[times.isna().to_numpy()] = np.nan
+            return numbers
+        return times.to_numpy(dtype='float64', na_value=np.nan)
+
+    @staticmethod
+    def from_numbers(numbers, dtype):
+        if pd.api.types.is_datetime64_any_dtype(dtype):
+            times = pd.Series(pd.to_datetime(np.round(numbers).astype('int64'), unit='ns'))
+            tz = getattr(dtype, 'tz', None)
+            return times.dt.tz_localize('UTC').dt.tz_convert(tz) if tz is not None else times
+        return numbers
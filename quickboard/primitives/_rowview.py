@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+
+
+class RowView:
+    """
+    A lazy selection of rows of a DataFrame by position. Chains of row filters (plugins with `selects_rows`) narrow down
+    the positions without copying every column of the frame at each step: filters only gather the columns they look at,
+    and the selected rows are copied once, by to_frame. Supports the DataFrame operations row filters use, i.e.
+    `view[col]` for a column and `view[mask]` for a narrower view.
+    Inputs:
+        frame = DataFrame to select rows from
+        positions = sorted array of the positions of selected rows; None for all rows
+    """
+    def __init__(self, frame, positions=None):
+        self.frame = frame
+        self.positions = positions
+
+    @property
+    def columns(self):
+        return self.frame.columns
+
+    @property
+    def index(self):
+        return self.frame.index if self.positions is None else self.frame.index[self.positions]
+
+    def __len__(self):
+        return len(self.frame) if self.positions is None else len(self.positions)
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            column = self.frame[key]
+            return column if self.positions is None else column.iloc[self.positions]
+        return self.take(key)
+
+    def take(self, mask):
+        """
+        Returns the view of the rows of this view where the boolean mask is True.
+        """
+        mask = mask.to_numpy() if isinstance(mask, pd.Series) else np.asarray(mask)
+        if mask.all():
+            return self
+        positions = np.flatnonzero(mask) if self.positions is None else self.positions[mask]
+        return RowView(self.frame, positions)
+
+    def to_frame(self):
+        """
+        Returns the selected rows as a DataFrame; the frame itself if all rows are selected.
+        """
+        return self.frame if self.positions is None else self.frame.iloc[self.positions]
+
+    @staticmethod
+    def materialize(rows):
+        """
+        Returns rows as a DataFrame, whether it is a RowView or a DataFrame already.
+        """
+        return rows.to_frame() if isinstance(rows, RowView) else rows
@@ -0,0 +1,143 @@
+import hashlib
+import json
+import os
+import warnings
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.ipc as pa_ipc
+except ImportError:
+    pa = None
+
+
+class CsvSidecar:
+    """
+    A columnar copy of a CSV or TSV file, written next to it (or in a given directory) the first time the file is
+    parsed, so that later loads, in this or other worker processes, memory-map it instead of parsing the file again.
+    The copy is an uncompressed Arrow IPC (Feather) file, whose pages the operating system shares between the processes
+    reading it, along with a JSON schema file recording the columns and their types; the schema file is written last,
+    so its presence marks a complete copy. Both are named after a stamp of the file's size, modification time and a hash
+    of blocks sampled through it, so an edited file gets a new copy, and copies of old contents are removed.
+    Building the copy parses the file with the pyarrow CSV reader, in blocks on several threads. Columns get the same
+    dtypes as with pd.read_csv, except for columns mixing numbers and text: these hold strings throughout, where
+    pd.read_csv gives an object column of ints and strings depending on its internal chunks. Requires pyarrow.
+    Inputs:
+        path = path of the .csv or .tsv file
+        directory = directory to hold the copy, e.g. a fast local disk shared by all workers; None for the file's own
+        directory
+        block_size = number of bytes parsed at once by each thread
+    """
+    # Number of blocks of SAMPLE_BYTES hashed to tell files apart beyond their size and modification time
+    SAMPLES = 16
+    SAMPLE_BYTES = 2**16
+
+    def __init__(self, path, directory=None, block_size=2**24):
+        if pa is None:
+            raise ImportError("CsvSidecar requires the pyarrow package.")
+        self.path = path
+        self.directory = directory if directory is not None else os.path.dirname(os.path.abspath(path))
+        self.block_size = block_size
+
+    def stamp(self):
+        """
+        Returns a string identifying the file's contents from its size, modification time and sampled blocks.
+        """
+        stat = os.stat(self.path)
+        digest = hashlib.sha256(f"{stat.st_size}:{stat.st_mtime_ns}".encode())
+        with open(self.path, 'rb') as f:
+            for i in range(self.SAMPLES):
+                f.seek(stat.st_size * i // self.SAMPLES)
+                digest.update(f.read(self.SAMPLE_BYTES))
+            f.seek(max(stat.st_size - self.SAMPLE_BYTES, 0))
+            digest.update(f.read(self.SAMPLE_BYTES))
+        return digest.hexdigest()[:16]
+
+    def paths(self, stamp, dtype_backend):
+        # Copies for NumPy dtypes keep date and time columns as strings, like pd.read_csv, so differ from Arrow ones
+        variant = "pyarrow" if dtype_backend == "pyarrow" else "numpy"
+        base = os.path.join(self.directory, f"{os.path.basename(self.path)}.{stamp}.{variant}")
+        return base + ".arrow", base + ".schema.json"
+
+    def read(self, usecols=None, dtype_backend=None):
+        """
+        Returns the file's contents as a DataFrame, only holding the usecols columns if given, from the copy if up to
+        date and otherwise by parsing the file and writing the copy.
+        """
+        stamp = self.stamp()
+        arrow_path, schema_path = self.paths(stamp, dtype_backend)
+        table = self.load(arrow_path, schema_path)
+        if table is None:
+            table = self.parse(dtype_backend)
+            self.write(table, stamp, arrow_path, schema_path)
+
+        if usecols is not None:
+            table = table.select(list(usecols))
+        if dtype_backend == "pyarrow":
+            # Arrow-backed columns keep pointing at the memory-mapped pages rather than copying them
+            return table.to_pandas(types_mapper=pd.ArrowDtype)
+        return table.to_pandas(split_blocks=True)
+
+    def load(self, arrow_path, schema_path):
+        """
+        Returns the memory-mapped table of a complete copy, or None if there is none.
+        """
+        try:
+            with open(schema_path) as f:
+                schema = json.load(f)
+            table = pa_ipc.open_file(pa.memory_map(arrow_path)).read_all()
+        except (OSError, ValueError, pa.ArrowInvalid):
+            return None
+        if [[field.name, str(field.type)] for field in table.schema] != schema['columns']:
+            return None
+        return table
+
+    def parse(self, dtype_backend=None):
+        """
+        Parses the file into an Arrow table, in blocks on several threads.
+        """
+        read_options = pa_csv.ReadOptions(use_threads=True, block_size=self.block_size)
+        parse_options = pa_csv.ParseOptions(delimiter='\t' if self.path.endswith('.tsv') else ',')
+        convert_options = pa_csv.ConvertOptions()
+        if dtype_backend != "pyarrow":
+            # pd.read_csv leaves date and time columns as strings; the types inferred from the first block tell which
+            with pa_csv.open_csv(self.path, read_options=read_options, parse_options=parse_options) as reader:
+                temporal = [field.name for field in reader.schema if pa.types.is_temporal(field.type)]
+            convert_options = pa_csv.ConvertOptions(column_types={col: pa.string() for col in temporal})
+        return pa_csv.read_csv(self.path, read_options=read_options, parse_options=parse_options,
+                               convert_options=convert_options)
+
+    def write(self, table, stamp, arrow_path, schema_path):
+        """
+        Writes the copy of the table and its schema file, then removes copies of previous contents of the file. Only
+        warns if the directory can't be written to, as the table was parsed anyway.
+        """
+        # Write to temporary files renamed into place, so that other processes never read a partial copy
+        suffix = f".{os.getpid()}.tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with pa.OSFile(arrow_path + suffix, 'wb') as sink:
+                with pa_ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+            os.replace(arrow_path + suffix, arrow_path)
+            schema = {'path': os.path.abspath(self.path), 'rows': table.num_rows,
+                      'columns': [[field.name, str(field.type)] for field in table.schema]}
+            with open(schema_path + suffix, 'w') as f:
+                json.dump(schema, f)
+            os.replace(schema_path + suffix, schema_path)
+        except OSError as e:
+            warnings.warn(f"Could not write the columnar copy of {self.path} to {self.directory}: {e}", RuntimeWarning)
+            return
+
+        prefix = f"{os.path.basename(self.path)}."
+        for name in os.listdir(self.directory):
+            parts = name[len(prefix):].split('.', 2)
+            if not name.startswith(prefix) or len(parts) != 3 or parts[0] == stamp or len(parts[0]) != len(stamp):
+                continue
+            if parts[1] in ["numpy", "pyarrow"] and parts[2] in ["arrow", "schema.json"]:
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
@@ -0,0 +1,204 @@
+import io
+import itertools
+import os
+import queue
+import threading
+from collections import deque
+
+import pandas as pd
+
+
+class StreamSource:
+    """
+    An "abstract" class for live data sources, e.g. monitoring a running pipeline. New rows are pulled from the source on
+    each `poll` and appended to a bounded ring buffer holding only the most recent rows. Rows are indexed by their
+    position in the whole stream, so consumers can ask for just the rows arriving after a given cursor. Subclasses
+    implement `read_new`.
+    Inputs:
+        max_rows = maximal number of most recent rows kept in the buffer
+        columns = optional list of column names for the buffer before any rows arrive
+    """
+    def __init__(self, max_rows=100000, columns=None):
+        self.max_rows = max_rows
+        self.columns = columns
+        # Frames of rows in order of arrival, only concatenated when read, so that a poll costs O(new rows) rather
+        # than copying the whole buffer
+        self.chunks = deque()
+        self.buffered = 0
+        self.rows_seen = 0
+        self.lock = threading.Lock()
+
+    def read_new(self):
+        """
+        To be implemented by children classes. Returns a DataFrame of the rows that arrived since the last call, or
+        None if there are none. Should never block.
+        """
+        return None
+
+    def poll(self):
+        """
+        Appends any new rows from the source to the buffer, dropping the oldest rows past max_rows. Returns the number
+        of new rows.
+        """
+        with self.lock:
+            new = self.read_new()
+            if new is None or len(new) == 0:
+                return 0
+
+            new = new.reset_index(drop=True)
+            new.index = pd.RangeIndex(self.rows_seen, self.rows_seen + len(new))
+            self.rows_seen += len(new)
+
+            self.chunks.append(new)
+            self.buffered += len(new)
+            # Drop whole chunks of old rows, then trim the oldest chunk left
+            while self.buffered - len(self.chunks[0]) >= self.max_rows:
+                self.buffered -= len(self.chunks.popleft())
+            if self.buffered > self.max_rows:
+                self.chunks[0] = self.chunks[0].iloc[self.buffered - self.max_rows:]
+                self.buffered = self.max_rows
+            return len(new)
+
+    @property
+    def buffer(self):
+        """
+        The buffered rows as one DataFrame.
+        """
+        with self.lock:
+            return self.consolidate()
+
+    def consolidate(self):
+        # Concatenates the chunks into one, kept for later reads; called holding the lock
+        if len(self.chunks) == 0:
+            return pd.DataFrame(columns=self.columns)
+        if len(self.chunks) > 1:
+            self.chunks = deque([pd.concat(list(self.chunks))])
+        return self.chunks[0]
+
+    def snapshot(self):
+        """
+        Returns the current buffer along with the cursor marking the end of the stream so far.
+        """
+        with self.lock:
+            return self.consolidate(), self.rows_seen
+
+    def rows_since(self, cursor):
+        """
+        Returns the buffered rows arriving after the given cursor, along with the new cursor. Rows already dropped from
+        the buffer are skipped. Only the chunks holding such rows are concatenated.
+        """
+        with self.lock:
+            start = max(cursor, self.rows_seen - self.buffered)
+            selected = []
+            for chunk in reversed(self.chunks):
+                if len(chunk) > 0 and chunk.index[-1] < start:
+                    break
+                selected.append(chunk)
+            if len(selected) == 0:
+                return self.consolidate().iloc[:0], self.rows_seen
+            rows = pd.concat(selected[::-1]) if len(selected) > 1 else selected[0]
+            return rows.iloc[max(start - rows.index[0], 0):] if len(rows) > 0 else rows, self.rows_seen
+
+    @staticmethod
+    def to_frame(items):
+        """
+        Combines a list of DataFrames and/or dicts representing single rows into one DataFrame.
+        """
+        frames = []
+        rows = []
+        for item in items:
+            if isinstance(item, pd.DataFrame):
+                if rows:
+                    frames.append(pd.DataFrame(rows))
+                    rows = []
+                frames.append(item)
+            else:
+                rows.append(item)
+        if rows:
+            frames.append(pd.DataFrame(rows))
+
+        if len(frames) == 0:
+            return None
+        return pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+
+
+class GeneratorSource(StreamSource):
+    """
+    A stream fed by a generator yielding dicts (single rows) or DataFrames (batches of rows).
+    Inputs:
+        generator = generator or other iterator to pull from; must not block when no data is ready
+        rows_per_poll = maximal number of items to pull per poll
+        max_rows = maximal number of most recent rows kept in the buffer
+        columns = optional list of column names for the buffer before any rows arrive
+    """
+    def __init__(self, generator, rows_per_poll=1000, max_rows=100000, columns=None):
+        self.generator = iter(generator)
+        self.rows_per_poll = rows_per_poll
+        super().__init__(max_rows=max_rows, columns=columns)
+
+    def read_new(self):
+        return self.to_frame(itertools.islice(self.generator, self.rows_per_poll))
+
+
+class QueueSource(StreamSource):
+    """
+    A stream fed by a queue.Queue, filled by another thread (e.g. one reading from a socket), holding dicts (single
+    rows) or DataFrames (batches of rows).
+    Inputs:
+        source_queue = queue to drain on each poll
+        max_rows = maximal number of most recent rows kept in the buffer
+        columns = optional list of column names for the buffer before any rows arrive
+    """
+    def __init__(self, source_queue, max_rows=100000, columns=None):
+        self.queue = source_queue
+        super().__init__(max_rows=max_rows, columns=columns)
+
+    def read_new(self):
+        items = []
+        while True:
+            try:
+                items.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return self.to_frame(items)
+
+
+class FileTailSource(StreamSource):
+    """
+    A stream following a CSV/TSV file which is being appended to, like `tail -f`. The first line is read as the header,
+    and only complete lines are consumed.
+    Inputs:
+        path = path to the file to follow
+        sep = column separator; defaults to tab for .tsv files and comma otherwise
+        max_rows = maximal number of most recent rows kept in the buffer
+    """
+    def __init__(self, path, sep=None, max_rows=100000):
+        self.path = path
+        self.sep = sep if sep is not None else ('\t' if path.endswith('.tsv') else ',')
+        self.header = None
+        self.offset = 0
+        super().__init__(max_rows=max_rows)
+
+    def read_new(self):
+        if not os.path.exists(self.path):
+            return None
+
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset)
+            chunk = f.read()
+
+        # Leave any partially written last line for the next poll
+        end = chunk.rfind(b'\n')
+        if end == -1:
+            return None
+        chunk = chunk[:end + 1]
+        self.offset += len(chunk)
+
+        text = chunk.decode()
+        if self.header is None:
+            self.header, _, text = text.partition('\n')
+            self.header += '\n'
+            if text == "":
+                return None
+
+        return pd.read_csv(io.StringIO(self.header + text), sep=self.sep)
@@ -13,6 +13,29 @@ class ControlPlugin(dbc.Toast):
         extra_top_content = extra Dash objects to include above main control component
         header = header text/object
     """
+    # Maps class names to plugin classes, for looking up the configure method of serialized sidebar controls
+    registry = {}
+
+    # Whether configure may change values in the DataFrame, rather than only selecting rows or changing plot inputs
+    modifies_data = True
+
+    # Whether configure only selects rows (or leaves the data alone) using `df[col]` and `df[mask]`, so that it can be
+    # given a lazy RowView in place of a DataFrame
+    selects_rows = False
+
+    # Whether configure only keeps the rows matching a condition on their own values (or leaves the rows alone), so
+    # that it commutes with other such plugins and DynamicPanel.plan_filters may apply it earlier or later
+    commutes = False
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        ControlPlugin.registry[cls.__name__] = cls
+        # The flags describe configure, so subclasses overriding it without declaring them again get the safe defaults
+        # rather than those of the parent's configure
+        if 'configure' in cls.__dict__:
+            for flag in ['modifies_data', 'selects_rows', 'commutes']:
+                if flag not in cls.__dict__:
+                    setattr(cls, flag, getattr(ControlPlugin, flag))
 
     def __init__(self, component, component_inputs, extra_top_content=[], header=""):
         self.control_attributes = {}
@@ -52,6 +75,23 @@ class ControlPlugin(dbc.Toast):
 
         return df, updated_panel
 
+    @staticmethod
+    def selectivity(control_attributes, dp, control_value):
+        """
+        To be implemented by children classes which commute. Returns an estimate of the fraction of the data source's
+        rows kept by configure, from statistics cached by the DynamicPanel's DataManager, or None if unknown.
+        """
+        return None
+
+    @staticmethod
+    def selected_values(control_attributes, control_value):
+        """
+        To be implemented by children classes which only keep the rows whose value in control_attributes['data_col'] is
+        one of a list of values. Returns that list, letting DataManagers of partitioned sources read only the files
+        holding such rows, or None if the plugin selects rows otherwise.
+        """
+        return None
+
     def setup_internal_callback(self):
         """
         To be implemented by children classes. Declares callbacks to be used by internal components in the plugin, activated
@@ -58,6 +58,21 @@ PANEL_HEADER_STYLE = {
     "text-align": "center"
 }
 
+PANEL_EXPORT_STYLE = {
+    "text-align": "right",
+    "padding": "4px 10px",
+}
+
+PANEL_EXPORT_LINK_STYLE = {
+    "margin-left": "10px",
+    "padding": "0",
+    "border": "none",
+    "background": "none",
+    "color": "#0d6efd",
+    "text-decoration": "underline",
+    "cursor": "pointer",
+}
+
 PANEL_STYLE = {
     "padding": "10px",
 
@@ -1,8 +1,12 @@
-from dash import html, callback
-from dash.dependencies import Input, Output, State, ALL
+import json
+
+from dash import html
+from dash.dependencies import Input, Output, State, ALL, MATCH
 
 import pandas as pd
 
+from quickboard.utils.callbacks import deferred_callback, deferred_setup, deferred_shared_callback
+
 
 class GetUpdatedText:
     """
@@ -14,16 +18,56 @@ class GetUpdatedText:
         start_text = static text to use before the dynamic text
         end_text = static text to use after the dynamic text
     """
+    # Textboxes listening to components with pattern ids, e.g. the tables of DataPanels, by the ids of their targets.
+    # Those listening to the same property of components of the same kind share one pattern-matching callback
+    matched_texts = {}
+    # The shared callbacks, one per kind of target and property, see setup_callback
+    matched_callbacks = {}
+
     def __init__(self, target_component, target_prop, start_text, end_text):
         self.textbox = html.Div([])
         self.start_text = start_text
         self.end_text = end_text
+        self.target_component = target_component
+        self.target_prop = target_prop
 
-        callback(
+        # The target may get a new id from the panel or sidebar holding it, so wait before declaring the callback
+        deferred_setup(self.setup_callback)
+
+    def setup_callback(self):
+        target_id = getattr(self.target_component, 'id', None)
+        if isinstance(target_id, dict) and 'unique_id' in target_id:
+            target = json.dumps({k: v for k, v in target_id.items() if k != 'unique_id'}, sort_keys=True)
+            key = (target, self.target_prop, target_id['unique_id'])
+            if key not in GetUpdatedText.matched_texts:
+                GetUpdatedText.matched_texts[key] = self
+                pattern = {'component_type': 'updated_text', 'target': target, 'target_prop': self.target_prop}
+                self.textbox.id = {**pattern, 'unique_id': target_id['unique_id']}
+                # Keep one function per pattern, as shared callbacks are told apart by their function
+                update = GetUpdatedText.matched_callbacks.setdefault(
+                    (target, self.target_prop), lambda value, text_id: GetUpdatedText.update_matched(value, text_id)
+                )
+                deferred_shared_callback(
+                    Output({**pattern, 'unique_id': MATCH}, 'children'),
+                    Input({**target_id, 'unique_id': MATCH}, self.target_prop),
+                    Input({**pattern, 'unique_id': MATCH}, 'id')
+                )(update)
+                return
+
+        deferred_callback(
             Output(self.textbox, 'children'),
-            Input(target_component, target_prop)
+            Input(self.target_component, self.target_prop)
         )(self.get_update)
 
+    @staticmethod
+    def update_matched(value, text_id):
+        """
+        Pattern-matching callback shared by the textboxes listening to a property of components of the same kind.
+        Dispatches to get_update of the textbox updated.
+        """
+        textbox = GetUpdatedText.matched_texts[(text_id['target'], text_id['target_prop'], text_id['unique_id'])]
+        return textbox.get_update(value)
+
     def get_update(self, property):
         return f"{self.start_text}{property}{self.end_text}"
 
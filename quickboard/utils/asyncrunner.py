@@ -0,0 +1,65 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+# One event loop per process, running in a background thread, shared by all callbacks awaiting coroutines
+_loop = None
+_loop_pid = None
+_loop_lock = threading.Lock()
+
+# Semaphores bounding the coroutines running at once per key, only touched from the loop's thread
+_limits = {}
+
+# Thread pool for work carrying on after a callback returned, e.g. full figures of progressive PlotPanels
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def event_loop():
+    """
+    Returns the shared event loop, starting it if needed. A forked process (e.g. a gunicorn worker) starts its own, since
+    the thread running the parent's loop doesn't survive the fork.
+    """
+    global _loop, _loop_pid
+    with _loop_lock:
+        if _loop is None or _loop_pid != os.getpid():
+            _loop = asyncio.new_event_loop()
+            _loop_pid = os.getpid()
+            _limits.clear()
+            threading.Thread(target=_loop.run_forever, name="quickboard-async", daemon=True).start()
+        return _loop
+
+
+def background_executor():
+    """
+    Returns the shared thread pool for background work, starting it if needed. As for the event loop, a forked process
+    starts its own.
+    """
+    global _executor, _executor_pid
+    with _executor_lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="quickboard-background")
+            _executor_pid = os.getpid()
+        return _executor
+
+
+def run_async(coro, limit_key=None, limit=None):
+    """
+    Runs a coroutine on the shared event loop and returns its result, blocking the calling thread until it is done, so
+    each caller still occupies its thread for the whole call. When limit is given, at most that many coroutines with
+    the same limit_key run at once, the others waiting their turn.
+    """
+    if limit is not None:
+        coro = _limited(coro, limit_key, limit)
+    return asyncio.run_coroutine_threadsafe(coro, event_loop()).result()
+
+
+async def _limited(coro, key, limit):
+    semaphore = _limits.get(key)
+    if semaphore is None:
+        semaphore = _limits[key] = asyncio.Semaphore(limit)
+    async with semaphore:
+        return await coro
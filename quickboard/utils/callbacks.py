@@ -0,0 +1,114 @@
+import functools
+import hashlib
+import json
+import time
+
+from dash import callback, clientside_callback
+from plotly.io.json import to_json_plotly
+
+from quickboard.utils.profiling import StartupProfile
+
+
+PENDING_CALLBACKS = []
+
+# Functions declaring callbacks once all components of the board exist, see deferred_setup
+PENDING_SETUPS = []
+
+# Precomputed callback outputs for given inputs, e.g. from warming up the default state of panels
+SNAPSHOTS = {}
+
+
+def deferred_callback(*args, **kwargs):
+    """
+    Used like dash.callback, except the callback only gets registered with Dash once `register_callbacks` is called,
+    which generate_layout does when the app is created. Keeps constructing board components cheap.
+    """
+    def wrapper(func):
+        PENDING_CALLBACKS.append((args, kwargs, func))
+        return func
+    return wrapper
+
+
+def deferred_shared_callback(*args, **kwargs):
+    """
+    Used like deferred_callback, for a callback shared by many components, e.g. a pattern-matching callback declared
+    by each component of a kind. The callback is only added once while pending registration. A clientside callback
+    may be given as a JavaScript function string in place of func.
+    """
+    def wrapper(func):
+        if not any(f is func for _, _, f in PENDING_CALLBACKS):
+            PENDING_CALLBACKS.append((args, kwargs, func))
+        return func
+    return wrapper
+
+
+def deferred_setup(func):
+    """
+    Calls func without arguments when callbacks get registered, before registering them, e.g. to declare callbacks
+    whose dependencies should only be resolved to ids once the whole board is built. Pending calls of equal functions
+    are only made once.
+    """
+    if func not in PENDING_SETUPS:
+        PENDING_SETUPS.append(func)
+
+
+def deferred_clientside_callback(function, *args, **kwargs):
+    """
+    Used like dash.clientside_callback with a JavaScript function given as a string, deferred like deferred_callback.
+    """
+    PENDING_CALLBACKS.append((args, kwargs, function))
+
+
+def register_callbacks():
+    """
+    Registers all pending deferred callbacks with Dash, in the order they were declared.
+    """
+    start = time.perf_counter()
+    setups = PENDING_SETUPS[:]
+    del PENDING_SETUPS[:]
+    for setup in setups:
+        setup()
+
+    pending = PENDING_CALLBACKS[:]
+    del PENDING_CALLBACKS[:]
+    for args, kwargs, func in pending:
+        if isinstance(func, str):
+            clientside_callback(func, *args, **kwargs)
+        else:
+            callback(*args, **kwargs)(serve_snapshots(func))
+
+    StartupProfile.record_callbacks(len(pending), time.perf_counter() - start)
+
+
+def callback_key(func):
+    # Bound methods are created anew on each attribute access, so identify them by their object and function
+    return id(getattr(func, '__self__', None)), getattr(func, '__func__', func)
+
+
+def snapshot_key(args):
+    # Normalize arguments the way they come back from the browser, e.g. tuples as lists and numpy values as numbers
+    normalized = json.dumps(json.loads(to_json_plotly(list(args))), sort_keys=True)
+    return hashlib.sha256(normalized.encode()).hexdigest()
+
+
+def record_snapshot(func, args, outputs):
+    """
+    Stores the outputs of a callback function for the given arguments, to be returned by the registered callback
+    whenever it is called with equal arguments instead of calling the function.
+    """
+    SNAPSHOTS.setdefault(callback_key(func), {})[snapshot_key(args)] = outputs
+
+
+def serve_snapshots(func):
+    """
+    Wraps a callback function so that calls with arguments recorded by record_snapshot return the recorded outputs.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        snapshots = SNAPSHOTS.get(callback_key(func))
+        if snapshots and not kwargs:
+            outputs = snapshots.get(snapshot_key(args))
+            if outputs is not None:
+                return outputs
+        return func(*args, **kwargs)
+    return wrapper
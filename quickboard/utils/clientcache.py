@@ -0,0 +1,39 @@
+# Clientside callbacks of the browser-side output cache of DynamicPanels (see DynamicPanel.cache_on_client). Entries map
+# the JSON of a panel's callback inputs to its outputs followed by their emitted_state, and are kept in a dcc.Store
+# holding {max_entries, order, entries}, with order listing keys from oldest to newest.
+
+# Serves the outputs for the current inputs from the cache when there, and otherwise requests them from the server
+CACHE_LOOKUP = """
+function(...args) {
+    const inputs = args.slice(0, -2);
+    const [cache, emitted] = args.slice(-2);
+    const noUpdate = window.dash_clientside.no_update;
+    const nOutputs = window.dash_clientside.callback_context.outputs_list.length;
+    const key = JSON.stringify(inputs);
+    const hit = cache && cache.entries[key];
+    if (hit === undefined) {
+        return Array(nOutputs - 1).fill(noUpdate).concat([{key: key, inputs: inputs}]);
+    }
+    if (hit[hit.length - 1] !== null && hit[hit.length - 1] === emitted) {
+        return Array(nOutputs).fill(noUpdate);
+    }
+    return hit.concat([noUpdate]);
+}
+"""
+
+# Stores the outputs shown after the server answered a request, evicting the oldest entries
+CACHE_STORE = """
+function(key, cache, ...outputs) {
+    if (!key) {
+        return window.dash_clientside.no_update;
+    }
+    const entries = Object.assign({}, cache.entries);
+    const order = cache.order.filter(k => k !== key);
+    entries[key] = outputs;
+    order.push(key);
+    while (order.length > cache.max_entries) {
+        delete entries[order.shift()];
+    }
+    return {max_entries: cache.max_entries, order: order, entries: entries};
+}
+"""
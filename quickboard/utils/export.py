@@ -0,0 +1,91 @@
+EXPORT_ROUTE = "/_quickboard/export"
+
+# Media type and file extension of each export format
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+    'arrow': ('application/vnd.apache.arrow.stream', 'arrows'),
+}
+
+# Clientside callback of DynamicPanels with export links (see DynamicPanel.link_exports). Keeps the session's current
+# control state in the hidden field of the links' form, posted to the export route, so that downloading needs no
+# callback; the state is sent in the request body, as it can outgrow the request lines servers accept.
+EXPORT_STATE = """
+function(dataState, interactiveData, ...controlValues) {
+    return JSON.stringify({data_state: dataState, interactive_data: interactiveData, control_values: controlValues});
+}
+"""
+
+
+def stream_frame(df, fmt, batch_rows=65536):
+    """
+    Returns a generator of the rows of df encoded in the given export format as chunks of bytes, one batch of rows at a
+    time, so that only one batch is encoded in memory at once whatever the size of df.
+    Inputs:
+        df = DataFrame to encode, without its index
+        fmt = one of the keys of EXPORT_FORMATS; parquet and arrow require pyarrow
+        batch_rows = number of rows encoded per chunk; each is a row group of parquet files
+    """
+    if fmt == 'csv':
+        return csv_chunks(df, batch_rows)
+    # Import pyarrow on first use, as every panel module imports this one; raise before any chunk is sent, rather than
+    # cutting a response short
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError(f"Exporting as {fmt} requires the pyarrow package.")
+    return arrow_chunks(df, fmt, batch_rows)
+
+
+def csv_chunks(df, batch_rows):
+    yield df.iloc[:0].to_csv(index=False).encode()
+    for start in range(0, len(df), batch_rows):
+        yield df.iloc[start:start + batch_rows].to_csv(index=False, header=False).encode()
+
+
+def arrow_chunks(df, fmt, batch_rows):
+    import pyarrow as pa
+    import pyarrow.ipc as pa_ipc
+    import pyarrow.parquet as pq
+
+    sink = ChunkSink()
+    # Infer the schema once from all rows, as a batch of only missing values would be typed differently
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+    writer = pq.ParquetWriter(sink, schema) if fmt == 'parquet' else pa_ipc.new_stream(sink, schema)
+    try:
+        for start in range(0, len(df), batch_rows):
+            batch = pa.Table.from_pandas(df.iloc[start:start + batch_rows], schema=schema, preserve_index=False)
+            writer.write_table(batch)
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+class ChunkSink:
+    """
+    A file-like object collecting the bytes written by pyarrow writers until drained.
+    """
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
@@ -0,0 +1,124 @@
+import functools
+import os
+import re
+import subprocess
+import sys
+import time
+
+
+class StartupProfile:
+    """
+    Collects timings of building a board, for measuring cold start latency. Use it as a context manager around building
+    the board and creating the app:
+
+        with StartupProfile() as profile:
+            board = make_board()
+            app = create_app(board)
+        print(profile.report())
+
+    Records the construction time of every tab and panel, and the time taken registering callbacks. Module import times
+    are measured separately in a fresh interpreter, since modules imported already can't be timed again.
+    Inputs:
+        import_modules = modules to import when measuring import times; set to [] to skip measuring imports
+    """
+    active = None
+
+    def __init__(self, import_modules=('quickboard.app', 'quickboard.base', 'quickboard.plugins')):
+        self.import_modules = list(import_modules)
+        self.constructions = []
+        self.callback_count = 0
+        self.callback_time = 0.0
+        self.total_time = 0.0
+
+    def __enter__(self):
+        StartupProfile.active = self
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.total_time = time.perf_counter() - self.start
+        StartupProfile.active = None
+        return False
+
+    @classmethod
+    def record_construction(cls, obj, elapsed):
+        if cls.active is not None:
+            cls.active.constructions.append((obj, elapsed))
+
+    @classmethod
+    def record_callbacks(cls, count, elapsed):
+        if cls.active is not None:
+            cls.active.callback_count += count
+            cls.active.callback_time += elapsed
+
+    def import_times(self):
+        """
+        Imports import_modules in a fresh interpreter with `-X importtime`, and returns a list of tuples
+        (module, self seconds, cumulative seconds) for packages and quickboard modules, slowest first.
+        """
+        if len(self.import_modules) == 0:
+            return []
+
+        # Pass on this interpreter's path, so the fresh one finds the same modules
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(p for p in sys.path if p != ""))
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', f"import {', '.join(self.import_modules)}"],
+            capture_output=True, text=True, env=env
+        )
+        if result.returncode != 0:
+            raise ImportError(f"Failed to import {self.import_modules}:\n{result.stderr.splitlines()[-1]}")
+        times = []
+        for line in result.stderr.splitlines():
+            match = re.match(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)", line)
+            if match is None:
+                continue
+            self_us, cumulative_us, _, module = match.groups()
+            if '.' not in module or module.startswith('quickboard'):
+                times.append((module, int(self_us) / 1e6, int(cumulative_us) / 1e6))
+        return sorted(times, key=lambda t: -t[2])
+
+    def report(self, top=15):
+        """
+        Returns a plain text report of import, construction and callback registration times.
+        """
+        lines = [f"Total time in profile: {self.total_time:.3f}s", "", "Imports (cumulative / self):"]
+        for module, self_time, cumulative in self.import_times()[:top]:
+            lines.append(f"  {cumulative:8.3f}s {self_time:8.3f}s  {module}")
+
+        lines += ["", "Construction:"]
+        tabs = [(obj, t) for obj, t in self.constructions if hasattr(obj, 'tab_label')]
+        for tab, tab_time in tabs:
+            # Panels are built before the tab holding them, so attribute them to it afterwards
+            contents = {id(c) for c in tab._traverse()}
+            inner = [(obj, t) for obj, t in self.constructions if id(obj) in contents]
+            inner_time = sum(t for _, t in inner)
+            lines.append(f"  {tab_time + inner_time:8.3f}s  tab '{tab.tab_label}' ({len(inner)} panels)")
+        slowest = sorted(
+            [(obj, t) for obj, t in self.constructions if not hasattr(obj, 'tab_label')], key=lambda x: -x[1]
+        )
+        for obj, t in slowest[:top]:
+            lines.append(f"  {t:8.3f}s  {self.describe(obj)}")
+
+        lines += ["", f"Callbacks: {self.callback_count} registered in {self.callback_time:.3f}s"]
+        return '\n'.join(lines)
+
+    @staticmethod
+    def describe(obj):
+        header = getattr(obj, 'header', None)
+        text = getattr(header, 'children', header)
+        return f"{type(obj).__name__} '{text}'" if isinstance(text, str) and text != "" else type(obj).__name__
+
+
+def profiled(init):
+    """
+    Decorator for __init__ methods recording the construction time of the object when a StartupProfile is active.
+    """
+    @functools.wraps(init)
+    def wrapper(self, *args, **kwargs):
+        if StartupProfile.active is None:
+            return init(self, *args, **kwargs)
+
+        start = time.perf_counter()
+        init(self, *args, **kwargs)
+        StartupProfile.record_construction(self, time.perf_counter() - start)
+    return wrapper
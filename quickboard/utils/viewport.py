@@ -0,0 +1,31 @@
+# Clientside callback of lazy DynamicPanels (see DynamicPanel.observe_visibility). Panels created hidden get their
+# visible store set by an IntersectionObserver whenever they enter or leave the viewport, with a margin so they start
+# updating slightly before being scrolled to.
+VISIBILITY_OBSERVER = """
+function(storeId, visible, panelId) {
+    const noUpdate = window.dash_clientside.no_update;
+    if (visible !== false) {
+        return noUpdate;
+    }
+    // Element ids of dict ids are their JSON with sorted keys, as rendered by Dash
+    const elementId = '{' + Object.keys(panelId).sort().map(
+        k => JSON.stringify(k) + ':' + JSON.stringify(panelId[k])
+    ).join(',') + '}';
+    setTimeout(() => {
+        const element = document.getElementById(elementId);
+        if (!element) {
+            return;
+        }
+        const observer = new IntersectionObserver(entries => {
+            const entry = entries[entries.length - 1];
+            if (!entry.target.isConnected) {
+                observer.disconnect();
+                return;
+            }
+            window.dash_clientside.set_props(storeId, {data: entry.isIntersecting});
+        }, {rootMargin: '200px'});
+        observer.observe(element);
+    }, 0);
+    return noUpdate;
+}
+"""
@@ -0,0 +1,104 @@
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+
+from dash import no_update
+
+from quickboard.base import DynamicPanel
+from quickboard.utils.callbacks import record_snapshot
+
+
+class WarmUp:
+    """
+    Computes the outputs of a board's panels for the default values of the sidebar and panel controls ahead of time,
+    e.g. when the server starts. The outputs are set as the initial properties of the panels' figures and tables, so
+    they show as soon as the page loads, and the panels' callbacks skip updating them without recomputing when first
+    called with the default values. Panels on interactive or streamed data are skipped.
+    Inputs:
+        board = Quickboard object whose callbacks have been registered, e.g. by generate_layout
+        max_workers = maximal number of panels evaluated at once
+    """
+    def __init__(self, board, max_workers=1):
+        self.board = board
+        self.max_workers = max_workers
+
+    def default_states(self):
+        """
+        Returns a list of (component, data_state) pairs, with the data_store state the panels in each component first
+        get called with.
+        """
+        board = self.board
+        if len(board.tab_list) > 0:
+            states = [
+                (tab, self.default_state(tab.sidebar_plugins, tab.tab_label)) for tab in board.tab_list
+            ]
+            # Content outside of tabs first gets the state of the first tab
+            return states + [(board.children[1], states[0][1])]
+
+        sidebar_plugins = board.sidebar.plugins if hasattr(board.sidebar, 'plugins') else []
+        return [(board.children[1], self.default_state(sidebar_plugins, ""))]
+
+    def default_state(self, sidebar_plugins, tab_name):
+        control_values = [plugin.control.value for plugin in sidebar_plugins if hasattr(plugin, 'control')]
+        return self.board.update_data({}, control_values, tab_name)
+
+    def jobs(self):
+        """
+        Returns a list of (function, data_state, panels, batched) tuples, for the callback functions to evaluate, the
+        data_store state they get called with on page load, the panels whose outputs they return, and whether they are
+        PanelBatch callbacks.
+        """
+        jobs = []
+        batches = []
+        for component, data_state in self.default_states():
+            for panel in component._traverse():
+                if not isinstance(panel, DynamicPanel):
+                    continue
+                if panel.update_callback is not None:
+                    jobs.append((panel.update_callback, data_state, [panel], False))
+                elif panel.panel_batch is not None and panel.panel_batch not in batches:
+                    batches.append(panel.panel_batch)
+                    batch = panel.panel_batch
+                    sources = [p.data_manager.source_type for p in batch.panels]
+                    if all(s in ["DataFrame", "csv", "tsv", "partitioned"] for s in sources):
+                        jobs.append((batch.update, data_state, batch.panels, True))
+        return jobs
+
+    def run(self):
+        """
+        Evaluates all jobs, returning the number of panels warmed up.
+        """
+        jobs = self.jobs()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            results = list(executor.map(lambda job: self.evaluate(*job), jobs))
+        return sum(results)
+
+    @staticmethod
+    def callback_args(data_state, panels, batched):
+        """
+        Returns the arguments a job's function gets called with on page load.
+        """
+        if batched:
+            return [data_state] + [v for p in panels for v in p.default_state_values()]
+        return panels[0].default_callback_args(data_state)
+
+    def evaluate(self, func, data_state, panels, batched):
+        try:
+            outputs = func(*self.callback_args(data_state, panels, batched))
+        except Exception as e:
+            warnings.warn(f"Could not warm up {func.__qualname__}: {e!r}", RuntimeWarning)
+            return 0
+
+        if not batched:
+            panels[0].set_initial_outputs(outputs)
+        else:
+            # Batches return the outputs of all their panels in one flat list
+            start = 0
+            for panel in panels:
+                count = len(panel.batch_outputs())
+                panel_outputs = outputs[start:start + count]
+                start += count
+                panel.set_initial_outputs(panel_outputs[0] if count == 1 else panel_outputs)
+
+        # Pages now load with the outputs and their emitted_state in place, so the first call has nothing to update
+        record_snapshot(func, self.callback_args(data_state, panels, batched), [no_update] * len(outputs))
+        return len(panels)
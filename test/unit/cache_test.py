@@ -0,0 +1,93 @@
+import functools
+import os
+import subprocess
+import sys
+
+import pandas as pd
+
+from quickboard.primitives import MemoryCache, DiskCache, make_cache_key, callable_fingerprint, frame_fingerprint
+
+
+def make_plotter(captured):
+    return lambda df: df.assign(label=captured)
+
+
+def plot_kinds(df):
+    return df[df['kind'].isin({'a', 'b', 'c'})]
+
+
+def test_cache_keys_depend_on_values_not_dict_order():
+    assert make_cache_key('output', {'a': 1, 'b': [1, 2]}) == make_cache_key('output', {'b': [1, 2], 'a': 1})
+    assert make_cache_key('output', {'a': 1}) != make_cache_key('output', {'a': 2})
+    assert make_cache_key('output', [1, 2]) != make_cache_key('output', [2, 1])
+
+
+def test_frame_fingerprint_identifies_rows_and_their_order():
+    df = pd.DataFrame({'x': range(5)}, index=[10, 11, 12, 13, 14])
+    assert frame_fingerprint(df.iloc[[0, 2]]) == frame_fingerprint(df[df['x'] % 2 == 0].iloc[:2])
+    assert frame_fingerprint(df.iloc[[0, 2]]) != frame_fingerprint(df.iloc[[2, 0]])
+    assert frame_fingerprint(df) != frame_fingerprint(df[['x']].rename(columns={'x': 'y'}))
+
+
+def test_fingerprint_tells_closures_apart_by_captured_values():
+    class Labels:
+        def __init__(self, text):
+            self.text = text
+
+    assert callable_fingerprint(make_plotter('a')) == callable_fingerprint(make_plotter('a'))
+    assert callable_fingerprint(make_plotter('a')) != callable_fingerprint(make_plotter('b'))
+    assert callable_fingerprint(make_plotter(Labels('a'))) != callable_fingerprint(make_plotter(Labels('b')))
+
+
+def test_fingerprint_tells_partials_apart_by_arguments():
+    assert callable_fingerprint(functools.partial(make_plotter, 'a')) != \
+        callable_fingerprint(functools.partial(make_plotter, 'b'))
+
+
+def test_fingerprint_refuses_unidentifiable_captured_values():
+    assert callable_fingerprint(make_plotter(pd.DataFrame({'a': [1]}))) is None
+    assert callable_fingerprint(functools.partial(plot_kinds, pd.DataFrame({'a': [1]}))) is None
+
+
+def test_fingerprint_is_equal_across_processes():
+    # Sets of strings are iterated in an order depending on the hash seed of the process
+    script = "from unit.cache_test import plot_kinds; from quickboard.primitives import callable_fingerprint; " \
+             "print(callable_fingerprint(plot_kinds))"
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    fingerprints = set()
+    for seed in ['1', '2']:
+        env = dict(os.environ, PYTHONHASHSEED=seed, PYTHONPATH=os.pathsep.join([root, os.path.dirname(root)]))
+        result = subprocess.run([sys.executable, '-c', script], env=env, capture_output=True, text=True, check=True)
+        fingerprints.add(result.stdout.strip())
+    assert len(fingerprints) == 1
+
+
+def test_memory_cache_returns_copies_and_evicts_least_recently_used():
+    cache = MemoryCache(max_bytes=800)
+    value = {'rows': [1, 2, 3]}
+    cache.set('a', value)
+    cache.get('a')['rows'].append(4)
+    assert cache.get('a') == value
+
+    for key in ['b', 'c', 'd']:
+        cache.get('a')
+        cache.set(key, 'x' * 300)
+    assert cache.get('a') == value
+    assert cache.get('b') is None
+    assert cache.size <= 800
+
+
+def test_memory_cache_spills_to_disk_cache(tmp_path):
+    disk = DiskCache(str(tmp_path / 'cache.db'))
+    cache = MemoryCache(max_bytes=500, spill=disk)
+    cache.set('a', 'x' * 300)
+    cache.set('b', 'y' * 300)
+    assert 'a' not in cache.entries
+    assert cache.get('a') == 'x' * 300
+
+
+def test_disk_cache_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    DiskCache(path).set('key', pd.DataFrame({'x': [1, 2]}))
+    pd.testing.assert_frame_equal(DiskCache(path).get('key'), pd.DataFrame({'x': [1, 2]}))
+    assert DiskCache(path).get('missing') is None
@@ -0,0 +1,164 @@
+import base64
+import json
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import pytest
+
+import quickboard.base as qbb
+import quickboard.plugins as plg
+from quickboard.app import get_app_server
+from quickboard.textboxes import GetDataTableSize, GetUpdatedControlValue
+
+
+@pytest.fixture(scope='module')
+def board():
+    df = pd.DataFrame({'kind': ['a', 'b', 'c'] * 20, 'x': range(60), 'y': range(60, 120), 'z': range(120, 180)})
+    plots = [
+        qbb.PlotPanel(plotter=px.scatter, plot_inputs={'x': 'x', 'y': 'y'}, data_source=df,
+                      plugins=[plg.PlotInputRadioButtons(plot_input='y', data_values=['y', 'z']),
+                               plg.DataFilterChecklist(data_col='kind', data_values=['a', 'b', 'c'])])
+        for _ in range(3)
+    ]
+    tables = [qbb.DataPanel(data_source=df) for _ in range(2)]
+    texts = [GetUpdatedControlValue(plot.plugins[0].control, "y = ", "") for plot in plots]
+    sizes = [GetDataTableSize(table.datatable, "", " rows") for table in tables]
+    displays = [plg.DataDisplay(data_source='rows') for _ in range(2)]
+    content = plots + tables + displays + [text.textbox for text in texts + sizes]
+    quickboard = qbb.Quickboard(content_list=content)
+    client = get_app_server(quickboard).test_client()
+    dependencies = client.get('/_dash-dependencies').get_json()
+    return client, dependencies, df, plots, tables, texts, sizes, displays
+
+
+def dependency(dependencies, component_type):
+    return next(d for d in dependencies if f'"component_type":"{component_type}"' in d['output'])
+
+
+def id_key(component_id):
+    return json.dumps(component_id, separators=(',', ':'), sort_keys=True)
+
+
+def trace_values(trace, key):
+    # Plotly sends numeric arrays base64-encoded
+    values = trace[key]
+    if isinstance(values, dict):
+        return np.frombuffer(base64.b64decode(values['bdata']), dtype=values['dtype'])
+    return np.asarray(values)
+
+
+def post(client, dep, outputs, inputs, state=()):
+    """
+    Posts a callback request the way the browser does for the given dependency, with outputs a list of (id, property)
+    pairs and inputs and state lists of (id, property, value) triples, or lists of those for ALL wildcards.
+    """
+    def prop(item):
+        return [prop(i) for i in item] if isinstance(item, list) else dict(zip(['id', 'property', 'value'], item))
+
+    output_list = [{'id': i, 'property': p} for i, p in outputs]
+    payload = {
+        'output': dep['output'],
+        'outputs': output_list if len(output_list) > 1 else output_list[0],
+        'inputs': [prop(i) for i in inputs],
+        'state': [prop(s) for s in state],
+        'changedPropIds': [f"{id_key(inputs[0][0])}.{inputs[0][1]}"],
+    }
+    response = client.post('/_dash-update-component', json=payload)
+    assert response.status_code == 200
+    return response.get_json()['response']
+
+
+def test_panels_share_one_callback_per_class(board):
+    _, dependencies, *_ = board
+    outputs = [d['output'] for d in dependencies]
+    assert sum('plot_graph' in o for o in outputs) == 1
+    assert sum('"table"' in o and 'updated_text' not in o for o in outputs) == 1
+    assert sum('data_display' in o for o in outputs) == 1
+    assert sum('updated_text' in o for o in outputs) == 2
+
+
+def test_plot_callback_dispatches_to_the_matched_panel(board):
+    client, dependencies, df, plots, *_ = board
+    plot = plots[1]
+    radio, checklist = plot.plugins
+    data_state = {'current_tab': '', 'sidebar_controls': []}
+    response = post(client, dependency(dependencies, 'plot_graph'),
+                    [(plot.graph.id, 'figure'), (plot.emitted_state.id, 'data')],
+                    [('data_store', 'data', data_state),
+                     [(radio.control.id, 'value', 'z'), (checklist.control.id, 'value', ['a'])],
+                     (plot.visible.id, 'data', True)],
+                    [(plot.emitted_state.id, 'data', None)])
+
+    assert list(response) == [id_key(plot.graph.id), id_key(plot.emitted_state.id)]
+    figure = response[id_key(plot.graph.id)]['figure']
+    assert figure['layout']['yaxis']['title']['text'] == 'z'
+    rows = df[df['kind'] == 'a']
+    np.testing.assert_array_equal(trace_values(figure['data'][0], 'x'), rows['x'].to_numpy())
+    np.testing.assert_array_equal(trace_values(figure['data'][0], 'y'), rows['z'].to_numpy())
+
+    # The same state again leaves the figure as the session already shows it
+    emitted = response[id_key(plot.emitted_state.id)]['data']
+    again = post(client, dependency(dependencies, 'plot_graph'),
+                 [(plot.graph.id, 'figure'), (plot.emitted_state.id, 'data')],
+                 [('data_store', 'data', data_state),
+                  [(radio.control.id, 'value', 'z'), (checklist.control.id, 'value', ['a'])],
+                  (plot.visible.id, 'data', True)],
+                 [(plot.emitted_state.id, 'data', emitted)])
+    assert id_key(plot.graph.id) not in again
+
+
+def test_table_callback_dispatches_to_the_matched_panel(board):
+    client, dependencies, df, _, tables, *_ = board
+    table = tables[1]
+    response = post(client, dependency(dependencies, 'table'),
+                    [(table.datatable.id, 'data'), (table.datatable.id, 'columns'), (table.emitted_state.id, 'data')],
+                    [('data_store', 'data', {'current_tab': '', 'sidebar_controls': []}), [],
+                     (table.visible.id, 'data', True)],
+                    [(table.emitted_state.id, 'data', None)])
+
+    outputs = response[id_key(table.datatable.id)]
+    assert outputs['data'] == df.to_dict('records')
+    assert [c['id'] for c in outputs['columns']] == list(df.columns)
+
+
+def test_lazy_panel_out_of_view_skips_its_update(board):
+    client, dependencies, _, _, tables, *_ = board
+    table = tables[0]
+    payload = {
+        'output': dependency(dependencies, 'table')['output'],
+        'outputs': [{'id': table.datatable.id, 'property': 'data'}, {'id': table.datatable.id, 'property': 'columns'},
+                    {'id': table.emitted_state.id, 'property': 'data'}],
+        'inputs': [{'id': 'data_store', 'property': 'data', 'value': {'current_tab': '', 'sidebar_controls': []}}, [],
+                   {'id': table.visible.id, 'property': 'data', 'value': False}],
+        'state': [{'id': table.emitted_state.id, 'property': 'data', 'value': None}],
+        'changedPropIds': [f"{id_key(table.visible.id)}.data"],
+    }
+    assert client.post('/_dash-update-component', json=payload).status_code == 204
+
+
+def test_text_callbacks_dispatch_to_the_matched_textbox(board):
+    client, dependencies, _, plots, _, texts, sizes, _ = board
+    text = texts[2]
+    control_dep = next(d for d in dependencies if 'updated_text' in d['output'] and 'panel_control' in d['output'])
+    response = post(client, control_dep, [(text.textbox.id, 'children')],
+                    [(plots[2].plugins[0].control.id, 'value', 'z'), (text.textbox.id, 'id', text.textbox.id)])
+    assert response == {id_key(text.textbox.id): {'children': 'y = z'}}
+
+    size = sizes[1]
+    size_dep = next(d for d in dependencies if 'updated_text' in d['output'] and 'table' in d['output'])
+    response = post(client, size_dep, [(size.textbox.id, 'children')],
+                    [(size.target_component.id, 'data', [{'x': 1}, {'x': 2}]),
+                     (size.textbox.id, 'id', size.textbox.id)])
+    assert response == {id_key(size.textbox.id): {'children': '2 rows'}}
+
+
+def test_display_callback_dispatches_to_the_matched_display(board):
+    client, dependencies, *_, displays = board
+    display = displays[1]
+    response = post(client, dependency(dependencies, 'data_display'),
+                    [(display.datatable.id, 'data'), (display.datatable.id, 'columns')],
+                    [('data_store', 'data', {'rows': {'a': {'0': 1, '1': 2}}}),
+                     (display.datatable.id, 'id', display.datatable.id)])
+    assert response == {id_key(display.datatable.id): {'data': [{'a': 1}, {'a': 2}],
+                                                       'columns': [{'id': 'a', 'name': 'a'}]}}
@@ -0,0 +1,76 @@
+import io
+import json
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import pytest
+
+import quickboard.base as qbb
+import quickboard.plugins as plg
+from quickboard.app import get_app_server
+
+
+@pytest.fixture(scope='module')
+def board():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({'kind': rng.choice(['a', 'b', 'c'], 5000), 'x': rng.random(5000), 'y': rng.random(5000)})
+    kinds = plg.DataFilterChecklist(data_col='kind', data_values=['a', 'b', 'c'])
+    plot = qbb.PlotPanel(plotter=px.scatter, plot_inputs={'x': 'x', 'y': 'y'}, data_source=df, plugins=[kinds],
+                         export=['csv', 'parquet', 'arrow'])
+    table = qbb.DataPanel(data_source=df, header="Sampled rows", export=['csv'])
+    sidebar = plg.DataFilterChecklist(data_col='kind', data_values=['a', 'b', 'c'])
+    quickboard = qbb.Quickboard(content_list=[plot, table], sidebar_plugins=[sidebar])
+    client = get_app_server(quickboard).test_client()
+    return client, df, plot, table, sidebar
+
+
+def export_state(sidebar, sidebar_values, control_values=()):
+    data_state = {'current_tab': '', 'sidebar_controls': [sidebar.serialize() + [sidebar_values]]}
+    return {'data_state': data_state, 'interactive_data': data_state, 'control_values': list(control_values)}
+
+
+def read_export(fmt, data):
+    if fmt == 'csv':
+        return pd.read_csv(io.BytesIO(data))
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    if fmt == 'parquet':
+        return pq.read_table(io.BytesIO(data)).to_pandas()
+    return pa.ipc.open_stream(data).read_all().to_pandas()
+
+
+@pytest.mark.parametrize('fmt', ['csv', 'parquet', 'arrow'])
+def test_export_streams_the_filtered_rows(board, fmt):
+    if fmt != 'csv':
+        pytest.importorskip('pyarrow')
+    client, df, plot, _, sidebar = board
+    state = export_state(sidebar, ['a', 'b'], [['a']])
+    response = client.post(f'/_quickboard/export/{plot.export_id}.{fmt}', data={'state': json.dumps(state)})
+
+    assert response.status_code == 200
+    assert response.is_streamed
+    exported = read_export(fmt, response.get_data())
+    expected = df[df['kind'] == 'a']
+    assert len(exported) == len(expected)
+    np.testing.assert_allclose(exported['x'].to_numpy(), expected['x'].to_numpy())
+
+
+def test_export_names_the_file_after_the_panel_header(board):
+    client, df, _, table, sidebar = board
+    response = client.post(f'/_quickboard/export/{table.export_id}.csv', json=export_state(sidebar, ['a', 'b', 'c']))
+
+    assert response.headers['Content-Disposition'] == 'attachment; filename="Sampled_rows.csv"'
+    assert len(read_export('csv', response.get_data())) == len(df)
+
+
+def test_export_rejects_unknown_panels_formats_and_states(board):
+    client, _, plot, table, sidebar = board
+    assert client.post('/_quickboard/export/99.csv', json=export_state(sidebar, ['a'])).status_code == 404
+    assert client.post(f'/_quickboard/export/{table.export_id}.parquet',
+                       json=export_state(sidebar, ['a'])).status_code == 404
+    assert client.post(f'/_quickboard/export/{plot.export_id}.csv', json={}).status_code == 400
+
+    state = export_state(sidebar, ['a'])
+    state['data_state']['sidebar_controls'][0][0] = 'NoSuchPlugin'
+    assert client.post(f'/_quickboard/export/{plot.export_id}.csv', json=state).status_code == 400
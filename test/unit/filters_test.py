@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import quickboard.base as qbb
+import quickboard.plugins as plg
+from quickboard.primitives import RowView, MemoryCache
+
+
+def make_frame(n=2000):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        'kind': rng.choice(['a', 'b', 'c', 'd'], n),
+        'group': rng.choice(['x', 'y'], n),
+        'value': rng.normal(size=n),
+        'count': rng.integers(0, 10, n),
+    })
+    df.loc[rng.choice(n, 50), 'kind'] = None
+    df.loc[rng.choice(n, 50), 'value'] = np.nan
+    # An index neither sorted nor starting at 0, which positions and labels must not be confused over
+    return df.set_index(rng.permutation(n) + 1000)
+
+
+def sidebar_state():
+    kinds = plg.DataFilterChecklist(data_col='kind', data_values=['a', 'b', 'c', 'd'])
+    group = plg.DataFilterRadioButtons(data_col='group', data_values=['x', 'y'])
+    values = plg.DataFilterRangeSlider(data_col='value', slider_min=-3, slider_max=3)
+    count = plg.DataFilterSlider(data_col='count', slider_min=0, slider_max=9)
+    return [
+        ['DataFilterChecklist', kinds.control_attributes, ['a', 'c']],
+        ['DataFilterRangeSlider', values.control_attributes, [-0.5, 1.5]],
+        ['DataFilterRadioButtons', group.control_attributes, 'y'],
+        ['DataFilterSlider', count.control_attributes, 4],
+    ]
+
+
+def naive_filter(df):
+    mask = df['kind'].isin(['a', 'c']) & (df['value'] >= -0.5) & (df['value'] <= 1.5)
+    return df[mask & (df['group'] == 'y') & (df['count'] == 4)]
+
+
+def test_row_view_chains_masks_like_boolean_indexing():
+    df = make_frame()
+    view = RowView(df)
+    view = view[view['kind'] == 'a']
+    view = view[view['value'] > 0]
+    view = view[view['count'] < 5]
+
+    expected = df[(df['kind'] == 'a') & (df['value'] > 0) & (df['count'] < 5)]
+    pd.testing.assert_frame_equal(view.to_frame(), expected)
+    pd.testing.assert_index_equal(view.index, expected.index)
+    assert len(view) == len(expected)
+
+
+def test_row_view_of_all_rows_is_the_frame():
+    df = make_frame()
+    view = RowView(df)
+    assert view[np.ones(len(df), dtype=bool)] is view
+    assert RowView.materialize(view) is df
+
+
+@pytest.mark.parametrize('cache', [None, MemoryCache()])
+def test_sidebar_filters_match_naive_pandas(cache):
+    df = make_frame()
+    panel = qbb.DataPanel(data_source=df, cache=cache)
+    sidebar_controls = sidebar_state()
+
+    # Twice, for the result cached by the first call when there is a cache
+    for _ in range(2):
+        result, _ = panel.apply_sidebar_transforms({'sidebar_controls': sidebar_controls})
+        pd.testing.assert_frame_equal(result, naive_filter(df))
+
+
+def test_plan_filters_orders_commuting_filters_by_selectivity():
+    df = make_frame()
+    panel = qbb.DataPanel(data_source=df)
+    steps = panel.sidebar_steps(sidebar_state())
+    plan = panel.plan_filters(steps)
+
+    selectivities = [step[3] for step in plan]
+    assert selectivities == sorted(selectivities)
+    assert sorted(step[0].__name__ for step in plan) == sorted(step[0].__name__ for step in steps)
+
+    # Any order of the filters gives the same rows
+    result, _ = panel.run_plan(plan, df)
+    reversed_result, _ = panel.run_plan([(p, a, v, None) for p, a, v in reversed(steps)], df)
+    pd.testing.assert_frame_equal(result, naive_filter(df))
+    pd.testing.assert_frame_equal(reversed_result, naive_filter(df))
+
+
+def test_plan_filters_keeps_plugins_modifying_data_in_place():
+    df = make_frame()
+    panel = qbb.DataPanel(data_source=df)
+    sums = plg.DataSumChecklist(data_col='group', data_values=['x', 'y'])
+    steps = panel.sidebar_steps(sidebar_state()[:2]) + [(plg.DataSumChecklist, sums.control_attributes, ['x'])] + \
+        panel.sidebar_steps(sidebar_state()[2:])
+    plan = panel.plan_filters(steps)
+
+    assert [step[0] for step in plan].index(plg.DataSumChecklist) == 2
+    assert {step[0] for step in plan[:2]} == {plg.DataFilterChecklist, plg.DataFilterRangeSlider}
@@ -0,0 +1,67 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('pyarrow')
+
+from quickboard.primitives import CsvSidecar, DataManager
+
+
+@pytest.fixture
+def table_file(tmp_path):
+    n = 1000
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        'id': np.arange(n),
+        'value': rng.normal(size=n),
+        'kind': rng.choice(['a', 'b', 'c'], n),
+        'day': pd.date_range('2024-01-01', periods=n, freq='h').astype(str),
+    })
+    df.loc[::7, 'value'] = np.nan
+    path = str(tmp_path / 'table.tsv')
+    df.to_csv(path, sep='\t', index=False)
+    return path
+
+
+def copies(path):
+    directory, name = os.path.split(path)
+    return sorted(f for f in os.listdir(directory) if f.startswith(name + '.'))
+
+
+def test_sidecar_round_trip_matches_read_csv(table_file):
+    expected = pd.read_csv(table_file, sep='\t')
+    for _ in range(2):
+        # The first load parses the file and writes the copy, the second memory-maps it
+        dm = DataManager(table_file, sidecar=True)
+        dm.load_data()
+        pd.testing.assert_frame_equal(dm.df, expected)
+    assert len(copies(table_file)) == 2
+
+
+def test_sidecar_reads_selected_columns(table_file):
+    CsvSidecar(table_file).read()
+    pd.testing.assert_series_equal(DataManager(table_file, sidecar=True).column('kind'),
+                                   pd.read_csv(table_file, sep='\t')['kind'])
+
+
+def test_sidecar_with_arrow_dtypes_matches_arrow_read_csv(table_file):
+    expected = DataManager(table_file, dtype_backend='pyarrow')
+    expected.load_data()
+    for _ in range(2):
+        dm = DataManager(table_file, sidecar=True, dtype_backend='pyarrow')
+        dm.load_data()
+        assert all(isinstance(dtype, pd.ArrowDtype) for dtype in dm.df.dtypes)
+        pd.testing.assert_frame_equal(dm.df, expected.df)
+
+
+def test_edited_file_gets_a_new_copy(table_file):
+    CsvSidecar(table_file).read()
+    old = copies(table_file)
+    with open(table_file, 'a') as f:
+        f.write("1000\t0.5\td\t2024-03-01 00:00:00\n")
+
+    df = CsvSidecar(table_file).read()
+    assert len(df) == 1001 and df['kind'].iloc[-1] == 'd'
+    assert copies(table_file) != old and len(copies(table_file)) == 2